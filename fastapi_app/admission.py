@@ -0,0 +1,246 @@
+"""
+Cost-based admission control from a cheap pre-inspection of the PDF.
+
+Before any text extraction or provider call, ``inspect_pdf`` reads the PDF
+structure with pdfminer in a PDF worker (``PdfWorkerPool.inspect``, under
+the same memory/CPU ceilings as the extraction) (cross-reference tables and page tree, no content
+stream parsing, no rendering): page count, pages with fonts (text layer) or
+with images only, object count and content stream size. From these it
+estimates a processing cost in "page units" and a cost class:
+
+- ``light`` / ``standard`` / ``heavy``: admitted, heavier documents count
+  more against the shared capacity (ADMISSION_CAPACITY page units in flight);
+  a request that does not fit waits up to ADMISSION_QUEUE_SECONDS, then is
+  rejected with ``AdmissionRejected`` (503)
+- ``oversize``: more than ADMISSION_MAX_PAGES pages or ADMISSION_MAX_COST
+  units, rejected immediately (413)
+
+The inspection also tells where the document should go: a PDF without any
+text layer cannot be read locally when OCR is unavailable (``route`` is
+"external"). Admissions, queueing, rejections and processing time are
+counted per cost class (exposed by /stats/admission).
+"""
+import asyncio
+import logging
+import mmap
+import os
+import time
+from dataclasses import dataclass, field
+from io import BytesIO
+from typing import Dict, Optional, Union
+
+from pdfminer.pdfdocument import PDFDocument
+from pdfminer.pdfpage import PDFPage
+from pdfminer.pdfparser import PDFParser
+from pdfminer.pdftypes import resolve1
+
+logger = logging.getLogger("fastapi-cv-parser")
+
+ADMISSION_MAX_PAGES = int(os.getenv("ADMISSION_MAX_PAGES", "50"))
+ADMISSION_MAX_COST = float(os.getenv("ADMISSION_MAX_COST", "200"))
+# Page units processed concurrently by the whole API
+ADMISSION_CAPACITY = float(os.getenv("ADMISSION_CAPACITY", "100"))
+ADMISSION_QUEUE_SECONDS = float(os.getenv("ADMISSION_QUEUE_SECONDS", "10"))
+# Cost of an image-only page relative to a text page (render + OCR)
+ADMISSION_OCR_PAGE_COST = float(os.getenv("ADMISSION_OCR_PAGE_COST", "10"))
+
+# Content streams: one extra page unit per 256 KB (dense layouts, embedded vector graphics)
+CONTENT_KB_PER_UNIT = 256
+# Upper bound (inclusive) of each admitted class, in page units
+COST_CLASSES = (("light", 5.0), ("standard", 20.0), ("heavy", float("inf")))
+
+
+class AdmissionRejected(Exception):
+    """The document is too costly to process now (503) or at all (413)."""
+
+    def __init__(self, status_code: int, detail: str, retry_after: Optional[int] = None) -> None:
+        super().__init__(detail)
+        self.status_code = status_code
+        self.detail = detail
+        self.retry_after = retry_after
+
+
+@dataclass
+class PdfInspection:
+    pages: int = 0
+    text_pages: int = 0
+    image_pages: int = 0
+    objects: int = 0
+    content_kb: float = 0.0
+    cost: float = 1.0
+    cost_class: str = "light"
+    # "local", or "external" when no page can be read without OCR
+    route: str = "local"
+    # Set when the structure could not be read (the parse itself will report the error)
+    error: Optional[str] = None
+    inspect_ms: float = 0.0
+    # Filled by AdmissionController.acquire
+    charged: float = field(default=0.0, repr=False)
+    admitted_at: float = field(default=0.0, repr=False)
+
+    @property
+    def image_only(self) -> bool:
+        return self.pages > 0 and self.text_pages == 0 and self.image_pages > 0
+
+    def headers(self) -> Dict[str, str]:
+        return {"X-Cost-Class": self.cost_class, "X-Estimated-Cost": str(self.cost)}
+
+
+def _is_image(xobject) -> bool:
+    xobject = resolve1(xobject)
+    subtype = getattr(xobject, "attrs", {}).get("Subtype")
+    return getattr(resolve1(subtype), "name", None) == "Image"
+
+
+def estimate_cost(text_pages: int, image_pages: int, content_kb: float, ocr: bool = True) -> float:
+    """Processing cost in page units; image-only pages are free when they will not be OCRed."""
+    ocr_cost = ADMISSION_OCR_PAGE_COST if ocr else 0.0
+    return round(max(1.0, text_pages + image_pages * ocr_cost + content_kb / CONTENT_KB_PER_UNIT), 2)
+
+
+def cost_class(cost: float, pages: int) -> str:
+    if pages > ADMISSION_MAX_PAGES or cost > ADMISSION_MAX_COST:
+        return "oversize"
+    return next(name for name, upper in COST_CLASSES if cost <= upper)
+
+
+def inspect_pdf(file_data: Union[bytes, mmap.mmap], ocr: bool = True) -> PdfInspection:
+    """
+    Read the structure of a PDF (no layout analysis, no rendering) and
+    estimate its processing cost.
+
+    Args:
+        file_data: PDF bytes, or a read-only mapping of its spool file (PDF worker)
+        ocr: Whether image-only pages will be OCRed (they dominate the cost)
+
+    Returns:
+        PdfInspection; on a malformed PDF the cost only reflects the file size
+        and ``error`` is set
+    """
+    start = time.perf_counter()
+    inspection = PdfInspection()
+    try:
+        document = PDFDocument(PDFParser(BytesIO(file_data) if isinstance(file_data, bytes) else file_data))
+        inspection.objects = sum(len(list(xref.get_objids())) for xref in document.xrefs)
+        content_bytes = 0
+        for page in PDFPage.create_pages(document):
+            inspection.pages += 1
+            resources = resolve1(page.resources) or {}
+            fonts = resolve1(resources.get("Font")) or {}
+            xobjects = resolve1(resources.get("XObject")) or {}
+            images = [_is_image(xobject) for xobject in xobjects.values()]
+            # Form XObjects may carry the text of the page
+            if fonts or not all(images):
+                inspection.text_pages += 1
+            elif images:
+                inspection.image_pages += 1
+            for stream in page.contents:
+                stream = resolve1(stream)
+                if hasattr(stream, "attrs"):
+                    content_bytes += resolve1(stream.attrs.get("Length", 0)) or 0
+        inspection.content_kb = round(content_bytes / 1024, 1)
+    except Exception as e:
+        inspection.error = str(e) or type(e).__name__
+        inspection.content_kb = round(len(file_data) / 1024, 1)
+
+    inspection.cost = estimate_cost(inspection.text_pages, inspection.image_pages, inspection.content_kb, ocr)
+    inspection.cost_class = cost_class(inspection.cost, inspection.pages)
+    if inspection.image_only and not ocr:
+        inspection.route = "external"
+    inspection.inspect_ms = round((time.perf_counter() - start) * 1000, 2)
+    return inspection
+
+
+class AdmissionController:
+    """Cost-weighted concurrency limit with a bounded wait, and per-class metrics."""
+
+    def __init__(self, capacity: float = ADMISSION_CAPACITY, queue_seconds: float = ADMISSION_QUEUE_SECONDS) -> None:
+        self.capacity = capacity
+        self.queue_seconds = queue_seconds
+        self.in_flight = 0.0
+        self.waiting = 0
+        self._condition: Optional[asyncio.Condition] = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self.classes: Dict[str, Dict[str, float]] = {}
+
+    def _get_condition(self) -> asyncio.Condition:
+        # asyncio primitives are bound to one event loop (tests start several)
+        loop = asyncio.get_running_loop()
+        if self._condition is None or self._loop is not loop:
+            self._condition, self._loop = asyncio.Condition(), loop
+        return self._condition
+
+    def _count(self, inspection: PdfInspection, event: str, value: float = 1) -> None:
+        counters = self.classes.setdefault(
+            inspection.cost_class, {"admitted": 0, "queued": 0, "rejected": 0, "completed": 0, "total_ms": 0.0}
+        )
+        counters[event] += value
+
+    async def acquire(self, inspection: PdfInspection) -> None:
+        """
+        Reserve the document's cost, waiting up to ``queue_seconds`` for capacity.
+
+        Raises:
+            AdmissionRejected: oversize document (413) or no capacity in time (503)
+        """
+        if inspection.cost_class == "oversize":
+            self._count(inspection, "rejected")
+            raise AdmissionRejected(
+                413,
+                f"Document too costly to process: {inspection.pages} pages, estimated cost {inspection.cost} "
+                f"(limits: {ADMISSION_MAX_PAGES} pages, cost {ADMISSION_MAX_COST})",
+            )
+
+        # A document costlier than the whole capacity runs alone
+        cost = min(inspection.cost, self.capacity)
+        condition = self._get_condition()
+        async with condition:
+            if self.in_flight + cost > self.capacity:
+                self._count(inspection, "queued")
+                self.waiting += 1
+                try:
+                    await asyncio.wait_for(
+                        condition.wait_for(lambda: self.in_flight + cost <= self.capacity), self.queue_seconds
+                    )
+                except asyncio.TimeoutError:
+                    self._count(inspection, "rejected")
+                    raise AdmissionRejected(
+                        503,
+                        f"Server busy: no capacity for a {inspection.cost_class} document within {self.queue_seconds}s",
+                        retry_after=max(1, int(self.queue_seconds)),
+                    )
+                finally:
+                    self.waiting -= 1
+            self.in_flight += cost
+        inspection.charged = cost
+        inspection.admitted_at = time.perf_counter()
+        self._count(inspection, "admitted")
+
+    async def release(self, inspection: PdfInspection) -> None:
+        """Return the document's cost to the pool and record its processing time."""
+        if not inspection.charged:
+            return
+        condition = self._get_condition()
+        async with condition:
+            self.in_flight -= inspection.charged
+            inspection.charged = 0.0
+            condition.notify_all()
+        self._count(inspection, "completed")
+        self._count(inspection, "total_ms", (time.perf_counter() - inspection.admitted_at) * 1000)
+
+    def stats(self) -> dict:
+        return {
+            "capacity": self.capacity,
+            "in_flight_cost": round(self.in_flight, 2),
+            "waiting": self.waiting,
+            "classes": {
+                name: {
+                    **{key: value for key, value in counters.items() if key != "total_ms"},
+                    "avg_ms": round(counters["total_ms"] / counters["completed"], 1) if counters["completed"] else 0.0,
+                }
+                for name, counters in self.classes.items()
+            },
+        }
+
+
+admission = AdmissionController()
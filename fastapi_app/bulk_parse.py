@@ -0,0 +1,228 @@
+"""
+Offline bulk parsing of a directory tree of CVs, without the HTTP API.
+
+Every ``*.pdf`` under the input directory goes through the same local
+pipeline as ``/parse-cv`` (``parse_pdf_locally`` then
+``transform_extracta_response`` into a ``CVSchema``), in a pool of worker
+processes with the PDF worker memory/CPU ceilings (pdf_worker.py). One JSON
+line per document is appended to the output file as soon as it is done:
+
+    {"path": ..., "sha256": ..., "ms": ..., "cv": {...}}      # parsed
+    {"path": ..., "sha256": ..., "ms": ..., "error": "..."}   # failed
+
+The output file is also the checkpoint: after an interruption, the same
+command skips every path already written (delete the lines of failed
+documents to retry them).
+
+When a worker dies (OOM killer, hard limit), every document in flight in
+the pool fails with it. Those documents are retried one at a time in a
+single-worker pool: only a document that kills its worker on its own is
+recorded as failed.
+
+Usage:
+    python bulk_parse.py <input_dir> <output.jsonl> [max_workers]
+"""
+import json
+import logging
+import math
+import multiprocessing
+import os
+import sys
+import time
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from concurrent.futures.process import BrokenProcessPool
+from pathlib import Path
+from typing import Dict, Iterable, Iterator, List, Set
+
+from pdf_worker import PDF_WORKER_MAX_DOCUMENTS, _init_worker, pdf_pool
+
+BULK_WORKERS = int(os.getenv("BULK_WORKERS", str(os.cpu_count() or 1)))
+# Documents submitted ahead of the workers (bounds memory on very large trees)
+BULK_WINDOW_PER_WORKER = 4
+
+
+def _init_bulk_worker() -> None:
+    # Workers already are isolated processes: extract in-process, under their own ceilings
+    _init_worker()
+    pdf_pool.workers = 0
+    import main  # noqa: F401  (import once per worker, not in the first document's time)
+
+    # Failures are reported in the output file
+    logging.getLogger("fastapi-cv-parser").setLevel(logging.CRITICAL)
+    logging.getLogger("pdfminer").setLevel(logging.ERROR)
+
+
+def parse_file(path: str, root: str) -> dict:
+    """Parse one PDF into a JSON Lines record (``cv`` or ``error``)."""
+    from coalescing import document_hash
+    from main import parse_pdf_locally, transform_extracta_response
+
+    record = {"path": os.path.relpath(path, root), "sha256": None, "ms": None}
+    start = time.perf_counter()
+    try:
+        data = Path(path).read_bytes()
+        record["sha256"] = document_hash(data)
+        cv_data = transform_extracta_response(parse_pdf_locally(data))
+        record["cv"] = cv_data.model_dump()
+    except Exception as e:
+        record["error"] = str(e)
+    record["ms"] = round((time.perf_counter() - start) * 1000, 1)
+    return record
+
+
+def iter_pdfs(root: Path) -> Iterator[Path]:
+    """Every PDF under ``root`` (case-insensitive extension), sorted by path."""
+    for path in sorted(root.rglob("*")):
+        if path.is_file() and path.suffix.lower() == ".pdf":
+            yield path
+
+
+def load_checkpoint(output: Path) -> Set[str]:
+    """Relative paths already written to ``output`` (a truncated last line is ignored)."""
+    done: Set[str] = set()
+    if not output.exists():
+        return done
+    with output.open(encoding="utf-8") as lines:
+        for line in lines:
+            try:
+                done.add(json.loads(line)["path"])
+            except (ValueError, KeyError):
+                continue
+    return done
+
+
+def percentile(values: List[float], q: float) -> float:
+    """Nearest-rank percentile (``q`` in 0..100), 0.0 for no values."""
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    rank = max(1, min(len(ordered), math.ceil(q / 100 * len(ordered))))
+    return ordered[rank - 1]
+
+
+def _new_pool(max_workers: int) -> ProcessPoolExecutor:
+    return ProcessPoolExecutor(
+        max_workers=max_workers,
+        mp_context=multiprocessing.get_context("spawn"),
+        initializer=_init_bulk_worker,
+        max_tasks_per_child=PDF_WORKER_MAX_DOCUMENTS or None,
+    )
+
+
+def _died_record(path: str, root: str) -> dict:
+    return {
+        "path": os.path.relpath(path, root), "sha256": None, "ms": None,
+        "error": "Worker process died while parsing the document",
+    }
+
+
+def isolate(suspects: Iterable[str], root: str) -> Iterator[dict]:
+    """
+    Records of the documents in flight when a worker died, each parsed alone
+    in a single-worker pool (replaced whenever a document kills it).
+    """
+    pool = None
+    try:
+        for path in suspects:
+            if pool is None:
+                pool = _new_pool(1)
+            try:
+                yield pool.submit(parse_file, path, root).result()
+            except BrokenProcessPool:
+                pool.shutdown(wait=False)
+                pool = None
+                yield _died_record(path, root)
+    finally:
+        if pool is not None:
+            pool.shutdown(wait=False, cancel_futures=True)
+
+
+def bulk_parse(input_dir: Path, output: Path, max_workers: int = BULK_WORKERS) -> dict:
+    """
+    Parse every PDF under ``input_dir`` not yet in ``output`` and append the results.
+
+    Returns:
+        Summary {"documents", "parsed", "failed", "skipped", "seconds",
+        "docs_per_sec", "p50_ms", "p99_ms"}
+    """
+    input_dir = Path(input_dir)
+    output = Path(output)
+    output.parent.mkdir(parents=True, exist_ok=True)
+    done = load_checkpoint(output)
+    pending = [
+        str(path) for path in iter_pdfs(input_dir)
+        if os.path.relpath(path, input_dir) not in done
+    ]
+    pending.reverse()  # popped from the end: keep the sorted order
+
+    summary = {"documents": len(pending) + len(done), "parsed": 0, "failed": 0, "skipped": len(done)}
+    timings: List[float] = []
+    window = max_workers * BULK_WINDOW_PER_WORKER
+    start = time.perf_counter()
+    pool = _new_pool(max_workers)
+    in_flight: Dict = {}
+    try:
+        with output.open("a", encoding="utf-8") as out:
+
+            def write(record: dict) -> None:
+                out.write(json.dumps(record, ensure_ascii=False) + "\n")
+                if "error" in record:
+                    summary["failed"] += 1
+                else:
+                    summary["parsed"] += 1
+                    timings.append(record["ms"])
+
+            while pending or in_flight:
+                while pending and len(in_flight) < window:
+                    path = pending.pop()
+                    in_flight[pool.submit(parse_file, path, str(input_dir))] = path
+                finished, _ = wait(in_flight, return_when=FIRST_COMPLETED)
+
+                suspects = []
+                for future in finished:
+                    path = in_flight.pop(future)
+                    try:
+                        write(future.result())
+                    except BrokenProcessPool:
+                        suspects.append(path)
+
+                if suspects:
+                    # A broken pool fails all its documents, running or queued: find the culprit alone
+                    suspects.extend(in_flight.values())
+                    in_flight.clear()
+                    pool.shutdown(wait=False, cancel_futures=True)
+                    for record in isolate(sorted(suspects), str(input_dir)):
+                        write(record)
+                        out.flush()
+                    pool = _new_pool(max_workers)
+                out.flush()
+    finally:
+        pool.shutdown(wait=False, cancel_futures=True)
+
+    elapsed = time.perf_counter() - start
+    processed = summary["parsed"] + summary["failed"]
+    summary.update({
+        "seconds": round(elapsed, 3),
+        "docs_per_sec": round(processed / elapsed, 2) if elapsed else 0.0,
+        "p50_ms": percentile(timings, 50),
+        "p99_ms": percentile(timings, 99),
+    })
+    return summary
+
+
+if __name__ == "__main__":
+    if len(sys.argv) < 3:
+        print("Usage: python bulk_parse.py <input_dir> <output.jsonl> [max_workers]")
+        sys.exit(1)
+    if not Path(sys.argv[1]).is_dir():
+        print(f"❌ {sys.argv[1]} n'est pas un dossier")
+        sys.exit(1)
+
+    workers = int(sys.argv[3]) if len(sys.argv) > 3 else BULK_WORKERS
+    report = bulk_parse(Path(sys.argv[1]), Path(sys.argv[2]), workers)
+    print(
+        f"{report['parsed']} CV parsés, {report['failed']} échecs, {report['skipped']} déjà traités "
+        f"(sur {report['documents']}) en {report['seconds']}s -> {report['docs_per_sec']} docs/s, "
+        f"p50 {report['p50_ms']}ms, p99 {report['p99_ms']}ms par document -> {sys.argv[2]}"
+    )
+    sys.exit(1 if report["failed"] else 0)
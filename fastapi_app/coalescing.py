@@ -0,0 +1,87 @@
+import asyncio
+import hashlib
+import logging
+from typing import Any, Callable, Dict, Hashable, Optional, Tuple
+
+from fastapi.concurrency import run_in_threadpool
+
+from deadline import Deadline
+
+logger = logging.getLogger("fastapi-cv-parser")
+
+
+def document_hash(file_data: bytes) -> str:
+    """
+    Return the SHA-256 hex digest of an uploaded document.
+
+    Used as the content part of every cache / coalescing key so that the same
+    PDF uploaded twice (retry, double click) maps to the same entry.
+    """
+    return hashlib.sha256(file_data).hexdigest()
+
+
+def flight_key(
+    file_data: bytes, backend: str, tenant: str, deadline: Optional[Deadline] = None
+) -> Tuple[str, str, str, Optional[float]]:
+    """
+    Coalescing key of a parse: document, backend, tenant and time budget.
+
+    Callers joining an in-flight run get its result under the first caller's
+    ``Deadline``. With the budget (``X-Request-Timeout``) in the key, only
+    requests asking for the same budget share a run: a long-timeout request
+    never gets a 504 caused by another client's shorter deadline, and a joiner
+    loses at most the head start of the first caller.
+    """
+    return document_hash(file_data), backend, tenant, None if deadline is None else deadline.seconds
+
+
+class SingleFlight:
+    """
+    Deduplicate concurrent identical work ("single-flight").
+
+    The first caller for a given key starts the computation in the threadpool;
+    callers arriving while it is still running await the same task and receive
+    the same result (or the same exception). Once the task finishes the key is
+    released, so later calls start a fresh computation.
+
+    The shared task is shielded: if the request that started it is cancelled
+    (client disconnect), the other waiters still get the result. The task runs
+    with the first caller's arguments, deadline included: keys built with
+    ``flight_key`` only group requests with the same time budget.
+    """
+
+    def __init__(self) -> None:
+        self._inflight: Dict[Hashable, "asyncio.Future[Any]"] = {}
+        self.started = 0
+        self.shared = 0
+
+    async def do(self, key: Hashable, func: Callable[..., Any], *args: Any) -> Tuple[Any, bool]:
+        """
+        Run ``func(*args)`` once per in-flight ``key``.
+
+        Returns:
+            Tuple (result, shared) where ``shared`` is True when the caller
+            joined a computation started by another request.
+        """
+        task = self._inflight.get(key)
+        shared = task is not None
+
+        if task is None:
+            task = asyncio.ensure_future(run_in_threadpool(func, *args))
+            self._inflight[key] = task
+            task.add_done_callback(lambda _t, k=key: self._inflight.pop(k, None))
+            self.started += 1
+        else:
+            self.shared += 1
+            logger.info(f"Joining in-flight parse for key {key}")
+
+        result = await asyncio.shield(task)
+        return result, shared
+
+    def stats(self) -> dict:
+        """Counters for monitoring: started computations, joined callers, in-flight keys."""
+        return {
+            "started": self.started,
+            "shared": self.shared,
+            "in_flight": len(self._inflight),
+        }
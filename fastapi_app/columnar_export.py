@@ -0,0 +1,209 @@
+"""
+Columnar export of parsed CVs (Parquet or Arrow IPC) for analytics.
+
+Parsed documents are streamed from the JSON Lines output of bulk_parse.py
+into four tables keyed by ``document_id`` (the SHA-256 of the PDF):
+
+- ``documents``: one row per CV (personal, profile, skill lists, counts)
+- ``experience`` / ``education`` / ``languages``: one row per item, with its
+  ``position`` in the CV
+
+Rows are buffered per table and written as one row group (Parquet) or
+record batch (Arrow) every EXPORT_ROW_GROUP_SIZE rows, so memory stays
+bounded whatever the number of CVs. Column names and order follow
+``CVSchema`` (schemas.py). Requires the optional ``pyarrow`` package.
+
+Usage:
+    python columnar_export.py <cvs.jsonl> <output_dir> [parquet|arrow]
+"""
+import json
+import os
+import sys
+import time
+from pathlib import Path
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Tuple
+
+from schemas import EducationItem, ExperienceItem, LanguageItem, Personal, Profile
+
+try:
+    import pyarrow
+    import pyarrow.ipc
+    import pyarrow.parquet
+except ImportError:  # optional dependency
+    pyarrow = None
+
+EXPORT_ROW_GROUP_SIZE = int(os.getenv("EXPORT_ROW_GROUP_SIZE", "50000"))
+EXPORT_COMPRESSION = os.getenv("EXPORT_COMPRESSION", "zstd")
+
+EXPORT_FORMATS = {"parquet": ".parquet", "arrow": ".arrow"}
+
+# Child tables: CV list field -> item model
+CHILD_TABLES = {"experience": ExperienceItem, "education": EducationItem, "languages": LanguageItem}
+
+
+def _document_columns() -> List[str]:
+    return (
+        ["document_id", "path"]
+        + list(Personal.model_fields)
+        + list(Profile.model_fields)
+        + ["technical_skills", "soft_skills", "experience_count", "education_count", "languages_count"]
+    )
+
+
+def flatten_cv(document_id: str, cv: dict, path: Optional[str] = None) -> Dict[str, List[dict]]:
+    """
+    Rows of every table for one ``CVSchema`` dict.
+
+    Returns:
+        {"documents": [row], "experience": [rows], "education": [rows], "languages": [rows]}
+    """
+    document = {"document_id": document_id, "path": path}
+    for section, model in (("personal", Personal), ("profile", Profile)):
+        values = cv.get(section) or {}
+        document.update({name: values.get(name) for name in model.model_fields})
+    skills = cv.get("skills") or {}
+    document["technical_skills"] = list(skills.get("technical") or [])
+    document["soft_skills"] = list(skills.get("soft") or [])
+
+    rows = {"documents": [document]}
+    for table, model in CHILD_TABLES.items():
+        items = cv.get(table) or []
+        document[f"{table}_count"] = len(items)
+        rows[table] = [
+            {"document_id": document_id, "position": position, **{name: item.get(name) for name in model.model_fields}}
+            for position, item in enumerate(items)
+        ]
+    return rows
+
+
+def table_schemas() -> Dict[str, "pyarrow.Schema"]:
+    """Explicit Arrow schemas: batches of all-null columns must keep their types."""
+    string, integer = pyarrow.string(), pyarrow.int32()
+    types = {
+        "technical_skills": pyarrow.list_(string),
+        "soft_skills": pyarrow.list_(string),
+        "experience_count": integer,
+        "education_count": integer,
+        "languages_count": integer,
+    }
+    schemas = {"documents": pyarrow.schema([(name, types.get(name, string)) for name in _document_columns()])}
+    for table, model in CHILD_TABLES.items():
+        schemas[table] = pyarrow.schema(
+            [("document_id", string), ("position", integer)] + [(name, string) for name in model.model_fields]
+        )
+    return schemas
+
+
+class TableWriter:
+    """Column buffers of one table, written out every ``row_group_size`` rows."""
+
+    def __init__(self, path: Path, schema: "pyarrow.Schema", export_format: str, row_group_size: int) -> None:
+        self.path = path
+        self.schema = schema
+        self.row_group_size = row_group_size
+        self.rows = 0
+        self.row_groups = 0
+        self._columns: Dict[str, list] = {name: [] for name in schema.names}
+        self._buffered = 0
+        if export_format == "parquet":
+            self._writer = pyarrow.parquet.ParquetWriter(str(path), schema, compression=EXPORT_COMPRESSION)
+        else:
+            self._sink = pyarrow.OSFile(str(path), "wb")
+            self._writer = pyarrow.ipc.new_file(
+                self._sink, schema, options=pyarrow.ipc.IpcWriteOptions(compression=EXPORT_COMPRESSION)
+            )
+
+    def append(self, row: Dict[str, Any]) -> None:
+        for name, values in self._columns.items():
+            values.append(row.get(name))
+        self._buffered += 1
+        if self._buffered >= self.row_group_size:
+            self.flush()
+
+    def flush(self) -> None:
+        if not self._buffered:
+            return
+        table = pyarrow.Table.from_pydict(self._columns, schema=self.schema)
+        self._writer.write_table(table, self.row_group_size)
+        self.rows += self._buffered
+        self.row_groups += 1
+        self._columns = {name: [] for name in self.schema.names}
+        self._buffered = 0
+
+    def close(self) -> None:
+        self.flush()
+        self._writer.close()
+        if hasattr(self, "_sink"):
+            self._sink.close()
+
+
+def iter_parsed(jsonl_path: Path) -> Iterator[Tuple[str, dict, Optional[str]]]:
+    """(document_id, cv, path) of every parsed record of a bulk_parse.py output; failures are skipped."""
+    with Path(jsonl_path).open(encoding="utf-8") as lines:
+        for line in lines:
+            try:
+                record = json.loads(line)
+            except ValueError:
+                continue
+            if record.get("cv") and record.get("sha256"):
+                yield record["sha256"], record["cv"], record.get("path")
+
+
+def export_columnar(
+    documents: Iterable[Tuple[str, dict, Optional[str]]],
+    output_dir: Path,
+    export_format: str = "parquet",
+    row_group_size: int = EXPORT_ROW_GROUP_SIZE,
+) -> dict:
+    """
+    Stream ``(document_id, cv, path)`` tuples into one columnar file per table.
+
+    Returns:
+        Report {"format", "documents", "tables": {table: {"path", "rows", "row_groups"}}, "seconds"}
+    """
+    if pyarrow is None:
+        raise RuntimeError("Columnar export requires the pyarrow package (pip install pyarrow)")
+    if export_format not in EXPORT_FORMATS:
+        raise ValueError(f"export_format must be one of: {', '.join(EXPORT_FORMATS)}")
+
+    start = time.perf_counter()
+    output_dir = Path(output_dir)
+    output_dir.mkdir(parents=True, exist_ok=True)
+    writers = {
+        table: TableWriter(output_dir / f"{table}{EXPORT_FORMATS[export_format]}", schema, export_format, row_group_size)
+        for table, schema in table_schemas().items()
+    }
+    count = 0
+    try:
+        for document_id, cv, path in documents:
+            for table, rows in flatten_cv(document_id, cv, path).items():
+                for row in rows:
+                    writers[table].append(row)
+            count += 1
+    finally:
+        for writer in writers.values():
+            writer.close()
+
+    return {
+        "format": export_format,
+        "documents": count,
+        "tables": {
+            table: {"path": str(writer.path), "rows": writer.rows, "row_groups": writer.row_groups}
+            for table, writer in writers.items()
+        },
+        "seconds": round(time.perf_counter() - start, 3),
+    }
+
+
+if __name__ == "__main__":
+    if len(sys.argv) < 3:
+        print("Usage: python columnar_export.py <cvs.jsonl> <output_dir> [parquet|arrow]")
+        sys.exit(1)
+    if pyarrow is None:
+        print("❌ pyarrow n'est pas installé: pip install pyarrow")
+        sys.exit(1)
+
+    report = export_columnar(iter_parsed(Path(sys.argv[1])), Path(sys.argv[2]), sys.argv[3] if len(sys.argv) > 3 else "parquet")
+    print(f"{report['documents']} CV exportés ({report['format']}) en {report['seconds']}s")
+    for name, info in report["tables"].items():
+        print(f"  {name}: {info['rows']} lignes, {info['row_groups']} groupes -> {info['path']}")
@@ -0,0 +1,138 @@
+"""
+Text compaction and token budgeting before LLM calls.
+
+pdfplumber output carries a lot of tokens the model does not need: headers
+and footers repeated on every page, page numbers, runs of whitespace and
+words hyphenated across line breaks. Removing them shrinks the prompt, and
+the Ollama context window (``num_ctx``) is then sized to the actual input
+instead of a fixed default.
+"""
+import math
+import os
+import re
+from collections import Counter
+from typing import List, Tuple
+
+OLLAMA_INPUT_TOKEN_BUDGET = int(os.getenv("OLLAMA_INPUT_TOKEN_BUDGET", "2000"))
+OLLAMA_OUTPUT_TOKENS = int(os.getenv("OLLAMA_OUTPUT_TOKENS", "1500"))
+OLLAMA_MIN_CTX = int(os.getenv("OLLAMA_MIN_CTX", "2048"))
+OLLAMA_MAX_CTX = int(os.getenv("OLLAMA_MAX_CTX", "8192"))
+
+PAGE_NUMBER_PATTERN = re.compile(r'^\s*(?:page|p\.)?\s*\d{1,3}\s*(?:(?:/|of|sur)\s*\d{1,3})?\s*$', re.IGNORECASE)
+HYPHENATION_PATTERN = re.compile(r'(\w)-\n([a-zà-ÿ])')
+SPACES_PATTERN = re.compile(r'[ \t\u00a0]+')
+BLANK_LINES_PATTERN = re.compile(r'\n{3,}')
+TOKEN_PIECES_PATTERN = re.compile(r'\w+|[^\w\s]')
+# Page numbers and counters, not 4-digit years: "2016 - 2017" must not match "2014 - 2015"
+SHORT_NUMBER_PATTERN = re.compile(r'(?<!\d)\d{1,3}(?!\d)')
+
+# Only the first/last lines of a page are candidates for headers and footers
+EDGE_LINES = 3
+
+
+def _edge_key(line: str) -> str:
+    # "Jane Doe - CV - page 2" and "... page 3" are the same footer
+    return SHORT_NUMBER_PATTERN.sub('#', line.strip().lower())
+
+
+def _edge_indexes(lines: List[str]) -> List[int]:
+    """Indexes of the first and last EDGE_LINES non-blank lines of a page."""
+    filled = [index for index, line in enumerate(lines) if line.strip()]
+    return filled[:EDGE_LINES] + filled[-EDGE_LINES:]
+
+
+def compact_pages(page_texts: List[str]) -> Tuple[str, dict]:
+    """
+    Join page texts into one compact text.
+
+    Removes header/footer lines repeated on most pages, page-number lines,
+    hyphenation breaks and redundant whitespace.
+
+    Returns:
+        Tuple (text, stats) with raw/compacted sizes in characters.
+    """
+    pages = [text for text in page_texts if text]
+    raw_chars = sum(len(text) + 1 for text in pages)
+
+    boilerplate = set()
+    if len(pages) >= 2:
+        counts = Counter()
+        for text in pages:
+            lines = text.split('\n')
+            counts.update({_edge_key(lines[index]) for index in _edge_indexes(lines)})
+        threshold = max(2, math.ceil(len(pages) / 2))
+        boilerplate = {key for key, count in counts.items() if count >= threshold}
+
+    kept_pages = []
+    removed_lines = 0
+    seen = set()
+    for text in pages:
+        kept = []
+        lines = text.split('\n')
+        edges = set(_edge_indexes(lines))
+        for index, line in enumerate(lines):
+            if PAGE_NUMBER_PATTERN.match(line):
+                removed_lines += 1
+                continue
+            if index in edges:
+                key = _edge_key(line)
+                # Keep the first occurrence of a repeated header (often the candidate's name)
+                if line.strip() and key in boilerplate and key in seen:
+                    removed_lines += 1
+                    continue
+                seen.add(key)
+            kept.append(SPACES_PATTERN.sub(' ', line).strip())
+        kept_pages.append('\n'.join(kept))
+
+    text = '\n'.join(kept_pages)
+    text = HYPHENATION_PATTERN.sub(r'\1\2', text)
+    text = BLANK_LINES_PATTERN.sub('\n\n', text).strip() + '\n'
+
+    return text, {
+        "raw_chars": raw_chars,
+        "compacted_chars": len(text),
+        "removed_lines": removed_lines,
+    }
+
+
+def count_tokens(text: str) -> int:
+    """
+    Estimate the number of LLM tokens of ``text`` without a tokenizer:
+    one token per punctuation mark and about one per 4 characters of a word.
+    """
+    return sum(
+        max(1, math.ceil(len(piece) / 4)) for piece in TOKEN_PIECES_PATTERN.findall(text)
+    )
+
+
+def truncate_to_budget(text: str, budget: int = OLLAMA_INPUT_TOKEN_BUDGET) -> str:
+    """
+    Keep ``text`` within ``budget`` tokens: the beginning (header, experience)
+    and the end (education, skills) are kept, the middle is cut.
+    """
+    tokens = count_tokens(text)
+    if tokens <= budget:
+        return text
+    keep_chars = int(len(text) * budget / tokens)
+    head = keep_chars * 2 // 3
+    tail = keep_chars - head
+    return text[:head] + "\n\n[... texte tronqué ...]\n\n" + text[-tail:]
+
+
+def context_size(prompt_tokens: int, output_tokens: int = OLLAMA_OUTPUT_TOKENS) -> int:
+    """Smallest ``num_ctx`` (multiple of 1024) holding the prompt and the expected answer."""
+    needed = prompt_tokens + output_tokens
+    return max(OLLAMA_MIN_CTX, min(OLLAMA_MAX_CTX, math.ceil(needed / 1024) * 1024))
+
+
+def new_usage() -> dict:
+    """Per-request LLM usage report, filled by the extraction and Ollama calls."""
+    return {
+        "calls": 0,
+        "prompt_tokens": 0,
+        "completion_tokens": 0,
+        "estimated_prompt_tokens": 0,
+        "num_ctx": 0,
+        "raw_chars": 0,
+        "compacted_chars": 0,
+    }
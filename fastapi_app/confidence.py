@@ -0,0 +1,138 @@
+"""
+Confidence scoring of local extraction results for the tiered /parse-cv-smart mode.
+
+Each CVSchema section gets a score in [0, 1] from the essential fields of
+the ``parse_pdf_locally`` output (a name and a way to reach the candidate,
+company and role of each job, ...); optional sections the document does not
+have (no "Languages" header) are complete. Only sections scoring below the
+threshold are sent to Ollama, with the text of the matching CV sections
+instead of the whole document. External providers only accept documents:
+escalating to them uploads the whole PDF, and only the weak sections of
+their answer are merged.
+"""
+import os
+from typing import Any, Dict, List, Optional
+
+from extractors import (
+    EDUCATION_KEYWORDS,
+    EXPERIENCE_KEYWORDS,
+    LANGUAGES_KEYWORDS,
+    SUMMARY_KEYWORDS,
+)
+from text_index import TextIndex
+
+SMART_CONFIDENCE_THRESHOLD = float(os.getenv("SMART_CONFIDENCE_THRESHOLD", "0.6"))
+# Backend used for weak sections: "ollama", "external" or "none" (local result only)
+SMART_ESCALATION = os.getenv("SMART_ESCALATION", "ollama")
+
+SECTIONS = ["personal", "profile", "skills", "experience", "education", "languages"]
+# Sections a CV may leave out: not escalated when the document has no header for them
+OPTIONAL_SECTIONS = ["profile", "skills", "education", "languages"]
+
+SKILLS_SECTION_KEYWORDS = ['skills', 'compétences', 'competences', 'technologies']
+SECTION_KEYWORDS = {
+    "profile": SUMMARY_KEYWORDS,
+    "skills": SKILLS_SECTION_KEYWORDS,
+    "experience": EXPERIENCE_KEYWORDS,
+    "education": EDUCATION_KEYWORDS,
+    "languages": LANGUAGES_KEYWORDS,
+}
+# Headers that end a section when slicing the CV text for a reduced prompt
+SECTION_STOPS = ['experience', 'education', 'skills', 'compétences', 'projects', 'languages', 'langues', 'interests']
+MAX_SECTION_CHARS = 6000
+
+
+def _filled(item: Dict[str, Any], keys: List[str]) -> float:
+    return sum(1 for key in keys if item.get(key)) / len(keys)
+
+
+def score_fields(result: dict, text: Optional[str] = None) -> Dict[str, float]:
+    """
+    Score every section of a local extraction result (0 = missing, 1 = complete).
+
+    Args:
+        result: Local extraction result
+        text: Text of the document; an empty optional section is complete
+              when no keyword of it appears in the text
+    """
+    personal = result.get("personal") or {}
+    profile = result.get("profile") or {}
+    skills = result.get("skills") or []
+    if isinstance(skills, dict):
+        skills = (skills.get("technical") or []) + (skills.get("soft") or [])
+    experience = result.get("experience") or []
+    education = result.get("education") or []
+    languages = result.get("languages") or []
+
+    scores = {
+        # A name and any way to reach the candidate
+        "personal": (0.5 * bool(personal.get("full_name"))
+                     + 0.5 * bool(personal.get("email") or personal.get("phone") or personal.get("linkedin"))),
+        # Either a title or a summary
+        "profile": float(bool(profile.get("title") or profile.get("summary"))),
+        "skills": min(1.0, len(skills) / 5),
+        "experience": 0.0,
+        "education": 0.0,
+        # Levels are often not written
+        "languages": float(bool(languages)),
+    }
+    # Dates and descriptions are a bonus the local tier fills when written
+    if experience:
+        scores["experience"] = sum(_filled(item, ["company", "role"]) for item in experience) / len(experience)
+    if education:
+        scores["education"] = sum(_filled(item, ["school", "degree"]) for item in education) / len(education)
+
+    if text is not None:
+        index = TextIndex(text)
+        for section in OPTIONAL_SECTIONS:
+            if not scores[section] and index.section(SECTION_KEYWORDS[section], [])[1] is None:
+                scores[section] = 1.0
+
+    return {section: round(score, 3) for section, score in scores.items()}
+
+
+def weak_sections(scores: Dict[str, float], threshold: float = SMART_CONFIDENCE_THRESHOLD) -> List[str]:
+    """Sections whose confidence is below ``threshold``, in CVSchema order."""
+    return [section for section in SECTIONS if scores.get(section, 0.0) < threshold]
+
+
+def sections_text(full_text: str, sections: List[str]) -> str:
+    """
+    Text to send to the LLM for ``sections``: the matching CV sections only,
+    plus the header lines for personal data. Falls back to the whole text
+    when a section cannot be located.
+    """
+    index = TextIndex(full_text)
+    parts = []
+    for section in sections:
+        if section == "personal":
+            parts.append("\n".join(index.lines[:10]))
+            continue
+        stops = [stop for stop in SECTION_STOPS if stop not in SECTION_KEYWORDS[section]]
+        text, _ = index.section(SECTION_KEYWORDS[section], stops)
+        if not text.strip():
+            return full_text[:MAX_SECTION_CHARS]
+        parts.append(text.strip())
+
+    # Sections can overlap (e.g. summary keyword inside experience): drop duplicates
+    unique_parts = list(dict.fromkeys(parts))
+    return "\n\n".join(unique_parts)[:MAX_SECTION_CHARS]
+
+
+def merge_sections(local: dict, upgrade: dict, sections: List[str]) -> dict:
+    """
+    Replace the weak ``sections`` of the local result by the upgraded ones,
+    keeping local values whenever the upgrade is empty for a section.
+    """
+    merged = dict(local)
+    for section in sections:
+        value = upgrade.get(section)
+        if not value:
+            continue
+        if section in ("personal", "profile") and isinstance(value, dict):
+            current = dict(merged.get(section) or {})
+            current.update({key: val for key, val in value.items() if val})
+            merged[section] = current
+        else:
+            merged[section] = value
+    return merged
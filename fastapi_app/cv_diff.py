@@ -0,0 +1,78 @@
+"""
+Field-level diff between two CVSchema payloads, for the progressive parse.
+
+The client first fills its form with the local result, then receives only
+the fields the LLM / external provider changed. Operations use the JSON
+Patch (RFC 6902) shape and JSON Pointer paths so any JSON Patch library can
+apply them:
+
+    [{"op": "replace", "path": "/personal/email", "value": "jane@example.com"},
+     {"op": "add", "path": "/experience/2", "value": {...}},
+     {"op": "remove", "path": "/languages/1"}]
+"""
+from typing import Any, Dict, List
+
+
+def _pointer(path: str, key: Any) -> str:
+    return f"{path}/{str(key).replace('~', '~0').replace('/', '~1')}"
+
+
+def _is_record_list(value: Any) -> bool:
+    return isinstance(value, list) and all(isinstance(item, dict) for item in value)
+
+
+def diff_cv(old: Any, new: Any, path: str = "") -> List[Dict[str, Any]]:
+    """
+    Operations turning ``old`` into ``new``.
+
+    Dicts are compared key by key and lists of records (experience,
+    education, languages) item by item, so a corrected date only sends that
+    date. Lists of scalars (skills) are replaced as a whole.
+    """
+    if isinstance(old, dict) and isinstance(new, dict):
+        ops = []
+        for key, value in new.items():
+            if key not in old:
+                ops.append({"op": "add", "path": _pointer(path, key), "value": value})
+            else:
+                ops.extend(diff_cv(old[key], value, _pointer(path, key)))
+        for key in old:
+            if key not in new:
+                ops.append({"op": "remove", "path": _pointer(path, key)})
+        return ops
+
+    if _is_record_list(old) and _is_record_list(new) and (old or new):
+        ops = []
+        for index, item in enumerate(new):
+            if index < len(old):
+                ops.extend(diff_cv(old[index], item, _pointer(path, index)))
+            else:
+                ops.append({"op": "add", "path": _pointer(path, index), "value": item})
+        # Remove from the end so the remaining indexes stay valid
+        for index in range(len(old) - 1, len(new) - 1, -1):
+            ops.append({"op": "remove", "path": _pointer(path, index)})
+        return ops
+
+    if old != new:
+        return [{"op": "replace", "path": path, "value": new}]
+    return []
+
+
+def apply_diff(document: Any, ops: List[Dict[str, Any]]) -> Any:
+    """Apply operations produced by ``diff_cv`` in place and return ``document``."""
+    for op in ops:
+        keys = [part.replace("~1", "/").replace("~0", "~") for part in op["path"].split("/")[1:]]
+        if not keys:
+            document = op.get("value")
+            continue
+        parent = document
+        for key in keys[:-1]:
+            parent = parent[int(key)] if isinstance(parent, list) else parent[key]
+        last: Any = int(keys[-1]) if isinstance(parent, list) else keys[-1]
+        if op["op"] == "remove":
+            del parent[last]
+        elif op["op"] == "add" and isinstance(parent, list):
+            parent.insert(last, op["value"])
+        else:
+            parent[last] = op["value"]
+    return document
@@ -0,0 +1,384 @@
+"""
+Optional persistent store of parsed CVs with an inverted index for search.
+
+Every ``CVSchema`` returned by a parse endpoint is saved (SQLite, keyed by
+the document hash; the latest parse of a document replaces the previous
+one) and indexed in memory under normalized terms of four fields:
+
+- ``skill``: each technical/soft skill ("machine learning", "c++")
+- ``title``: words of the profile title and of the experience roles
+- ``company``: each employer, legal suffix removed ("acme" for "ACME Corp.")
+- ``location``: each comma-separated part of the address and of the
+  experience/education locations ("paris", "france")
+
+Postings are sets of integer document numbers, so boolean queries are set
+operations and stay in the milliseconds over hundreds of thousands of CVs.
+The index is rebuilt from SQLite on first use, then updated incrementally.
+
+Query syntax (``/search?q=``): ``field:value`` or bare terms (any field),
+quotes for multi-word values, ``AND`` (implicit), ``OR``, ``NOT`` and
+parentheses, e.g. ``skill:python skill:docker NOT location:paris``.
+Ranked results sum, over the matched positive terms, the field weight times
+the term's inverse document frequency.
+
+Stored CVs carry candidates' personal data: ``/search`` and
+``/stats/cv-store`` require CV_STORE_TOKEN in the ``X-Search-Token`` header
+(both answer 403 while it is unset).
+
+Import the output of bulk_parse.py into the store:
+    python cv_store.py import <cvs.jsonl>
+"""
+import heapq
+import json
+import logging
+import math
+import os
+import re
+import secrets
+import sqlite3
+import sys
+import threading
+import time
+import unicodedata
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+
+logger = logging.getLogger("fastapi-cv-parser")
+
+CV_STORE_ENABLED = os.getenv("CV_STORE_ENABLED", "false").lower() == "true"
+CV_STORE_PATH = Path(os.getenv("CV_STORE_PATH", str(Path(__file__).parent / "cv_store.sqlite3")))
+CV_STORE_TOKEN = os.getenv("CV_STORE_TOKEN")
+
+# Ranking weight of a match in each field
+FIELD_WEIGHTS = {"skill": 3.0, "title": 2.0, "company": 1.5, "location": 1.0}
+FIELDS = tuple(FIELD_WEIGHTS)
+
+COMPANY_SUFFIXES = {"inc", "llc", "ltd", "corp", "corporation", "co", "gmbh", "sa", "sas", "sarl", "plc", "group"}
+# Keep the characters that make skills distinct: "c++", "c#", "node.js"
+NORMALIZE_PATTERN = re.compile(r"[^\w+#.]+")
+QUERY_TOKEN_PATTERN = re.compile(r'\(|\)|(?:(\w+):)?"([^"]*)"|[^\s()]+')
+
+
+class QuerySyntaxError(ValueError):
+    """The search query could not be parsed."""
+
+
+def check_search_token(token: Optional[str]) -> bool:
+    """True when searching is enabled and ``token`` is CV_STORE_TOKEN."""
+    return bool(CV_STORE_TOKEN) and token is not None and secrets.compare_digest(token, CV_STORE_TOKEN)
+
+
+def normalize(text: Optional[str]) -> str:
+    """Lowercase, accents removed, punctuation (except + # .) collapsed to single spaces."""
+    if not text:
+        return ""
+    text = unicodedata.normalize("NFKD", text)
+    text = "".join(c for c in text if not unicodedata.combining(c)).lower()
+    return NORMALIZE_PATTERN.sub(" ", text).strip(" .")
+
+
+def field_terms(field: str, value: Optional[str]) -> List[str]:
+    """Index terms of one field value (also used to normalize query values)."""
+    text = normalize(value)
+    if not text:
+        return []
+    if field == "title":
+        return [word for word in text.split() if len(word) > 1]
+    if field == "company":
+        words = text.split()
+        while len(words) > 1 and words[-1] in COMPANY_SUFFIXES:
+            words.pop()
+        return [" ".join(words)]
+    if field == "location":
+        return [normalize(part) for part in value.split(",") if normalize(part)]
+    return [text]
+
+
+def cv_terms(cv: dict) -> Set[str]:
+    """``field:term`` keys of a CVSchema dict."""
+    values: Dict[str, List[Optional[str]]] = {field: [] for field in FIELDS}
+    skills = cv.get("skills") or {}
+    values["skill"] = list(skills.get("technical") or []) + list(skills.get("soft") or [])
+    values["title"].append((cv.get("profile") or {}).get("title"))
+    values["location"].append((cv.get("personal") or {}).get("address"))
+    for item in cv.get("experience") or []:
+        values["title"].append(item.get("role"))
+        values["company"].append(item.get("company"))
+        values["location"].append(item.get("location"))
+    for item in cv.get("education") or []:
+        values["location"].append(item.get("location"))
+    return {
+        f"{field}:{term}"
+        for field, field_values in values.items()
+        for value in field_values
+        for term in field_terms(field, value)
+    }
+
+
+def parse_query(query: str, default_operator: str = "and") -> tuple:
+    """
+    Parse a search query into a tree of ``("term", field, value)``,
+    ``("and", a, b)``, ``("or", a, b)`` and ``("not", a)`` nodes.
+
+    Raises:
+        QuerySyntaxError: empty query, unbalanced parentheses, dangling operator
+    """
+    tokens = []
+    for match in QUERY_TOKEN_PATTERN.finditer(query):
+        token = match.group(0)
+        if token in ("(", ")") or token.upper() in ("AND", "OR", "NOT"):
+            tokens.append((token.upper(), None, None))
+        elif match.group(2) is not None:
+            tokens.append(("TERM", match.group(1), match.group(2)))
+        else:
+            field, _, value = token.rpartition(":")
+            tokens.append(("TERM", field or None, value))
+    position = 0
+
+    def peek() -> Optional[str]:
+        return tokens[position][0] if position < len(tokens) else None
+
+    def take() -> tuple:
+        nonlocal position
+        if position >= len(tokens):
+            raise QuerySyntaxError("Unexpected end of query")
+        position += 1
+        return tokens[position - 1]
+
+    def parse_or() -> tuple:
+        node = parse_and()
+        while peek() == "OR":
+            take()
+            node = ("or", node, parse_and())
+        return node
+
+    def parse_and() -> tuple:
+        node = parse_not()
+        while peek() in ("AND", "NOT", "TERM", "("):
+            if peek() == "AND":
+                take()
+            node = (default_operator, node, parse_not())
+        return node
+
+    def parse_not() -> tuple:
+        if peek() == "NOT":
+            take()
+            return ("not", parse_not())
+        kind, field, value = take()
+        if kind == "(":
+            node = parse_or()
+            if take()[0] != ")":
+                raise QuerySyntaxError("Missing closing parenthesis")
+            return node
+        if kind != "TERM":
+            raise QuerySyntaxError(f"Unexpected '{kind}'")
+        if field is not None and field.lower() not in FIELD_WEIGHTS:
+            raise QuerySyntaxError(f"Unknown field '{field}' (use one of: {', '.join(FIELDS)})")
+        return ("term", field.lower() if field else None, value)
+
+    if not tokens:
+        raise QuerySyntaxError("Empty query")
+    tree = parse_or()
+    if position != len(tokens):
+        raise QuerySyntaxError(f"Unexpected '{tokens[position][0]}'")
+    return tree
+
+
+class CVStore:
+    """SQLite-backed store of parsed CVs with an in-memory inverted index."""
+
+    def __init__(self, path: Path = CV_STORE_PATH) -> None:
+        self.path = Path(path)
+        self._lock = threading.RLock()
+        self._db: Optional[sqlite3.Connection] = None
+        self._numbers: Dict[str, int] = {}
+        self._ids: List[Optional[str]] = []
+        self._doc_terms: Dict[int, Tuple[str, ...]] = {}
+        self._postings: Dict[str, Set[int]] = {}
+
+    def _connect(self) -> sqlite3.Connection:
+        """Open the database and load the index (first use only)."""
+        if self._db is None:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            db = sqlite3.connect(str(self.path), check_same_thread=False)
+            db.execute("PRAGMA journal_mode=WAL")
+            db.execute(
+                "CREATE TABLE IF NOT EXISTS cvs ("
+                "document_id TEXT PRIMARY KEY, cv TEXT NOT NULL, terms TEXT NOT NULL, "
+                "backend TEXT, parsed_at REAL NOT NULL)"
+            )
+            start = time.perf_counter()
+            for document_id, terms in db.execute("SELECT document_id, terms FROM cvs ORDER BY parsed_at"):
+                self._index(document_id, json.loads(terms))
+            self._db = db
+            logger.info(
+                f"CV store: {len(self._numbers)} CVs, {len(self._postings)} terms loaded "
+                f"in {(time.perf_counter() - start) * 1000:.0f}ms"
+            )
+        return self._db
+
+    def _index(self, document_id: str, terms: Iterable[str]) -> None:
+        self._unindex(document_id)
+        number = len(self._ids)
+        self._ids.append(document_id)
+        self._numbers[document_id] = number
+        self._doc_terms[number] = tuple(terms)
+        for term in self._doc_terms[number]:
+            self._postings.setdefault(term, set()).add(number)
+
+    def _unindex(self, document_id: str) -> None:
+        number = self._numbers.pop(document_id, None)
+        if number is None:
+            return
+        self._ids[number] = None
+        for term in self._doc_terms.pop(number, ()):
+            postings = self._postings.get(term)
+            if postings is not None:
+                postings.discard(number)
+                if not postings:
+                    del self._postings[term]
+
+    def add(self, document_id: str, cv: dict, backend: Optional[str] = None) -> None:
+        """Store (or replace) the parsed CV of a document and update the index."""
+        self.add_many([(document_id, cv)], backend)
+
+    def add_many(self, documents: Iterable[Tuple[str, dict]], backend: Optional[str] = None) -> int:
+        """Store ``(document_id, cv)`` pairs in one transaction; returns the number stored."""
+        rows = [(document_id, cv, sorted(cv_terms(cv))) for document_id, cv in documents]
+        with self._lock:
+            db = self._connect()
+            with db:
+                db.executemany(
+                    "INSERT OR REPLACE INTO cvs (document_id, cv, terms, backend, parsed_at) VALUES (?, ?, ?, ?, ?)",
+                    [
+                        (document_id, json.dumps(cv, ensure_ascii=False), json.dumps(terms), backend, time.time())
+                        for document_id, cv, terms in rows
+                    ],
+                )
+            for document_id, _, terms in rows:
+                self._index(document_id, terms)
+        return len(rows)
+
+    def get(self, document_ids: List[str]) -> Dict[str, dict]:
+        if not document_ids:
+            return {}
+        with self._lock:
+            rows = self._connect().execute(
+                f"SELECT document_id, cv FROM cvs WHERE document_id IN ({','.join('?' * len(document_ids))})",
+                document_ids,
+            ).fetchall()
+        return {document_id: json.loads(cv) for document_id, cv in rows}
+
+    def _term_keys(self, field: Optional[str], value: str) -> List[List[str]]:
+        """Index keys of a query term: one AND-group of keys per field searched."""
+        groups = []
+        for name in ([field] if field else FIELDS):
+            terms = field_terms(name, value)
+            if terms:
+                groups.append([f"{name}:{term}" for term in terms])
+        return groups
+
+    def _evaluate(self, node: tuple, positive: List[str]) -> Set[int]:
+        kind = node[0]
+        if kind == "term":
+            matches: Set[int] = set()
+            for keys in self._term_keys(node[1], node[2]):
+                sets = sorted((self._postings.get(key, set()) for key in keys), key=len)
+                matches |= set.intersection(*sets) if sets else set()
+                positive.extend(keys)
+            return matches
+        if kind == "not":
+            return set(self._numbers.values()) - self._evaluate(node[1], [])
+        if kind == "and" and node[2][0] == "not":
+            # "a NOT b": difference, without materializing every document
+            return self._evaluate(node[1], positive) - self._evaluate(node[2][1], [])
+        left, right = self._evaluate(node[1], positive), self._evaluate(node[2], positive)
+        return left & right if kind == "and" else left | right
+
+    def search(
+        self,
+        query: str,
+        limit: int = 20,
+        offset: int = 0,
+        ranked: bool = True,
+        default_operator: str = "and",
+    ) -> dict:
+        """
+        Run a boolean query; ranked by field-weighted IDF, or most recently
+        parsed first when ``ranked`` is False.
+
+        Returns:
+            {"total", "took_ms", "results": [{"document_id", "score", "cv"}]}
+
+        Raises:
+            QuerySyntaxError: invalid query
+        """
+        start = time.perf_counter()
+        tree = parse_query(query, default_operator)
+        with self._lock:
+            self._connect()
+            positive: List[str] = []
+            matches = self._evaluate(tree, positive)
+            count = len(matches)
+            weights = {}
+            if ranked:
+                documents = len(self._numbers) or 1
+                for key in set(positive):
+                    df = len(self._postings.get(key, ()))
+                    if df:
+                        weights[key] = FIELD_WEIGHTS[key.split(":", 1)[0]] * math.log(1 + documents / df)
+
+            def score(number: int) -> float:
+                return sum(weight for key, weight in weights.items() if number in self._postings[key])
+
+            if ranked:
+                top = heapq.nlargest(offset + limit, matches, key=lambda number: (score(number), number))
+            else:
+                top = heapq.nlargest(offset + limit, matches)
+            page = [(self._ids[number], round(score(number), 4) if ranked else None) for number in top[offset:]]
+
+        cvs = self.get([document_id for document_id, _ in page])
+        return {
+            "total": count,
+            "took_ms": round((time.perf_counter() - start) * 1000, 2),
+            "results": [
+                {"document_id": document_id, "score": value, "cv": cvs.get(document_id)}
+                for document_id, value in page
+            ],
+        }
+
+    def stats(self) -> dict:
+        with self._lock:
+            self._connect()
+            return {
+                "documents": len(self._numbers),
+                "terms": len(self._postings),
+                "postings": sum(len(postings) for postings in self._postings.values()),
+                "path": str(self.path),
+            }
+
+
+cv_store = CVStore() if CV_STORE_ENABLED else None
+
+
+if __name__ == "__main__":
+    if len(sys.argv) < 3 or sys.argv[1] != "import":
+        print("Usage: python cv_store.py import <cvs.jsonl>")
+        sys.exit(1)
+
+    store = CVStore()
+    imported = 0
+    batch: List[Tuple[str, dict]] = []
+    with open(sys.argv[2], encoding="utf-8") as lines:
+        for line in lines:
+            try:
+                record = json.loads(line)
+            except ValueError:
+                continue
+            if record.get("cv") and record.get("sha256"):
+                batch.append((record["sha256"], record["cv"]))
+            if len(batch) >= 1000:
+                imported += store.add_many(batch, "bulk")
+                batch = []
+    imported += store.add_many(batch, "bulk")
+    print(f"{imported} CV importés dans {store.path} ({store.stats()['terms']} termes indexés)")
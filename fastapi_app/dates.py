@@ -0,0 +1,238 @@
+"""
+Table-driven normalization of CV dates and periods (French and English).
+
+Experience and education dates arrive as free text ("janv. 2019",
+"Sept 2018 – Present", "Été 2017", "2015-2018", "03/2020") from the local
+extractors and from every provider. They are normalized here, without an
+LLM round trip, to:
+
+- ``YYYY-MM`` when the month is known (seasons map to their first month)
+- ``YYYY`` for a bare year
+- ``Present`` for an ongoing period ("present", "aujourd'hui", "en cours", ...)
+
+Month and season names and "present" words are lookup tables folded into a
+single regular expression compiled at import; a range is simply the first
+two date tokens of the text. ``parse_period`` is memoized since the same
+strings recur across CVs. Values that cannot be parsed are kept as written.
+
+Microbenchmark:
+    python dates.py [count]
+"""
+import random
+import re
+import sys
+import time
+import unicodedata
+from functools import lru_cache
+from typing import Dict, List, Optional, Tuple
+
+PRESENT = "Present"
+
+MONTHS: Dict[str, int] = {
+    # English
+    "january": 1, "jan": 1, "february": 2, "feb": 2, "march": 3, "mar": 3, "april": 4, "apr": 4,
+    "may": 5, "june": 6, "jun": 6, "july": 7, "jul": 7, "august": 8, "aug": 8,
+    "september": 9, "sept": 9, "sep": 9, "october": 10, "oct": 10, "november": 11, "nov": 11,
+    "december": 12, "dec": 12,
+    # French (accents are folded before matching)
+    "janvier": 1, "janv": 1, "fevrier": 2, "fevr": 2, "fev": 2, "mars": 3, "avril": 4, "avr": 4,
+    "mai": 5, "juin": 6, "juillet": 7, "juil": 7, "aout": 8, "septembre": 9,
+    "octobre": 10, "novembre": 11, "decembre": 12,
+}
+# Season -> first month (winter: the January of the given year)
+SEASONS: Dict[str, int] = {
+    "spring": 3, "printemps": 3, "summer": 6, "ete": 6,
+    "autumn": 9, "fall": 9, "automne": 9, "winter": 1, "hiver": 1,
+}
+PRESENT_WORDS = [
+    "present", "current", "currently", "now", "today", "ongoing", "to date",
+    "aujourd'hui", "aujourd hui", "actuel", "actuellement", "en cours", "a ce jour", "ce jour", "maintenant",
+]
+# Words opening an open-ended period: "since 2020" / "depuis mars 2021"
+SINCE_WORDS = ["since", "depuis", "from", "des"]
+
+
+# Latin-1 Supplement and Latin Extended-A letters -> their unaccented base letter
+_FOLD_TABLE = {
+    code: unicodedata.normalize("NFD", chr(code))[0]
+    for code in range(0xC0, 0x180)
+    if len(unicodedata.normalize("NFD", chr(code))) > 1
+}
+_FOLD_TABLE[ord("’")] = "'"
+
+
+def fold(text: str) -> str:
+    """Lowercase and strip accents (``"Février"`` -> ``"fevrier"``), keeping offsets."""
+    text = text.lower()
+    return text if text.isascii() else text.translate(_FOLD_TABLE)
+
+
+def _alternation(words) -> str:
+    # Longest first: "sept" must not stop at "sep", "janvier" at "jan"
+    return "|".join(re.escape(word) for word in sorted(words, key=len, reverse=True))
+
+
+# One date token, on folded text. Named groups tell which form matched.
+DATE_TOKEN_PATTERN = re.compile(
+    r"(?P<present>\b(?:" + _alternation(PRESENT_WORDS) + r")\b)"
+    r"|(?P<season>\b(?:" + _alternation(SEASONS) + r"))\s+(?P<season_year>(?:19|20)\d{2})\b"
+    # "Feb 3, 2020" / "June 12th 2019": the day between month and year is dropped
+    r"|\b(?P<month_name>" + _alternation(MONTHS) + r")\b\.?"
+    r"(?:\s*(?:\d{1,2}(?:st|nd|rd|th)?\b\s*,?\s*)?(?:de\s+|of\s+|,\s*)?(?P<name_year>(?:19|20)\d{2})\b)?"
+    r"|\b(?P<iso_year>(?:19|20)\d{2})[-/.](?P<iso_month>0?[1-9]|1[0-2])\b(?![-/.]?\d)"
+    r"|\b(?:\d{1,2}[/.])?(?P<num_month>0?[1-9]|1[0-2])[/.](?P<num_year>(?:19|20)\d{2})\b"
+    r"|\b(?P<year>(?:19|20)\d{2})\b"
+)
+SINCE_PATTERN = re.compile(r"\b(?:" + _alternation(SINCE_WORDS) + r")\b\s*$")
+
+
+def _tokens(folded: str) -> List[Tuple[Optional[str], Optional[int], int]]:
+    """(year, month, start offset) of every date token; year None for a yearless month, "present" year for Present."""
+    tokens = []
+    for match in DATE_TOKEN_PATTERN.finditer(folded):
+        groups = match.groupdict()
+        if groups["present"]:
+            tokens.append((PRESENT, None, match.start()))
+        elif groups["season"]:
+            tokens.append((groups["season_year"], SEASONS[groups["season"]], match.start()))
+        elif groups["month_name"]:
+            tokens.append((groups["name_year"], MONTHS[groups["month_name"]], match.start()))
+        elif groups["iso_year"]:
+            tokens.append((groups["iso_year"], int(groups["iso_month"]), match.start()))
+        elif groups["num_year"]:
+            tokens.append((groups["num_year"], int(groups["num_month"]), match.start()))
+        else:
+            tokens.append((groups["year"], None, match.start()))
+    return tokens
+
+
+def _format(year: Optional[str], month: Optional[int]) -> Optional[str]:
+    if year == PRESENT:
+        return PRESENT
+    if year is None:
+        return None
+    return f"{year}-{month:02d}" if month else year
+
+
+@lru_cache(maxsize=8192)
+def parse_period(text: str) -> Tuple[Optional[str], Optional[str]]:
+    """
+    Normalized (start, end) of a free-text date or period.
+
+    "Jan 2020 – Present" -> ("2020-01", "Present"); "mars - juin 2019" ->
+    ("2019-03", "2019-06") (a yearless month borrows the next year);
+    "depuis 2021" -> ("2021", "Present"); "2018" -> ("2018", None).
+
+    Returns:
+        (start, end), each None when absent or not recognized
+    """
+    if not text:
+        return None, None
+    folded = fold(text)
+    tokens = _tokens(folded)
+    # A yearless month ("mars - juin 2019", or "may" as a plain word) needs a later year
+    resolved = []
+    for position, (year, month, offset) in enumerate(tokens):
+        if year is None:
+            year = next((later[0] for later in tokens[position + 1:] if later[0] not in (None, PRESENT)), None)
+            if year is None:
+                continue
+        resolved.append((year, month, offset))
+    if not resolved:
+        return None, None
+
+    start = _format(*resolved[0][:2])
+    if len(resolved) > 1:
+        return start, _format(*resolved[1][:2])
+    if start != PRESENT and SINCE_PATTERN.search(folded[:resolved[0][2]]):
+        return start, PRESENT
+    return start, None
+
+
+def has_date(text: str) -> bool:
+    """Whether ``text`` mentions a dated period start (a year, with or without month)."""
+    start, _ = parse_period(text)
+    return start is not None and start != PRESENT
+
+
+def strip_dates(text: str) -> str:
+    """``text`` without its date tokens ("ACME (Jan 2020 - Present)" -> "ACME ( - )")."""
+    folded = fold(text)
+    if len(folded) != len(text):
+        return text
+    pieces, position = [], 0
+    for match in DATE_TOKEN_PATTERN.finditer(folded):
+        pieces.append(text[position:match.start()])
+        position = match.end()
+    pieces.append(text[position:])
+    return "".join(pieces)
+
+
+def normalize_date(value: Optional[str]) -> Optional[str]:
+    """Normalized form of one date (``YYYY-MM``, ``YYYY`` or ``Present``); unparsable values are kept as written."""
+    if not isinstance(value, str) or not value.strip():
+        return value
+    start, _ = parse_period(value.strip())
+    return start or value.strip()
+
+
+def normalize_period(
+    start: Optional[str],
+    end: Optional[str],
+    period: Optional[str] = None,
+) -> Tuple[Optional[str], Optional[str]]:
+    """
+    Normalized (start_date, end_date) of an experience or education item.
+
+    Args:
+        start: Start date as written (may hold a whole range: "2018 - 2020")
+        end: End date as written
+        period: Range given as a single field by some providers ("dates", "period")
+
+    Returns:
+        (start_date, end_date); unparsable values are kept as written
+    """
+    if not end:
+        # The whole range in one field
+        for text in (start, period):
+            if isinstance(text, str) and text.strip():
+                period_start, period_end = parse_period(text.strip())
+                if period_start:
+                    return period_start, period_end
+        return normalize_date(start), end
+    return normalize_date(start), normalize_date(end)
+
+
+def _sample_dates(count: int, seed: int = 0) -> List[str]:
+    rng = random.Random(seed)
+    names = list(MONTHS) + ["Janvier", "Février", "Août", "Décembre", "Sept.", "Jan."]
+    forms = [
+        lambda: f"{rng.choice(names)} {rng.randrange(1990, 2025)}",
+        lambda: f"{rng.randrange(1, 13):02d}/{rng.randrange(1990, 2025)}",
+        lambda: f"{rng.randrange(1990, 2025)}-{rng.randrange(1, 13):02d}",
+        lambda: f"{rng.randrange(1990, 2025)} - {rng.randrange(1990, 2025)}",
+        lambda: f"{rng.choice(names)} {rng.randrange(1990, 2025)} – {rng.choice(['Present', 'aujourd’hui', 'en cours'])}",
+        lambda: f"{rng.choice(['Été', 'Summer', 'Hiver', 'Fall'])} {rng.randrange(1990, 2025)}",
+        lambda: f"depuis {rng.choice(names)} {rng.randrange(1990, 2025)}",
+        lambda: str(rng.randrange(1990, 2025)),
+    ]
+    return [rng.choice(forms)() for _ in range(count)]
+
+
+if __name__ == "__main__":
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 100000
+    samples = _sample_dates(count)
+
+    parse_period.cache_clear()
+    start = time.perf_counter()
+    parsed = sum(1 for text in samples if parse_period.__wrapped__(text)[0])
+    cold = time.perf_counter() - start
+
+    start = time.perf_counter()
+    for text in samples:
+        parse_period(text)
+    cached = time.perf_counter() - start
+
+    print(f"{count} dates ({len(set(samples))} distinctes), {parsed} reconnues")
+    print(f"  sans cache: {cold * 1000:.0f}ms ({count / cold:,.0f} dates/s, {cold / count * 1e6:.1f}µs/date)")
+    print(f"  avec cache: {cached * 1000:.0f}ms ({count / cached:,.0f} dates/s)")
@@ -0,0 +1,77 @@
+"""
+Per-request deadlines shared by every pipeline stage.
+
+A request gets one time budget (``X-Request-Timeout`` header in seconds, or
+``REQUEST_DEADLINE_SECONDS``). Each stage (OCR, every external provider,
+every Ollama call) uses the remaining budget, capped by its own historical
+timeout, instead of a fixed 60/120/300 s. When the budget runs out the stage
+raises ``DeadlineExceeded`` and the endpoint returns what it has.
+"""
+import math
+import os
+import time
+from typing import Optional
+
+REQUEST_DEADLINE_SECONDS = float(os.getenv("REQUEST_DEADLINE_SECONDS", "300"))
+# Upper bound for client-provided deadlines
+MAX_REQUEST_DEADLINE_SECONDS = float(os.getenv("MAX_REQUEST_DEADLINE_SECONDS", "600"))
+# Do not start a stage with less than this left: it could not finish anyway
+MIN_STAGE_SECONDS = float(os.getenv("MIN_STAGE_SECONDS", "1"))
+
+
+class DeadlineExceeded(TimeoutError):
+    """The request's time budget ran out before ``stage`` could complete."""
+
+    def __init__(self, stage: str) -> None:
+        super().__init__(f"Request deadline exceeded during {stage}")
+        self.stage = stage
+
+    def __reduce__(self):
+        # Raised in PDF workers: unpickle from the stage, not from the message
+        return type(self), (self.stage,)
+
+
+class Deadline:
+    """Absolute expiry time of one request (monotonic clock)."""
+
+    def __init__(self, seconds: float = REQUEST_DEADLINE_SECONDS) -> None:
+        self.seconds = seconds
+        self.expires_at = time.monotonic() + seconds
+
+    @classmethod
+    def from_header(cls, value: Optional[str]) -> "Deadline":
+        """Deadline from an ``X-Request-Timeout`` value; the configured default if absent or invalid."""
+        try:
+            seconds = float(value) if value else REQUEST_DEADLINE_SECONDS
+        except ValueError:
+            seconds = REQUEST_DEADLINE_SECONDS
+        if not math.isfinite(seconds) or seconds <= 0:
+            seconds = REQUEST_DEADLINE_SECONDS
+        return cls(min(seconds, MAX_REQUEST_DEADLINE_SECONDS))
+
+    def remaining(self) -> float:
+        return max(0.0, self.expires_at - time.monotonic())
+
+    def expired(self) -> bool:
+        """True when no further stage can be started."""
+        return self.remaining() < MIN_STAGE_SECONDS
+
+    def timeout(self, stage: str, cap: float) -> float:
+        """
+        Timeout for the next stage: the remaining budget, at most ``cap``.
+
+        Raises:
+            DeadlineExceeded: less than MIN_STAGE_SECONDS are left.
+        """
+        if self.expired():
+            raise DeadlineExceeded(stage)
+        return min(cap, self.remaining())
+
+
+def stage_timeout(deadline: Optional[Deadline], stage: str, cap: float) -> float:
+    """``cap`` without a deadline (scripts, tests), else the deadline-bounded timeout."""
+    return cap if deadline is None else deadline.timeout(stage, cap)
+
+
+def deadline_expired(deadline: Optional[Deadline]) -> bool:
+    return deadline is not None and deadline.expired()
@@ -0,0 +1,354 @@
+"""
+Registry of local CV field extractors.
+
+Each extractor reads the shared ``TextIndex`` of a document (plus the output
+of the extractors it declares in ``depends_on``) and returns the value of one
+group of fields. ``run_extractors`` schedules them in dependency waves: the
+extractors of a wave are independent and run concurrently in a thread pool.
+
+Extractors can be turned off per deployment with
+``DISABLED_EXTRACTORS=languages,experience``; per-extractor timings are
+aggregated in ``extractor_stats`` (exposed by /stats/extractors).
+"""
+import logging
+import os
+import re
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, Iterable, List, Optional, Tuple
+
+from dates import PRESENT, parse_period
+from segmenter import education_items, experience_items, find_sections
+from text_index import TextIndex
+
+logger = logging.getLogger("fastapi-cv-parser")
+
+DISABLED_EXTRACTORS = {
+    name.strip() for name in os.getenv("DISABLED_EXTRACTORS", "").split(",") if name.strip()
+}
+EXTRACTOR_WORKERS = int(os.getenv("EXTRACTOR_WORKERS", "4"))
+
+# Patterns shared by several extractors (compiled once at import)
+EMAIL_PATTERN = re.compile(r'\b[A-Za-z0-9._%+-]+@[A-Za-z0-9.-]+\.[A-Z|a-z]{2,}\b')
+PHONE_PATTERN = re.compile(r'(\+?\d{1,3}[-.\s]?)?\(?\d{1,4}\)?[-.\s]?\d{1,4}[-.\s]?\d{1,9}')
+LINKEDIN_PATTERN = re.compile(r'(?:linkedin\.com/in/|linkedin\.com/pub/)([a-zA-Z0-9-]+)', re.IGNORECASE)
+GITHUB_PATTERN = re.compile(r'(?:github\.com/)([a-zA-Z0-9-]+)', re.IGNORECASE)
+HTTP_PATTERN = re.compile(r'http', re.IGNORECASE)
+COMPANY_ROLE_PATTERN = re.compile(r'([A-Z][a-zA-Z\s&]+(?:Inc|LLC|Ltd|Corp)?)\s*[-–—]\s*([A-Z][a-zA-Z\s]+)')
+DEGREE_PATTERN = re.compile(
+    r'(Bachelor|Master|PhD|Doctorate|Diploma|Certificate)\s+(?:of|in)?\s*([A-Z][a-zA-Z\s]+)', re.IGNORECASE
+)
+WHITESPACE_PATTERN = re.compile(r'\s+')
+
+SKILLS_KEYWORDS = [
+    'Python', 'Java', 'JavaScript', 'TypeScript', 'C++', 'C#', 'PHP', 'Ruby', 'Go', 'Rust',
+    'React', 'Angular', 'Vue', 'Node.js', 'Express', 'Django', 'Flask', 'FastAPI', 'Spring',
+    'SQL', 'MySQL', 'PostgreSQL', 'MongoDB', 'Redis', 'Docker', 'Kubernetes', 'AWS', 'Azure',
+    'Git', 'Linux', 'Windows', 'HTML', 'CSS', 'SASS', 'Bootstrap', 'Tailwind',
+    'Machine Learning', 'AI', 'TensorFlow', 'PyTorch', 'Data Science', 'Analytics'
+]
+EXPERIENCE_KEYWORDS = ['experience', 'work experience', 'employment', 'career', 'professional experience']
+EDUCATION_KEYWORDS = ['education', 'academic', 'university', 'degree', 'diploma']
+SUMMARY_KEYWORDS = ['summary', 'profile', 'about', 'objective', 'overview']
+TITLE_KEYWORDS = ['developer', 'engineer', 'manager', 'analyst', 'designer', 'consultant', 'specialist']
+LANGUAGES_KEYWORDS = ['languages', 'langues', 'language skills']
+
+# Language names (English / French) -> canonical English name
+LANGUAGE_NAMES = {
+    'english': 'English', 'anglais': 'English',
+    'french': 'French', 'français': 'French', 'francais': 'French',
+    'spanish': 'Spanish', 'espagnol': 'Spanish',
+    'german': 'German', 'allemand': 'German',
+    'italian': 'Italian', 'italien': 'Italian',
+    'arabic': 'Arabic', 'arabe': 'Arabic',
+    'portuguese': 'Portuguese', 'portugais': 'Portuguese',
+    'chinese': 'Chinese', 'chinois': 'Chinese', 'mandarin': 'Chinese',
+    'japanese': 'Japanese', 'japonais': 'Japanese',
+    'russian': 'Russian', 'russe': 'Russian',
+    'dutch': 'Dutch', 'néerlandais': 'Dutch',
+    'turkish': 'Turkish', 'turc': 'Turkish',
+}
+LANGUAGE_PATTERN = re.compile(r'\b(' + '|'.join(sorted(LANGUAGE_NAMES, key=len, reverse=True)) + r')\b', re.IGNORECASE)
+LANGUAGE_LEVEL_PATTERN = re.compile(
+    r'\b([ABC][12]|native|mother tongue|bilingual|fluent|advanced|intermediate|basic|beginner|'
+    r'langue maternelle|maternelle|natif|bilingue|courant|avancé|intermédiaire|notions|débutant)\b',
+    re.IGNORECASE,
+)
+
+
+@dataclass
+class Extractor:
+    name: str
+    func: Callable[[TextIndex, Dict[str, Any]], Any]
+    depends_on: Tuple[str, ...] = ()
+
+
+EXTRACTORS: Dict[str, Extractor] = {}
+
+
+def register_extractor(name: str, depends_on: Iterable[str] = ()):
+    """Decorator registering ``func(index, dependencies) -> value`` under ``name``."""
+    def decorator(func):
+        EXTRACTORS[name] = Extractor(name=name, func=func, depends_on=tuple(depends_on))
+        return func
+    return decorator
+
+
+class ExtractorStats:
+    """Thread-safe aggregate of per-extractor run times."""
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self._stats: Dict[str, Dict[str, float]] = {}
+
+    def record(self, timings: Dict[str, float]) -> None:
+        with self._lock:
+            for name, ms in timings.items():
+                entry = self._stats.setdefault(name, {"runs": 0, "total_ms": 0.0, "max_ms": 0.0})
+                entry["runs"] += 1
+                entry["total_ms"] += ms
+                entry["max_ms"] = max(entry["max_ms"], ms)
+
+    def snapshot(self) -> Dict[str, Dict[str, float]]:
+        with self._lock:
+            return {
+                name: {
+                    "runs": entry["runs"],
+                    "avg_ms": round(entry["total_ms"] / entry["runs"], 3),
+                    "max_ms": round(entry["max_ms"], 3),
+                    "total_ms": round(entry["total_ms"], 3),
+                    "enabled": name not in DISABLED_EXTRACTORS,
+                }
+                for name, entry in self._stats.items()
+            }
+
+
+extractor_stats = ExtractorStats()
+_pool: Optional[ThreadPoolExecutor] = None
+
+
+def _get_pool() -> ThreadPoolExecutor:
+    global _pool
+    if _pool is None:
+        _pool = ThreadPoolExecutor(max_workers=EXTRACTOR_WORKERS, thread_name_prefix="extractor")
+    return _pool
+
+
+def _timed(extractor: Extractor, index: TextIndex, dependencies: Dict[str, Any]) -> Tuple[Any, float]:
+    start = time.perf_counter()
+    value = extractor.func(index, dependencies)
+    return value, (time.perf_counter() - start) * 1000
+
+
+def run_extractors(
+    index: TextIndex, disabled: Optional[Iterable[str]] = None
+) -> Tuple[Dict[str, Any], Dict[str, float]]:
+    """
+    Run every enabled extractor on ``index``, respecting declared dependencies.
+
+    Extractors whose dependencies are all resolved form a wave and run
+    concurrently; a disabled dependency simply resolves to a missing value.
+
+    Returns:
+        Tuple (outputs, timings_ms) keyed by extractor name.
+    """
+    disabled = DISABLED_EXTRACTORS if disabled is None else set(disabled)
+    pending = {name: ex for name, ex in EXTRACTORS.items() if name not in disabled}
+    outputs: Dict[str, Any] = {}
+    timings: Dict[str, float] = {}
+
+    while pending:
+        wave = [
+            ex for ex in pending.values()
+            if all(dep in outputs or dep not in pending for dep in ex.depends_on)
+        ]
+        if not wave:
+            raise RuntimeError(f"Circular extractor dependencies: {sorted(pending)}")
+
+        deps = {name: outputs[name] for name in outputs}
+        if len(wave) == 1 or EXTRACTOR_WORKERS <= 1:
+            results = [_timed(ex, index, deps) for ex in wave]
+        else:
+            futures = [_get_pool().submit(_timed, ex, index, deps) for ex in wave]
+            results = [future.result() for future in futures]
+
+        for ex, (value, ms) in zip(wave, results):
+            outputs[ex.name] = value
+            timings[ex.name] = round(ms, 3)
+            del pending[ex.name]
+
+    extractor_stats.record(timings)
+    return outputs, timings
+
+
+def assemble_result(outputs: Dict[str, Any]) -> dict:
+    """Build the flat local-extraction dict consumed by ``transform_extracta_response``."""
+    result = {
+        "personal": dict(outputs.get("contact") or {}),
+        "profile": {},
+        "experience": outputs.get("experience") or [],
+        "education": outputs.get("education") or [],
+        "skills": outputs.get("skills") or [],
+        "languages": outputs.get("languages") or [],
+    }
+    if outputs.get("name"):
+        result["personal"]["full_name"] = outputs["name"]
+    if outputs.get("summary"):
+        result["profile"]["summary"] = outputs["summary"]
+    if outputs.get("title"):
+        result["profile"]["title"] = outputs["title"]
+    return result
+
+
+@register_extractor("contact")
+def extract_contact(index: TextIndex, deps: Dict[str, Any]) -> dict:
+    contact = {}
+
+    email_match = EMAIL_PATTERN.search(index.text)
+    if email_match:
+        contact["email"] = email_match.group(0)
+
+    # Take the first phone number that looks complete
+    for match in PHONE_PATTERN.finditer(index.text):
+        phone = match.group(0).strip()
+        if len(phone.replace(' ', '').replace('-', '').replace('.', '').replace('(', '').replace(')', '')) >= 8:
+            contact["phone"] = phone
+            break
+
+    linkedin_match = LINKEDIN_PATTERN.search(index.text)
+    if linkedin_match:
+        contact["linkedin"] = f"https://linkedin.com/in/{linkedin_match.group(1)}"
+
+    github_match = GITHUB_PATTERN.search(index.text)
+    if github_match:
+        contact["github"] = f"https://github.com/{github_match.group(1)}"
+
+    return contact
+
+
+@register_extractor("name")
+def extract_name(index: TextIndex, deps: Dict[str, Any]) -> Optional[str]:
+    # Name - usually at the beginning, first line or two
+    for line in index.lines[:10]:
+        line = line.strip()
+        if line and len(line) > 3 and len(line) < 50:
+            # Check if it looks like a name (not email, not phone, not URL)
+            if not EMAIL_PATTERN.search(line) and not PHONE_PATTERN.search(line) and not HTTP_PATTERN.search(line):
+                return line
+    return None
+
+
+@register_extractor("title", depends_on=("name",))
+def extract_title(index: TextIndex, deps: Dict[str, Any]) -> Optional[str]:
+    # Title - often near the name, never the name line itself
+    for line in index.lines[:5]:
+        if line.strip() == deps.get("name"):
+            continue
+        for keyword in TITLE_KEYWORDS:
+            if keyword in line.lower():
+                return line.strip()
+    return None
+
+
+@register_extractor("summary")
+def extract_summary(index: TextIndex, deps: Dict[str, Any]) -> Optional[str]:
+    # Profile/Summary - usually near the beginning after name
+    for keyword in SUMMARY_KEYWORDS:
+        section, _ = index.section([keyword], ['experience', 'education', 'skills'])
+        if section:
+            summary = section.replace(keyword, '', 1).strip()
+            # Clean up summary
+            summary = WHITESPACE_PATTERN.sub(' ', summary)
+            if len(summary) > 20 and len(summary) < 500:
+                return summary[:500]
+    return None
+
+
+def _period_near(section: str, start: int, end: int) -> Dict[str, str]:
+    """
+    Normalized start/end dates on the line of a match or the line below
+    (dates.py), as ``{"start_date", "end_date"}`` keys; empty when none.
+    """
+    line_start = section.rfind('\n', 0, start) + 1
+    line_end = section.find('\n', end)
+    if line_end != -1:
+        next_end = section.find('\n', line_end + 1)
+        line_end = next_end if next_end != -1 else len(section)
+    period_start, period_end = parse_period(section[line_start:line_end if line_end != -1 else len(section)])
+    if not period_start or period_start == PRESENT:
+        return {}
+    return {"start_date": period_start, "end_date": period_end}
+
+
+def _section_lines(index: TextIndex, name: str, section: str) -> List[str]:
+    """Lines of a section under its heading line (segmenter.py), else after the keyword found by ``index.section``."""
+    lines = find_sections(index.lines).get(name)
+    if lines is None:
+        lines = section.split('\n')[1:]
+    return lines
+
+
+@register_extractor("experience")
+def extract_experience(index: TextIndex, deps: Dict[str, Any]) -> List[dict]:
+    experience_section, _ = index.section(EXPERIENCE_KEYWORDS, ['education', 'skills', 'projects'])
+    # Dated entries with their header, period and description
+    experience = experience_items(_section_lines(index, "experience", experience_section))
+    if experience:
+        return experience
+
+    # Look for patterns like "Company Name - Role"
+    for match in COMPANY_ROLE_PATTERN.finditer(experience_section):
+        company = match.group(1).strip()
+        role = match.group(2).strip()
+        if len(company) > 2 and len(role) > 2:
+            experience.append({
+                "company": company,
+                "role": role,
+                **_period_near(experience_section, match.start(), match.end()),
+            })
+    return experience
+
+
+@register_extractor("education")
+def extract_education(index: TextIndex, deps: Dict[str, Any]) -> List[dict]:
+    education_section, _ = index.section(EDUCATION_KEYWORDS, ['experience', 'skills', 'projects'])
+    education = education_items(_section_lines(index, "education", education_section))
+    if education:
+        return education
+
+    # Extract degree and school names
+    for match in DEGREE_PATTERN.finditer(education_section):
+        degree = f"{match.group(1)} {match.group(2)}"
+        education.append({
+            "degree": degree.strip(),
+            **_period_near(education_section, match.start(), match.end()),
+        })
+    return education
+
+
+@register_extractor("skills")
+def extract_skills(index: TextIndex, deps: Dict[str, Any]) -> List[str]:
+    found_skills = [skill for skill in SKILLS_KEYWORDS if index.find(skill) != -1]
+    return found_skills[:20]  # Limit to 20 skills
+
+
+@register_extractor("languages")
+def extract_languages(index: TextIndex, deps: Dict[str, Any]) -> List[dict]:
+    # Only look inside a languages section: language names elsewhere are usually addresses or nationalities
+    section, _ = index.section(LANGUAGES_KEYWORDS, ['experience', 'education', 'skills', 'projects', 'interests'])
+    languages = []
+    seen = set()
+    for line in section.split('\n'):
+        for match in LANGUAGE_PATTERN.finditer(line):
+            name = LANGUAGE_NAMES[match.group(1).lower()]
+            if name in seen:
+                continue
+            seen.add(name)
+            level_match = LANGUAGE_LEVEL_PATTERN.search(line, match.end())
+            languages.append({
+                "name": name,
+                "level": level_match.group(1) if level_match else None
+            })
+    return languages
@@ -1,18 +1,38 @@
+import copy
 import json
 import logging
 import os
-import re
-import io
-from pathlib import Path
-from typing import Any, Dict, List, Optional, Tuple
+from concurrent.futures import TimeoutError as FuturesTimeoutError
+from contextlib import asynccontextmanager
+from typing import Any, Callable, Dict, List, Optional, Tuple
 
-import pdfplumber
 import requests
 from dotenv import load_dotenv
-from fastapi import FastAPI, File, HTTPException, UploadFile, status
+from fastapi import Depends, FastAPI, File, Header, HTTPException, Query, Response, UploadFile, status
+from fastapi.concurrency import run_in_threadpool
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import FileResponse, StreamingResponse
 from pydantic import ValidationError
 
+from admission import AdmissionRejected, PdfInspection, admission
+from coalescing import SingleFlight, document_hash, flight_key
+from cv_diff import diff_cv
+from cv_store import QuerySyntaxError, check_search_token, cv_store
+from dates import normalize_period
+from deadline import Deadline, DeadlineExceeded, deadline_expired
+from near_duplicates import near_duplicates, refresh_personal
+from compaction import compact_pages, context_size, count_tokens, new_usage, truncate_to_budget
+from confidence import SECTIONS, SMART_ESCALATION, merge_sections, score_fields, sections_text, weak_sections
+from extractors import DISABLED_EXTRACTORS, assemble_result, extractor_stats, run_extractors
+from ocr import ocr_available, ocr_missing_pages
+from page_cache import cache_stats, page_result_cache
+from pdf_worker import PDF_WORKER_CPU_SECONDS, PdfLimitExceeded, pdf_pool
+from profiling import PROFILE_MODES, ProfileRequest, check_token, profile_call, profile_path, sampled_request
+from provider_archive import archive_response
+from provider_policy import provider_policy
+from scheduler import DEFAULT_TENANT, PRIORITIES, WorkTicket, scheduler
+from text_index import TextIndex
+from tolerant_json import repair_json
 from schemas import CVSchema, Personal, Profile, ExperienceItem, EducationItem, LanguageItem, Skills
 
 # Load environment variables from .env file
@@ -22,7 +42,16 @@ load_dotenv()
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger("fastapi-cv-parser")
 
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Warm PDF workers before the first request, rather than in its time
+    await run_in_threadpool(pdf_pool.start)
+    yield
+    pdf_pool.stop()
+
+
 app = FastAPI(
+    lifespan=lifespan,
     title="fastapi-cv-parser",
     version="1.0.0",
     docs_url="/docs",
@@ -66,11 +95,20 @@ MAX_FILE_SIZE = 8 * 1024 * 1024  # 8MB
 # Configuration Ollama
 OLLAMA_BASE_URL = os.getenv("OLLAMA_BASE_URL", "http://localhost:11434")
 OLLAMA_MODEL = os.getenv("OLLAMA_MODEL", "llama3.2")  # Modèle par défaut
+# Contraindre la sortie d'Ollama avec le JSON Schema du CVSchema (Ollama >= 0.5), sinon simple "json"
+OLLAMA_STRUCTURED_OUTPUT = os.getenv("OLLAMA_STRUCTURED_OUTPUT", "true").lower() == "true"
+# Nombre de relances ne demandant que les sections manquantes d'une réponse incomplète
+OLLAMA_REPAIR_RETRIES = int(os.getenv("OLLAMA_REPAIR_RETRIES", "1"))
+
+# Concurrent identical uploads (same content hash + same backend) share one computation
+parse_flight = SingleFlight()
 
 
-def call_extracta_api(file_data: bytes, filename: str) -> dict:
+def call_extracta_api(file_data: bytes, filename: str, deadline: Optional[Deadline] = None) -> dict:
     """
     Call Extracta API to parse CV
+    Each attempt gets an adaptive timeout (at most 60 s), bounded by the request deadline;
+    transient failures are retried (see provider_policy.py).
     """
     if not EXTRACTA_API_KEY:
         raise ValueError("EXTRACTA_API_KEY is not set in environment variables")
@@ -171,15 +209,24 @@ def call_extracta_api(file_data: bytes, filename: str) -> dict:
 
     # Essayer différentes méthodes d'appel selon la documentation Extracta
     # Méthode 1: Avec extractionDetails en JSON
-    try:
-    response = requests.post(
-        EXTRACTA_URL,
-        headers=headers,
-        files=files,
-        data={
+    def send(url: str):
+        return lambda timeout: requests.post(
+            url,
+            headers=headers,
+            files=files,
+            data={
                 "extractionDetails": json.dumps(extraction_details)
             },
-            timeout=60  # Augmenter le timeout car l'extraction peut prendre du temps
+            timeout=timeout
+        )
+
+    try:
+        response = provider_policy.call(
+            "extracta",
+            "Extracta API",
+            send(EXTRACTA_URL),
+            deadline,
+            cap=60,  # Augmenter le timeout car l'extraction peut prendre du temps
         )
         
         if response.status_code == 200:
@@ -196,18 +243,12 @@ def call_extracta_api(file_data: bytes, filename: str) -> dict:
             for alt_url in alternative_urls:
                 logger.info(f"Trying alternative URL: {alt_url}")
                 try:
-                    response = requests.post(
-                        alt_url,
-                        headers=headers,
-                        files=files,
-                        data={
-                            "extractionDetails": json.dumps(extraction_details)
-                        },
-                        timeout=60
-                    )
+                    response = provider_policy.call("extracta", "Extracta API", send(alt_url), deadline, cap=60)
                     if response.status_code == 200:
                         logger.info(f"Success with URL: {alt_url}")
                         return response.json()
+                except DeadlineExceeded:
+                    raise
                 except Exception as e:
                     logger.warning(f"Failed with {alt_url}: {str(e)}")
                     continue
@@ -230,11 +271,13 @@ def call_extracta_api(file_data: bytes, filename: str) -> dict:
             raise RuntimeError(error_msg)
             
     except requests.exceptions.RequestException as e:
+        if deadline_expired(deadline):
+            raise DeadlineExceeded("Extracta API")
         logger.error(f"Request exception: {str(e)}")
         raise RuntimeError(f"Failed to connect to Extracta API: {str(e)}")
 
 
-def call_docparserai_api(file_data: bytes, filename: str) -> dict:
+def call_docparserai_api(file_data: bytes, filename: str, deadline: Optional[Deadline] = None) -> dict:
     """
     Call DocParserAI API to parse CV
     Free: 1000 pages/month
@@ -259,12 +302,12 @@ def call_docparserai_api(file_data: bytes, filename: str) -> dict:
     }
     
     try:
-        response = requests.post(
-            DOCPARSERAI_URL,
-            headers=headers,
-            files=files,
-            data=data,
-            timeout=60
+        response = provider_policy.call(
+            "docparserai",
+            "DocParserAI API",
+            lambda timeout: requests.post(DOCPARSERAI_URL, headers=headers, files=files, data=data, timeout=timeout),
+            deadline,
+            cap=60,
         )
         
         if response.status_code == 200:
@@ -275,11 +318,18 @@ def call_docparserai_api(file_data: bytes, filename: str) -> dict:
             raise RuntimeError(error_msg)
             
     except requests.exceptions.RequestException as e:
+        if deadline_expired(deadline):
+            raise DeadlineExceeded("DocParserAI API")
         logger.error(f"DocParserAI request exception: {str(e)}")
         raise RuntimeError(f"Failed to connect to DocParserAI API: {str(e)}")
 
 
-def call_nanonets_api(file_data: bytes, filename: str, output_format: str = "json") -> dict:
+def call_nanonets_api(
+    file_data: bytes,
+    filename: str,
+    output_format: str = "json",
+    deadline: Optional[Deadline] = None,
+) -> dict:
     """
     Call Nanonets Document Extraction API to parse CV
     Documentation: https://docstrange.nanonets.com
@@ -288,6 +338,7 @@ def call_nanonets_api(file_data: bytes, filename: str, output_format: str = "jso
         file_data: PDF file bytes
         filename: PDF filename
         output_format: Output format (markdown, html, json, csv). Default: json
+        deadline: Request deadline bounding the adaptive (at most 120 s) timeout
     
     Returns:
         Parsed CV data as dict
@@ -320,12 +371,14 @@ def call_nanonets_api(file_data: bytes, filename: str, output_format: str = "jso
     
     try:
         logger.info(f"Calling Nanonets API with output format: {output_format}")
-        response = requests.post(
-            f"{NANONETS_BASE_URL}/extract/sync",
-            headers=headers,
-            files=files,
-            data=data,
-            timeout=120  # Nanonets can take longer for complex documents
+        response = provider_policy.call(
+            "nanonets",
+            "Nanonets API",
+            lambda timeout: requests.post(
+                f"{NANONETS_BASE_URL}/extract/sync", headers=headers, files=files, data=data, timeout=timeout
+            ),
+            deadline,
+            cap=120,  # Nanonets can take longer for complex documents
         )
         
         if response.status_code == 200:
@@ -338,11 +391,13 @@ def call_nanonets_api(file_data: bytes, filename: str, output_format: str = "jso
             raise RuntimeError(error_msg)
             
     except requests.exceptions.RequestException as e:
+        if deadline_expired(deadline):
+            raise DeadlineExceeded("Nanonets API")
         logger.error(f"Nanonets request exception: {str(e)}")
         raise RuntimeError(f"Failed to connect to Nanonets API: {str(e)}")
 
 
-def call_hrflow_api(file_data: bytes, filename: str) -> dict:
+def call_hrflow_api(file_data: bytes, filename: str, deadline: Optional[Deadline] = None) -> dict:
     """
     Call HrFlow.ai API to parse CV
     Free tier available
@@ -366,27 +421,38 @@ def call_hrflow_api(file_data: bytes, filename: str) -> dict:
     }
     
     try:
-        response = requests.post(
-            HRFLOW_URL,
-            headers=headers,
-            files=files,
-            data=data,
-            timeout=60
+        response = provider_policy.call(
+            "hrflow",
+            "HrFlow API",
+            lambda timeout: requests.post(HRFLOW_URL, headers=headers, files=files, data=data, timeout=timeout),
+            deadline,
+            cap=60,
         )
         
         if response.status_code == 200:
-    return response.json()
+            return response.json()
         else:
             error_msg = f"HrFlow API failed: {response.status_code} - {response.text[:500]}"
             logger.error(error_msg)
             raise RuntimeError(error_msg)
             
     except requests.exceptions.RequestException as e:
+        if deadline_expired(deadline):
+            raise DeadlineExceeded("HrFlow API")
         logger.error(f"HrFlow request exception: {str(e)}")
         raise RuntimeError(f"Failed to connect to HrFlow API: {str(e)}")
 
 
-def call_external_api(file_data: bytes, filename: str, api_name: str = "auto") -> dict:
+def external_api_configured() -> bool:
+    return bool(DOCPARSERAI_API_KEY or NANONETS_API_KEY or HRFLOW_API_KEY or EXTRACTA_API_KEY)
+
+
+def call_external_api(
+    file_data: bytes,
+    filename: str,
+    api_name: str = "auto",
+    deadline: Optional[Deadline] = None,
+) -> dict:
     """
     Call external API to parse CV. Tries multiple APIs in order of preference.
     
@@ -394,9 +460,16 @@ def call_external_api(file_data: bytes, filename: str, api_name: str = "auto") -
         file_data: PDF file bytes
         filename: PDF filename
         api_name: API to use ("auto", "extracta", "docparserai", "hrflow")
+        deadline: Request deadline shared by all the APIs tried in turn
     
     Returns:
         Parsed CV data as dict
+    
+    Raises:
+        DeadlineExceeded: the deadline expired before an API answered
+    
+    Every successful raw response is archived (see provider_archive.py) so it
+    can be re-transformed later without calling the provider again.
     """
     if api_name == "auto":
         # Try APIs in order of preference
@@ -405,7 +478,7 @@ def call_external_api(file_data: bytes, filename: str, api_name: str = "auto") -
         if DOCPARSERAI_API_KEY:
             apis_to_try.append(("docparserai", call_docparserai_api))
         if NANONETS_API_KEY:
-            apis_to_try.append(("nanonets", lambda f, n: call_nanonets_api(f, n, "json")))
+            apis_to_try.append(("nanonets", lambda f, n, deadline=None: call_nanonets_api(f, n, "json", deadline)))
         if HRFLOW_API_KEY:
             apis_to_try.append(("hrflow", call_hrflow_api))
         if EXTRACTA_API_KEY:
@@ -424,11 +497,16 @@ def call_external_api(file_data: bytes, filename: str, api_name: str = "auto") -
         # Try each API until one succeeds
         last_error = None
         for api_name, api_func in apis_to_try:
+            if deadline_expired(deadline):
+                raise DeadlineExceeded(f"{api_name} API")
             try:
                 logger.info(f"Trying {api_name} API...")
-                result = api_func(file_data, filename)
+                result = api_func(file_data, filename, deadline=deadline)
                 logger.info(f"Successfully parsed with {api_name} API")
+                archive_response(document_hash(file_data), api_name, result, filename)
                 return result
+            except DeadlineExceeded:
+                raise
             except Exception as e:
                 logger.warning(f"{api_name} API failed: {str(e)}")
                 last_error = e
@@ -441,36 +519,103 @@ def call_external_api(file_data: bytes, filename: str, api_name: str = "auto") -
         )
     
     elif api_name == "docparserai":
-        return call_docparserai_api(file_data, filename)
+        result = call_docparserai_api(file_data, filename, deadline)
     elif api_name == "nanonets":
-        return call_nanonets_api(file_data, filename, "json")
+        result = call_nanonets_api(file_data, filename, "json", deadline)
     elif api_name == "hrflow":
-        return call_hrflow_api(file_data, filename)
+        result = call_hrflow_api(file_data, filename, deadline)
     elif api_name == "extracta":
-        return call_extracta_api(file_data, filename)
+        result = call_extracta_api(file_data, filename, deadline)
     else:
         raise ValueError(f"Unknown API name: {api_name}. Use 'auto', 'docparserai', 'nanonets', 'hrflow', or 'extracta'")
+    
+    archive_response(document_hash(file_data), api_name, result, filename)
+    return result
 
 
-def extract_text_from_pdf(file_data: bytes) -> str:
+def read_pdf_pages(file_data: bytes, deadline: Optional[Deadline] = None) -> Tuple[List[str], List[str], dict]:
     """
-    Extrait tout le texte d'un PDF en utilisant pdfplumber.
+    Extract per-page text from a PDF (page-level cache), falling back to OCR
+    for pages without a text layer when OCR is available. Pages still being
+    OCRed when the deadline expires are left empty (``ocr_timeouts``).
+    
+    The text engine (PDF_ENGINE, see pdf_engines.py) runs in an isolated
+    worker process with memory/CPU ceilings (see pdf_worker.py); the engine
+    used and the document's peak RSS are reported in the stats.
+    
+    Returns:
+        Tuple (page_hashes, page_texts, stats)
+    """
+    timeout = None if deadline is None else deadline.timeout("PDF extraction", PDF_WORKER_CPU_SECONDS * 2)
+    try:
+        page_hashes, page_texts, page_stats = pdf_pool.extract(file_data, timeout=timeout)
+    except FuturesTimeoutError:
+        raise DeadlineExceeded("PDF extraction")
+    if page_stats.get("peak_rss_mb") is not None:
+        logger.info(
+            f"PDF worker {page_stats['worker_pid']}: {page_stats['pages']} pages ({page_stats['engine']}), "
+            f"peak RSS {page_stats['peak_rss_mb']}MB, CPU {page_stats.get('cpu_seconds')}s"
+        )
+    
+    if not all(text.strip() for text in page_texts) and ocr_available():
+        timeout = None if deadline is None else deadline.remaining()
+        page_texts, ocr_stats = ocr_missing_pages(file_data, page_hashes, page_texts, timeout=timeout)
+        page_stats.update(ocr_stats)
+    
+    return page_hashes, page_texts, page_stats
+
+
+def join_pages_text(page_texts: List[str]) -> str:
+    """Concatenate per-page texts the way pdfplumber pages were always joined (empty pages skipped)."""
+    return "".join(page_text + "\n" for page_text in page_texts if page_text)
+
+
+def compact_text(page_texts: List[str], usage: Optional[dict] = None) -> str:
+    """
+    Texte des pages sans en-têtes/pieds de page répétés, numéros de page,
+    césures ni espaces superflus (texte destiné à un LLM).
+    
+    Args:
+        page_texts: Texte de chaque page (``read_pdf_pages``)
+        usage: Rapport d'utilisation LLM à compléter (tailles brute/compactée)
+    """
+    full_text, compact_stats = compact_pages(page_texts)
+    logger.info(
+        f"Texte compacté: {compact_stats['raw_chars']} -> {compact_stats['compacted_chars']} caractères "
+        f"({compact_stats['removed_lines']} lignes répétées/numéros de page retirés)"
+    )
+    if usage is not None:
+        usage["raw_chars"] = compact_stats["raw_chars"]
+        usage["compacted_chars"] = compact_stats["compacted_chars"]
+    return full_text if full_text.strip() else ""
+
+
+def extract_text_from_pdf(
+    file_data: bytes,
+    compact: bool = False,
+    usage: Optional[dict] = None,
+    deadline: Optional[Deadline] = None,
+) -> str:
+    """
+    Extrait tout le texte d'un PDF avec le moteur configuré (PDF_ENGINE, pdfplumber par défaut).
     
     Args:
         file_data: Données binaires du fichier PDF
+        compact: Retirer en-têtes/pieds de page répétés, numéros de page,
+                 césures et espaces superflus (texte destiné à un LLM)
+        usage: Rapport d'utilisation LLM à compléter (tailles brute/compactée)
+        deadline: Échéance de la requête (borne l'OCR)
         
     Returns:
         Texte complet extrait du PDF
     """
     try:
-        pdf_file = io.BytesIO(file_data)
-        full_text = ""
+        # Les pages déjà vues (même hash de contenu) réutilisent le texte en cache,
+        # les pages scannées (sans couche texte) passent par l'OCR si disponible
+        _, page_texts, page_stats = read_pdf_pages(file_data, deadline)
+        logger.info(f"Pages: {page_stats['page_hits']} en cache, {page_stats['page_misses']} extraites")
         
-        with pdfplumber.open(pdf_file) as pdf:
-            for page in pdf.pages:
-                page_text = page.extract_text()
-                if page_text:
-                    full_text += page_text + "\n"
+        full_text = compact_text(page_texts, usage) if compact else join_pages_text(page_texts)
         
         if not full_text:
             raise ValueError("Impossible d'extraire le texte du PDF")
@@ -478,21 +623,199 @@ def extract_text_from_pdf(file_data: bytes) -> str:
         logger.info(f"Texte extrait: {len(full_text)} caractères")
         return full_text
         
+    except DeadlineExceeded:
+        raise
     except Exception as e:
         logger.error(f"Erreur lors de l'extraction du texte: {str(e)}")
         raise ValueError(f"Erreur lors de l'extraction du texte du PDF: {str(e)}")
 
 
-def call_ollama_api(prompt: str, model: str = None) -> str:
+# Structure JSON attendue dans les réponses d'Ollama (une clé par section du CVSchema)
+OLLAMA_SCHEMA_EXAMPLE = {
+    "personal": {
+        "full_name": "string",
+        "email": "string",
+        "phone": "string",
+        "address": "string",
+        "linkedin": "string",
+        "github": "string"
+    },
+    "profile": {
+        "title": "string",
+        "summary": "string"
+    },
+    "skills": {
+        "technical": ["string"],
+        "soft": ["string"]
+    },
+    "experience": [
+        {
+            "company": "string",
+            "role": "string",
+            "start_date": "string",
+            "end_date": "string",
+            "description": "string",
+            "location": "string"
+        }
+    ],
+    "education": [
+        {
+            "school": "string",
+            "degree": "string",
+            "field": "string",
+            "start_date": "string",
+            "end_date": "string",
+            "location": "string"
+        }
+    ],
+    "languages": [
+        {
+            "name": "string",
+            "level": "string"
+        }
+    ]
+}
+
+
+# Instructions détaillées du prompt Ollama, par section du CVSchema
+OLLAMA_SECTION_INSTRUCTIONS = {
+    "personal": """PERSONAL:
+   - full_name: Nom complet (prénom + nom de famille)
+   - email: Email complet si présent
+   - phone: Numéro de téléphone avec indicatif si présent
+   - address: Adresse complète
+   - linkedin: URL LinkedIn complète (commence par https://)
+   - github: URL GitHub complète (commence par https://)""",
+    "profile": """PROFILE:
+   - title: Titre professionnel (ex: "Développeur Full Stack", "Data Scientist")
+   - summary: Résumé professionnel ou objectif de carrière (2-3 phrases)""",
+    "skills": """SKILLS:
+   - technical: Liste de toutes les compétences techniques (langages, frameworks, outils)
+   - soft: Liste des compétences douces (communication, leadership, etc.)""",
+    "experience": """EXPERIENCE:
+   - Extrait TOUTES les expériences professionnelles
+   - company: Nom complet de l'entreprise
+   - role: Titre du poste exact
+   - start_date: Date de début, telle qu'écrite dans le CV
+   - end_date: Date de fin, telle qu'écrite (ou "Present" si en cours)
+   - description: Description détaillée des responsabilités et réalisations (plusieurs phrases)
+   - location: Lieu de travail (ville, pays)""",
+    "education": """EDUCATION:
+   - Extrait TOUTES les formations
+   - school: Nom complet de l'établissement
+   - degree: Diplôme obtenu (ex: "Master", "Licence", "Ingénieur")
+   - field: Domaine d'étude (ex: "Informatique", "Génie Logiciel")
+   - start_date: Date de début, telle qu'écrite dans le CV
+   - end_date: Date de fin, telle qu'écrite (ou "Present" si en cours)
+   - location: Lieu de l'établissement""",
+    "languages": """LANGUAGES:
+   - Extrait TOUTES les langues avec leur niveau (A1, A2, B1, B2, C1, C2, Native)""",
+}
+
+
+def format_section_instructions(sections: List[str]) -> str:
+    """Numérote les instructions détaillées des sections demandées."""
+    return "\n\n".join(
+        f"{number}. {OLLAMA_SECTION_INSTRUCTIONS[section]}"
+        for number, section in enumerate(sections, start=1)
+    )
+
+
+def decode_ollama_json(response_text: str) -> Tuple[dict, bool]:
+    """
+    Extrait l'objet JSON de la réponse d'Ollama.
+    Parfois Ollama ajoute du texte avant/après le JSON, ou la génération est
+    tronquée : dans ce cas le JSON est réparé (virgules finales, clés sans
+    guillemets, tableaux non fermés) et la partie complète est conservée.
+    
+    Returns:
+        Tuple (données, complet) - complet vaut False si la réponse était tronquée
+    
+    Raises:
+        ValueError: aucun objet JSON exploitable dans la réponse
+    """
+    response_text = response_text.strip()
+    
+    # Chercher le JSON dans la réponse
+    json_start = response_text.find('{')
+    json_end = response_text.rfind('}') + 1
+    
+    if json_start != -1 and json_end > json_start:
+        try:
+            return json.loads(response_text[json_start:json_end]), True
+        except json.JSONDecodeError as e:
+            logger.warning(f"JSON d'Ollama invalide ({str(e)}), tentative de réparation")
+    
+    try:
+        cv_data, complete = repair_json(response_text)
+    except ValueError:
+        raise ValueError("Aucun JSON valide trouvé dans la réponse d'Ollama")
+    if not isinstance(cv_data, dict) or not cv_data:
+        raise ValueError("Aucun JSON valide trouvé dans la réponse d'Ollama")
+    return cv_data, complete
+
+
+def _inline_schema_refs(node: Any, definitions: Dict[str, Any]) -> Any:
+    """Remplace les "$ref" du JSON Schema pydantic par leur définition."""
+    if isinstance(node, dict):
+        if "$ref" in node:
+            return _inline_schema_refs(definitions[node["$ref"].split("/")[-1]], definitions)
+        return {key: _inline_schema_refs(value, definitions) for key, value in node.items() if key != "$defs"}
+    if isinstance(node, list):
+        return [_inline_schema_refs(item, definitions) for item in node]
+    return node
+
+
+def cv_json_schema(sections: Optional[List[str]] = None) -> dict:
+    """
+    JSON Schema du CVSchema (références résolues) utilisé comme contrainte
+    de sortie Ollama ; limité à ``sections`` pour les prompts réduits.
+    """
+    schema = CVSchema.model_json_schema()
+    schema = _inline_schema_refs(schema, schema.get("$defs", {}))
+    schema.pop("example", None)
+    if sections is not None:
+        schema["properties"] = {section: schema["properties"][section] for section in sections}
+        schema["required"] = list(sections)
+    return schema
+
+
+def missing_sections(cv_data: dict, complete: bool) -> List[str]:
+    """
+    Sections du CVSchema absentes de la réponse. Si la réponse est tronquée,
+    la dernière section générée est considérée incomplète.
+    """
+    missing = [section for section in OLLAMA_SCHEMA_EXAMPLE if section not in cv_data]
+    if not complete and cv_data:
+        last_section = list(cv_data)[-1]
+        if last_section in OLLAMA_SCHEMA_EXAMPLE and last_section not in missing:
+            missing.append(last_section)
+    return missing
+
+
+def call_ollama_api(
+    prompt: str,
+    model: str = None,
+    output_schema: Optional[dict] = None,
+    usage: Optional[dict] = None,
+    deadline: Optional[Deadline] = None,
+) -> str:
     """
     Appelle l'API Ollama pour générer une réponse à partir d'un prompt.
+    La fenêtre de contexte (num_ctx) est dimensionnée sur la taille réelle du prompt.
     
     Args:
         prompt: Le prompt à envoyer au modèle
         model: Le nom du modèle Ollama à utiliser (par défaut: OLLAMA_MODEL)
+        output_schema: JSON Schema contraignant la sortie (sinon format "json" libre)
+        usage: Rapport d'utilisation à compléter (tokens du prompt et de la réponse)
+        deadline: Échéance de la requête (borne le timeout de 5 minutes)
         
     Returns:
         La réponse générée par le modèle
+    
+    Raises:
+        DeadlineExceeded: l'échéance de la requête est atteinte
     """
     if model is None:
         model = OLLAMA_MODEL
@@ -503,15 +826,40 @@ def call_ollama_api(prompt: str, model: str = None) -> str:
         "model": model,
         "prompt": prompt,
         "stream": False,
-        "format": "json"  # Forcer le format JSON
+        # Forcer le format JSON, contraint par le schéma si disponible
+        "format": output_schema if output_schema is not None and OLLAMA_STRUCTURED_OUTPUT else "json",
     }
     
+    estimated_tokens = count_tokens(prompt)
+    if output_schema is not None and OLLAMA_STRUCTURED_OUTPUT:
+        estimated_tokens += count_tokens(json.dumps(output_schema))
+    num_ctx = context_size(estimated_tokens)
+    payload["options"] = {"num_ctx": num_ctx}
+    
     try:
         logger.info(f"Appel à Ollama avec le modèle: {model}")
-        response = requests.post(url, json=payload, timeout=300)  # Timeout de 5 minutes pour les gros PDFs
+        # Timeout appris de la latence récente du modèle (au plus 5 minutes), borné par l'échéance de la requête ;
+        # les erreurs transitoires (503, 502, ...) sont réessayées dans la limite du budget de retries
+        response = provider_policy.call(
+            f"ollama:{model}",
+            "Ollama",
+            lambda timeout: requests.post(url, json=payload, timeout=timeout),
+            deadline,
+            cap=300,
+        )
         
         if response.status_code == 200:
             result = response.json()
+            logger.info(
+                f"Ollama: {result.get('prompt_eval_count')} tokens en entrée (estimé: {estimated_tokens}), "
+                f"{result.get('eval_count')} en sortie, num_ctx={num_ctx}"
+            )
+            if usage is not None:
+                usage["calls"] += 1
+                usage["prompt_tokens"] += result.get("prompt_eval_count") or 0
+                usage["completion_tokens"] += result.get("eval_count") or 0
+                usage["estimated_prompt_tokens"] += estimated_tokens
+                usage["num_ctx"] = max(usage["num_ctx"], num_ctx)
             return result.get("response", "")
         else:
             error_msg = f"Ollama API failed: {response.status_code} - {response.text[:500]}"
@@ -524,6 +872,8 @@ def call_ollama_api(prompt: str, model: str = None) -> str:
             "Assurez-vous qu'Ollama est démarré et accessible."
         )
     except requests.exceptions.Timeout:
+        if deadline_expired(deadline):
+            raise DeadlineExceeded("Ollama")
         raise RuntimeError(
             "Timeout lors de l'appel à Ollama. Le modèle prend trop de temps à répondre.\n"
             "Suggestions:\n"
@@ -532,75 +882,33 @@ def call_ollama_api(prompt: str, model: str = None) -> str:
             "3. Vérifiez que votre machine a assez de RAM\n"
             "4. Utilisez /parse-cv pour l'extraction locale (plus rapide)"
         )
+    except DeadlineExceeded:
+        raise
     except Exception as e:
         logger.error(f"Erreur lors de l'appel à Ollama: {str(e)}")
         raise RuntimeError(f"Erreur lors de l'appel à Ollama: {str(e)}")
 
 
-def parse_cv_with_ollama(pdf_text: str) -> dict:
+def parse_cv_with_ollama(pdf_text: str, usage: Optional[dict] = None, deadline: Optional[Deadline] = None) -> dict:
     """
     Utilise Ollama pour extraire les informations d'un CV à partir du texte extrait.
     
     Args:
-        pdf_text: Texte complet extrait du PDF
+        pdf_text: Texte complet extrait du PDF (idéalement compacté)
+        usage: Rapport d'utilisation LLM à compléter
+        deadline: Échéance de la requête; une relance sans budget restant est abandonnée
+                  et la réponse partielle est conservée
         
     Returns:
         Dictionnaire contenant les informations structurées du CV
     """
     # Créer le prompt pour Ollama
-    schema_example = json.dumps({
-        "personal": {
-            "full_name": "string",
-            "email": "string",
-            "phone": "string",
-            "address": "string",
-            "linkedin": "string",
-            "github": "string"
-        },
-        "profile": {
-            "title": "string",
-            "summary": "string"
-        },
-        "skills": {
-            "technical": ["string"],
-            "soft": ["string"]
-        },
-        "experience": [
-            {
-                "company": "string",
-                "role": "string",
-                "start_date": "string",
-                "end_date": "string",
-                "description": "string",
-                "location": "string"
-            }
-        ],
-        "education": [
-            {
-                "school": "string",
-                "degree": "string",
-                "field": "string",
-                "start_date": "string",
-                "end_date": "string",
-                "location": "string"
-            }
-        ],
-        "languages": [
-            {
-                "name": "string",
-                "level": "string"
-            }
-        ]
-    }, indent=2)
-    
-    # Limiter le texte à 6000 caractères pour éviter les timeouts
-    # Prendre le début et la fin du texte pour avoir le maximum d'infos
-    text_length = len(pdf_text)
-    if text_length > 6000:
-        # Prendre les premiers 4000 caractères (header, expérience) et les derniers 2000 (formations, compétences)
-        truncated_text = pdf_text[:4000] + "\n\n[... texte tronqué ...]\n\n" + pdf_text[-2000:]
-    else:
-        truncated_text = pdf_text
+    schema_example = json.dumps(OLLAMA_SCHEMA_EXAMPLE, indent=2)
+    instructions = format_section_instructions(list(OLLAMA_SECTION_INSTRUCTIONS))
+    
+    # Limiter le texte au budget de tokens (OLLAMA_INPUT_TOKEN_BUDGET) pour éviter les timeouts
+    # Prendre le début (header, expérience) et la fin (formations, compétences) du texte
+    truncated_text = truncate_to_budget(pdf_text)
     
     prompt = f"""Tu es un expert en extraction d'informations de CV. Analyse le CV suivant et extrais TOUTES les informations de manière précise et complète.
 
@@ -609,47 +917,12 @@ Retourne UNIQUEMENT un JSON valide avec cette structure exacte:
 {schema_example}
 
 INSTRUCTIONS DÉTAILLÉES:
-1. PERSONAL:
-   - full_name: Nom complet (prénom + nom de famille)
-   - email: Email complet si présent
-   - phone: Numéro de téléphone avec indicatif si présent
-   - address: Adresse complète
-   - linkedin: URL LinkedIn complète (commence par https://)
-   - github: URL GitHub complète (commence par https://)
-
-2. PROFILE:
-   - title: Titre professionnel (ex: "Développeur Full Stack", "Data Scientist")
-   - summary: Résumé professionnel ou objectif de carrière (2-3 phrases)
-
-3. SKILLS:
-   - technical: Liste de toutes les compétences techniques (langages, frameworks, outils)
-   - soft: Liste des compétences douces (communication, leadership, etc.)
-
-4. EXPERIENCE:
-   - Extrait TOUTES les expériences professionnelles
-   - company: Nom complet de l'entreprise
-   - role: Titre du poste exact
-   - start_date: Date de début (format YYYY-MM ou YYYY)
-   - end_date: Date de fin ou "Present" si en cours (format YYYY-MM ou YYYY)
-   - description: Description détaillée des responsabilités et réalisations (plusieurs phrases)
-   - location: Lieu de travail (ville, pays)
-
-5. EDUCATION:
-   - Extrait TOUTES les formations
-   - school: Nom complet de l'établissement
-   - degree: Diplôme obtenu (ex: "Master", "Licence", "Ingénieur")
-   - field: Domaine d'étude (ex: "Informatique", "Génie Logiciel")
-   - start_date: Date de début (format YYYY-MM ou YYYY)
-   - end_date: Date de fin ou "Present" si en cours (format YYYY-MM ou YYYY)
-   - location: Lieu de l'établissement
-
-6. LANGUAGES:
-   - Extrait TOUTES les langues avec leur niveau (A1, A2, B1, B2, C1, C2, Native)
+{instructions}
 
 RÈGLES IMPORTANTES:
 - Retourne UNIQUEMENT du JSON valide, sans texte avant ou après
 - Utilise null pour les champs manquants (pas de chaînes vides pour null)
-- Pour les dates, utilise YYYY-MM si le mois est connu, sinon YYYY
+- Recopie les dates telles qu'écrites dans le CV (elles sont normalisées ensuite)
 - Extrait les descriptions complètes, pas juste des mots-clés
 - Sois précis dans l'extraction des noms d'entreprises et d'établissements
 - Si une information n'est pas claire, utilise null plutôt qu'une valeur incorrecte
@@ -661,25 +934,31 @@ Retourne uniquement le JSON, sans explication ni texte supplémentaire:"""
 
     try:
         logger.info("Appel à Ollama pour extraire les informations du CV...")
-        response_text = call_ollama_api(prompt)
+        response_text = call_ollama_api(prompt, output_schema=cv_json_schema(), usage=usage, deadline=deadline)
         
-        # Nettoyer la réponse pour extraire uniquement le JSON
-        # Parfois Ollama ajoute du texte avant/après le JSON
-        response_text = response_text.strip()
+        # Nettoyer (et réparer si besoin) la réponse pour extraire uniquement le JSON
+        cv_data, complete = decode_ollama_json(response_text)
         
-        # Chercher le JSON dans la réponse
-        json_start = response_text.find('{')
-        json_end = response_text.rfind('}') + 1
+        # Ne redemander que les sections manquantes, jamais le prompt complet
+        missing = missing_sections(cv_data, complete)
+        for _ in range(OLLAMA_REPAIR_RETRIES):
+            if not missing:
+                break
+            logger.info(f"Réponse d'Ollama incomplète, relance pour: {', '.join(missing)}")
+            try:
+                extra = parse_sections_with_ollama(
+                    sections_text(pdf_text, missing), missing, usage=usage, deadline=deadline
+                )
+            except Exception as e:
+                logger.warning(f"Relance Ollama échouée, réponse partielle conservée: {str(e)}")
+                break
+            cv_data.update({section: value for section, value in extra.items() if value is not None})
+            missing = [section for section in missing if extra.get(section) is None]
         
-        if json_start != -1 and json_end > json_start:
-            json_str = response_text[json_start:json_end]
-            cv_data = json.loads(json_str)
-            logger.info("CV parsé avec succès via Ollama")
-            return cv_data
-        else:
-            raise ValueError("Aucun JSON valide trouvé dans la réponse d'Ollama")
+        logger.info("CV parsé avec succès via Ollama")
+        return cv_data
             
-    except json.JSONDecodeError as e:
+    except ValueError as e:
         logger.error(f"Erreur de parsing JSON: {str(e)}")
         logger.error(f"Réponse d'Ollama: {response_text[:500]}")
         raise ValueError(f"Impossible de parser la réponse JSON d'Ollama: {str(e)}")
@@ -688,170 +967,357 @@ Retourne uniquement le JSON, sans explication ni texte supplémentaire:"""
         raise
 
 
-def parse_pdf_locally(file_data: bytes) -> dict:
+def run_ollama_pipeline(
+    file_data: bytes, deadline: Optional[Deadline] = None, tenant: str = DEFAULT_TENANT
+) -> Tuple[dict, dict]:
+    """
+    Extrait le texte du PDF (compacté) puis l'analyse avec Ollama.
+    
+    Args:
+        file_data: Données binaires du fichier PDF
+        tenant: Tenant de la requête (quasi-doublons comparés entre ses seuls CV)
+        
+    Returns:
+        Tuple (dictionnaire brut renvoyé par Ollama avant transformation en CVSchema,
+        rapport d'utilisation LLM: tokens, num_ctx, tailles du texte)
+    """
+    usage = new_usage()
+    
+    # Étape 1: Extraire tout le texte du PDF, sans les en-têtes/pieds de page répétés
+    logger.info("Extraction du texte du PDF...")
+    pdf_text = extract_text_from_pdf(file_data, compact=True, usage=usage, deadline=deadline)
+    
+    if not pdf_text or len(pdf_text.strip()) < 50:
+        raise HTTPException(
+            status_code=400,
+            detail="Le PDF ne contient pas assez de texte pour être analysé"
+        )
+    
+    # Un quasi-doublon d'un CV déjà analysé par le même modèle réutilise son résultat
+    backend = f"ollama:{OLLAMA_MODEL}"
+    find_near_duplicates(file_data, pdf_text, tenant)
+    reused = reuse_near_duplicate(file_data, backend, pdf_text, deadline=deadline, tenant=tenant)
+    if reused is not None:
+        logger.info("Quasi-doublon d'un CV déjà analysé: résultat Ollama réutilisé")
+        return reused, usage
+    
+    # Étape 2: Utiliser Ollama pour extraire les informations structurées
+    logger.info("Analyse du CV avec Ollama...")
+    result = parse_cv_with_ollama(pdf_text, usage=usage, deadline=deadline)
+    remember_result(file_data, backend, result, tenant)
+    return result, usage
+
+
+def parse_sections_with_ollama(
+    sections_text: str,
+    sections: List[str],
+    usage: Optional[dict] = None,
+    deadline: Optional[Deadline] = None,
+) -> dict:
+    """
+    Demande à Ollama uniquement les sections du CV listées (prompt réduit).
+    
+    Args:
+        sections_text: Extraits du CV correspondant aux sections demandées
+        sections: Clés du CVSchema à extraire (ex: ["experience", "languages"])
+        usage: Rapport d'utilisation LLM à compléter
+        deadline: Échéance de la requête
+        
+    Returns:
+        Dictionnaire ne contenant que les sections demandées
+    """
+    schema_example = json.dumps({section: OLLAMA_SCHEMA_EXAMPLE[section] for section in sections}, indent=2)
+    instructions = format_section_instructions(sections)
+    
+    prompt = f"""Tu es un expert en extraction d'informations de CV. Extrais UNIQUEMENT les sections suivantes du CV: {", ".join(sections)}.
+
+Retourne UNIQUEMENT un JSON valide avec cette structure exacte:
+
+{schema_example}
+
+INSTRUCTIONS DÉTAILLÉES:
+{instructions}
+
+RÈGLES IMPORTANTES:
+- Retourne UNIQUEMENT du JSON valide, sans texte avant ou après
+- Utilise null pour les champs manquants
+- Recopie les dates telles qu'écrites dans le CV (elles sont normalisées ensuite)
+
+CV (extraits):
+{sections_text}
+
+Retourne uniquement le JSON:"""
+
+    logger.info(f"Appel à Ollama (prompt réduit, {len(prompt)} caractères) pour: {', '.join(sections)}")
+    response_text = call_ollama_api(prompt, output_schema=cv_json_schema(sections), usage=usage, deadline=deadline)
+    cv_data, complete = decode_ollama_json(response_text)
+    if not complete:
+        # La dernière section générée est peut-être tronquée: ne pas la réutiliser
+        cv_data.pop(list(cv_data)[-1], None)
+    return {section: cv_data.get(section) for section in sections}
+
+
+def run_smart_pipeline(
+    file_data: bytes,
+    filename: str,
+    escalation: str,
+    deadline: Optional[Deadline] = None,
+    route: str = "local",
+    local: Optional[Tuple[dict, List[str]]] = None,
+    tenant: str = DEFAULT_TENANT,
+) -> Tuple[dict, dict]:
+    """
+    Tiered extraction: local parsing first, then only the low-confidence
+    sections are escalated to Ollama (reduced prompt) or an external API.
+    Documents routed to "external" by the admission pre-inspection (no text
+    layer, no OCR) skip the local tier: nothing could be read from them.
+    ``local`` is the local tier output (``parse_pdf_pages``) when the caller
+    already has it.
+    
+    Returns:
+        Tuple (merged_result, report) where report lists the section scores
+        and the escalated sections.
+    """
+    if route == "external":
+        result = call_external_api(file_data, filename, api_name="auto", deadline=deadline)
+        report = {"scores": {}, "escalated": list(SECTIONS), "backend": "external", "usage": new_usage()}
+        return result.get("extraction", result.get("data", result)), report
+    
+    local_result, page_texts = local if local is not None else parse_pdf_pages(file_data, deadline, tenant)
+    # A near-duplicate already escalated the same way: reuse its merged result
+    backend = f"smart:{escalation}"
+    reused = reuse_near_duplicate(
+        file_data, backend, join_pages_text(page_texts), local_result=local_result, deadline=deadline, tenant=tenant
+    )
+    if reused is not None:
+        logger.info("Near-duplicate of an already escalated CV, reusing its smart parse result")
+        result, report = reused
+        report["usage"] = new_usage()
+        return result, report
+    result, report = escalate_weak_sections(file_data, filename, local_result, escalation, deadline, page_texts)
+    # Only results that cost a backend call are worth reusing
+    if report["backend"] != "local":
+        remember_result(file_data, backend, (result, report), tenant)
+    return result, report
+
+
+def run_external_pipeline(
+    file_data: bytes, filename: str, deadline: Optional[Deadline] = None, tenant: str = DEFAULT_TENANT
+) -> dict:
+    """
+    External API parse (``call_external_api`` with automatic fallback), reusing
+    the result of a near-duplicate already sent to the external APIs.
+    The near-duplicate lookup needs the local text: documents without any
+    readable text (scans without OCR) are always sent.
+    """
+    text = ""
+    try:
+        text = extract_text_from_pdf(file_data, deadline=deadline)
+        find_near_duplicates(file_data, text, tenant)
+    except DeadlineExceeded:
+        raise
+    except Exception as e:
+        logger.info(f"No local text for the near-duplicate lookup: {str(e)}")
+    
+    reused = reuse_near_duplicate(file_data, "external", text, deadline=deadline, tenant=tenant)
+    if reused is not None:
+        logger.info("Near-duplicate of a CV already parsed by an external API, reusing its result")
+        return reused
+    result = call_external_api(file_data, filename, api_name="auto", deadline=deadline)
+    remember_result(file_data, "external", result, tenant)
+    return result
+
+
+def escalate_weak_sections(
+    file_data: bytes,
+    filename: str,
+    local_result: dict,
+    escalation: str,
+    deadline: Optional[Deadline] = None,
+    page_texts: Optional[List[str]] = None,
+) -> Tuple[dict, dict]:
+    """
+    Score a local extraction result and upgrade its low-confidence sections
+    with Ollama or an external API (see ``run_smart_pipeline``). The Ollama
+    prompt is built from ``page_texts`` when given, instead of reading the
+    PDF again. External APIs only take documents: the whole PDF is uploaded
+    and only the weak sections of their answer are merged.
+    
+    Returns:
+        Tuple (merged_result, report)
+    """
+    scores = score_fields(local_result, join_pages_text(page_texts) if page_texts is not None else None)
+    sections = weak_sections(scores) if escalation != "none" else []
+    report = {"scores": scores, "escalated": sections, "backend": "local", "usage": new_usage()}
+    
+    if not sections:
+        logger.info(f"Smart parse served by the local tier (scores: {scores})")
+        return local_result, report
+    
+    try:
+        if escalation == "external":
+            upgrade = call_external_api(file_data, filename, api_name="auto", deadline=deadline)
+            upgrade = upgrade.get("extraction", upgrade.get("data", upgrade))
+        else:
+            if page_texts is not None:
+                full_text = compact_text(page_texts, report["usage"])
+                if not full_text:
+                    raise ValueError("No text to send to Ollama")
+            else:
+                full_text = extract_text_from_pdf(file_data, compact=True, usage=report["usage"], deadline=deadline)
+            upgrade = parse_sections_with_ollama(
+                sections_text(full_text, sections), sections, usage=report["usage"], deadline=deadline
+            )
+        report["backend"] = escalation
+    except Exception as e:
+        # The local result is still a valid answer: degrade instead of failing
+        logger.warning(f"Smart parse escalation to {escalation} failed, keeping local result: {str(e)}")
+        report["escalated"] = []
+        if isinstance(e, DeadlineExceeded):
+            report["deadline_exceeded"] = e.stage
+        return local_result, report
+    
+    logger.info(f"Smart parse escalated {sections} to {escalation} (scores: {scores})")
+    return merge_sections(local_result, upgrade, sections), report
+
+
+def find_near_duplicates(file_data: bytes, text: str, tenant: str = DEFAULT_TENANT) -> Optional[dict]:
+    """
+    Near-duplicate report of a document among the ``tenant``'s (NEAR_DUPLICATE_ENABLED),
+    indexing it on first sight.
+    """
+    if near_duplicates is None or not text:
+        return None
+    return near_duplicates.lookup(tenant, document_hash(file_data), text)
+
+
+def reuse_near_duplicate(
+    file_data: bytes,
+    backend: str,
+    text: Optional[str] = None,
+    local_result: Optional[dict] = None,
+    deadline: Optional[Deadline] = None,
+    tenant: str = DEFAULT_TENANT,
+) -> Optional[Any]:
+    """
+    Prior ``backend`` result of a near-duplicate of the same ``tenant`` above
+    NEAR_DUPLICATE_REUSE_THRESHOLD, if any (NEAR_DUPLICATE_REUSE=true).
+    
+    Its personal section belongs to the earlier CV: it is rebuilt from the
+    local extraction of this document (``local_result``, parsed if not given)
+    and its ``text`` (see ``refresh_personal``). Without a local extraction
+    the result is not reused.
+    """
+    if near_duplicates is None:
+        return None
+    reused = near_duplicates.reusable(tenant, document_hash(file_data), backend)
+    if reused is None:
+        return None
+    try:
+        if local_result is None:
+            local_result = parse_pdf_locally(file_data, deadline, tenant)
+        if text is None:
+            text = extract_text_from_pdf(file_data, deadline=deadline)
+    except DeadlineExceeded:
+        raise
+    except Exception as e:
+        logger.info(f"No local extraction to refresh the near-duplicate result, not reusing it: {str(e)}")
+        return None
+    
+    # Smart results are (merged result, report); external API results nest their fields
+    result = reused[0] if isinstance(reused, tuple) else reused
+    extraction = result.get("extraction", result.get("data", result))
+    if isinstance(extraction, dict) and "extraction" in extraction:
+        extraction = extraction["extraction"]
+    if isinstance(extraction, dict):
+        extraction["personal"] = refresh_personal(
+            extraction.get("personal") or {}, local_result.get("personal") or {}, text
+        )
+    return reused
+
+
+def remember_result(file_data: bytes, backend: str, result: Any, tenant: str = DEFAULT_TENANT) -> None:
+    """Keep a costly backend result for the future near-duplicates of the document (same tenant)."""
+    if near_duplicates is not None:
+        near_duplicates.remember(tenant, document_hash(file_data), backend, result)
+
+
+def parse_pdf_locally(file_data: bytes, deadline: Optional[Deadline] = None, tenant: str = DEFAULT_TENANT) -> dict:
+    """Local extraction result of a PDF (see ``parse_pdf_pages``)."""
+    return parse_pdf_pages(file_data, deadline, tenant)[0]
+
+
+def parse_pdf_pages(
+    file_data: bytes, deadline: Optional[Deadline] = None, tenant: str = DEFAULT_TENANT
+) -> Tuple[dict, List[str]]:
     """
-    Parse PDF locally using pdfplumber and extract CV information using regex patterns.
+    Parse PDF locally using pdfplumber and extract CV information using regex patterns
+    (see the extractor registry in extractors.py).
     This is a fallback when Extracta API is not available.
+    
+    Returns:
+        Tuple (result, page_texts): the page texts let the smart tiers build
+        their prompts without reading the PDF again
     """
     try:
-        # Extract text from PDF
-        pdf_file = io.BytesIO(file_data)
-        full_text = ""
-        
-        with pdfplumber.open(pdf_file) as pdf:
-            for page in pdf.pages:
-                page_text = page.extract_text()
-                if page_text:
-                    full_text += page_text + "\n"
+        # Extract text from PDF, reusing cached text for pages seen before (page-level hashing)
+        # and OCRing scanned pages when Tesseract is available
+        page_hashes, page_texts, page_stats = read_pdf_pages(file_data, deadline)
+        full_text = join_pages_text(page_texts)
+        # Flag near-duplicates of the tenant's CVs seen before (reused by the costly backends)
+        find_near_duplicates(file_data, full_text, tenant)
+        
+        # Every page unchanged, read by the same engine and run through the same extractors:
+        # reuse the whole extraction result
+        document_key = (page_stats["engine"], frozenset(DISABLED_EXTRACTORS), tuple(page_hashes))
+        cached_result = page_result_cache.get(document_key)
+        if cached_result is not None:
+            logger.info(f"All {page_stats['pages']} pages unchanged, reusing cached local extraction")
+            return copy.deepcopy(cached_result), page_texts
         
         if not full_text:
             raise ValueError("Could not extract text from PDF")
         
-        logger.info(f"Extracted {len(full_text)} characters from PDF")
-        
-        # Extract information using regex patterns
-        result = {
-            "personal": {},
-            "profile": {},
-            "experience": [],
-            "education": [],
-            "skills": [],
-            "languages": []
-        }
-        
-        # Email pattern
-        email_pattern = r'\b[A-Za-z0-9._%+-]+@[A-Za-z0-9.-]+\.[A-Z|a-z]{2,}\b'
-        emails = re.findall(email_pattern, full_text)
-        if emails:
-            result["personal"]["email"] = emails[0]
-        
-        # Phone pattern (international and local formats)
-        phone_pattern = r'(\+?\d{1,3}[-.\s]?)?\(?\d{1,4}\)?[-.\s]?\d{1,4}[-.\s]?\d{1,9}'
-        phones = re.findall(phone_pattern, full_text)
-        if phones:
-            # Take the first phone number that looks complete
-            for match in re.finditer(phone_pattern, full_text):
-                phone = match.group(0).strip()
-                if len(phone.replace(' ', '').replace('-', '').replace('.', '').replace('(', '').replace(')', '')) >= 8:
-                    result["personal"]["phone"] = phone
-                    break
-        
-        # LinkedIn pattern
-        linkedin_pattern = r'(?:linkedin\.com/in/|linkedin\.com/pub/)([a-zA-Z0-9-]+)'
-        linkedin_match = re.search(linkedin_pattern, full_text, re.IGNORECASE)
-        if linkedin_match:
-            result["personal"]["linkedin"] = f"https://linkedin.com/in/{linkedin_match.group(1)}"
-        
-        # GitHub pattern
-        github_pattern = r'(?:github\.com/)([a-zA-Z0-9-]+)'
-        github_match = re.search(github_pattern, full_text, re.IGNORECASE)
-        if github_match:
-            result["personal"]["github"] = f"https://github.com/{github_match.group(1)}"
-        
-        # Name - usually at the beginning, first line or two
-        lines = full_text.split('\n')[:10]  # Check first 10 lines
-        for line in lines:
-            line = line.strip()
-            if line and len(line) > 3 and len(line) < 50:
-                # Check if it looks like a name (not email, not phone, not URL)
-                if not re.search(email_pattern, line) and not re.search(phone_pattern, line) and not re.search(r'http', line, re.IGNORECASE):
-                    if not result["personal"].get("full_name"):
-                        result["personal"]["full_name"] = line
-                        break
-        
-        # Skills - common technical skills keywords
-        skills_keywords = [
-            'Python', 'Java', 'JavaScript', 'TypeScript', 'C++', 'C#', 'PHP', 'Ruby', 'Go', 'Rust',
-            'React', 'Angular', 'Vue', 'Node.js', 'Express', 'Django', 'Flask', 'FastAPI', 'Spring',
-            'SQL', 'MySQL', 'PostgreSQL', 'MongoDB', 'Redis', 'Docker', 'Kubernetes', 'AWS', 'Azure',
-            'Git', 'Linux', 'Windows', 'HTML', 'CSS', 'SASS', 'Bootstrap', 'Tailwind',
-            'Machine Learning', 'AI', 'TensorFlow', 'PyTorch', 'Data Science', 'Analytics'
-        ]
+        logger.info(
+            f"Extracted {len(full_text)} characters from PDF "
+            f"({page_stats['page_hits']} cached pages, {page_stats['page_misses']} re-extracted)"
+        )
         
-        found_skills = []
-        text_lower = full_text.lower()
-        for skill in skills_keywords:
-            if skill.lower() in text_lower:
-                found_skills.append(skill)
-        
-        result["skills"] = found_skills[:20]  # Limit to 20 skills
-        
-        # Experience - look for common patterns
-        experience_keywords = ['experience', 'work experience', 'employment', 'career', 'professional experience']
-        experience_section = ""
-        for keyword in experience_keywords:
-            pattern = rf'{keyword}.*?(?=(?:education|skills|projects|$))'
-            match = re.search(pattern, full_text, re.IGNORECASE | re.DOTALL)
-            if match:
-                experience_section = match.group(0)
-                break
+        # Built once, queried by every registered extractor instead of rescanning full_text
+        index = TextIndex(full_text)
         
-        # Try to extract company names and roles (basic pattern)
-        if experience_section:
-            # Look for patterns like "Company Name - Role" or "Role at Company"
-            company_role_pattern = r'([A-Z][a-zA-Z\s&]+(?:Inc|LLC|Ltd|Corp)?)\s*[-–—]\s*([A-Z][a-zA-Z\s]+)'
-            matches = re.finditer(company_role_pattern, experience_section)
-            for match in matches:
-                company = match.group(1).strip()
-                role = match.group(2).strip()
-                if len(company) > 2 and len(role) > 2:
-                    result["experience"].append({
-                        "company": company,
-                        "role": role
-                    })
-        
-        # Education - look for education section
-        education_keywords = ['education', 'academic', 'university', 'degree', 'diploma']
-        education_section = ""
-        for keyword in education_keywords:
-            pattern = rf'{keyword}.*?(?=(?:experience|skills|projects|$))'
-            match = re.search(pattern, full_text, re.IGNORECASE | re.DOTALL)
-            if match:
-                education_section = match.group(0)
-                break
+        # Run the field extractors (contact, name, title, summary, experience, ...) concurrently
+        outputs, timings = run_extractors(index)
+        result = assemble_result(outputs)
         
-        # Extract degree and school names
-        if education_section:
-            degree_pattern = r'(Bachelor|Master|PhD|Doctorate|Diploma|Certificate)\s+(?:of|in)?\s*([A-Z][a-zA-Z\s]+)'
-            matches = re.finditer(degree_pattern, education_section, re.IGNORECASE)
-            for match in matches:
-                degree = f"{match.group(1)} {match.group(2)}"
-                result["education"].append({
-                    "degree": degree.strip()
-                })
-        
-        # Profile/Summary - usually near the beginning after name
-        summary_keywords = ['summary', 'profile', 'about', 'objective', 'overview']
-        for keyword in summary_keywords:
-            pattern = rf'{keyword}.*?(?=(?:experience|education|skills|$))'
-            match = re.search(pattern, full_text, re.IGNORECASE | re.DOTALL)
-            if match:
-                summary = match.group(0).replace(keyword, '', 1).strip()
-                # Clean up summary
-                summary = re.sub(r'\s+', ' ', summary)
-                if len(summary) > 20 and len(summary) < 500:
-                    result["profile"]["summary"] = summary[:500]
-                    break
-        
-        # Title - often near the name or in summary
-        title_keywords = ['developer', 'engineer', 'manager', 'analyst', 'designer', 'consultant', 'specialist']
-        for line in lines[:5]:
-            for keyword in title_keywords:
-                if keyword.lower() in line.lower():
-                    result["profile"]["title"] = line.strip()
-                    break
-            if result["profile"].get("title"):
-                break
+        slowest = max(timings, key=timings.get) if timings else None
+        if slowest:
+            logger.info(f"Extractor timings (ms): {timings} - slowest: {slowest}")
         
         logger.info(f"Local extraction completed. Found: {len(result['experience'])} experiences, {len(result['education'])} education entries, {len(result['skills'])} skills")
         
-        return result
+        # A result missing pages whose OCR ran out of time must not be served again
+        if not page_stats.get("ocr_timeouts"):
+            page_result_cache.put(document_key, copy.deepcopy(result))
+        return result, page_texts
         
+    except DeadlineExceeded:
+        raise
     except Exception as e:
         logger.error(f"Error in local PDF parsing: {str(e)}", exc_info=True)
         raise RuntimeError(f"Failed to parse PDF locally: {str(e)}")
 
 
+def item_dates(item: dict) -> Dict[str, Optional[str]]:
+    """Normalized start_date/end_date of a provider or local experience/education item."""
+    start_date, end_date = normalize_period(
+        item.get("start_date") or item.get("start"),
+        item.get("end_date") or item.get("end"),
+        item.get("dates") or item.get("period"),
+    )
+    return {"start_date": start_date, "end_date": end_date}
+
+
 def transform_extracta_response(extracta_response: dict) -> CVSchema:
     """
     Transform Extracta API response or local extraction result to CVSchema format.
@@ -892,12 +1358,12 @@ def transform_extracta_response(extracta_response: dict) -> CVSchema:
         if not isinstance(experience_list, list):
             experience_list = []
         
+        # Dates as written ("Sept 2018 – Present", "2015-2018") are normalized to YYYY-MM / YYYY / Present
         experience = [
             ExperienceItem(
                 company=exp.get("company"),
                 role=exp.get("role") or exp.get("position") or exp.get("title"),
-                start_date=exp.get("start_date") or exp.get("start"),
-                end_date=exp.get("end_date") or exp.get("end"),
+                **item_dates(exp),
                 description=exp.get("description"),
                 location=exp.get("location")
             )
@@ -915,8 +1381,7 @@ def transform_extracta_response(extracta_response: dict) -> CVSchema:
                 school=edu.get("school") or edu.get("institution") or edu.get("university"),
                 degree=edu.get("degree"),
                 field=edu.get("field") or edu.get("major"),
-                start_date=edu.get("start_date") or edu.get("start"),
-                end_date=edu.get("end_date") or edu.get("end"),
+                **item_dates(edu),
                 location=edu.get("location")
             )
             for edu in education_list
@@ -955,6 +1420,11 @@ def transform_extracta_response(extracta_response: dict) -> CVSchema:
                 else:
                     technical_skills.append(skill)
         
+        # Ollama (and the smart mode) already return {"technical": [...], "soft": [...]}
+        if isinstance(skills_data, dict):
+            technical_skills = [s for s in skills_data.get("technical") or [] if isinstance(s, str)]
+            soft_skills = [s for s in skills_data.get("soft") or [] if isinstance(s, str)]
+        
         skills = Skills(
             technical=technical_skills,
             soft=soft_skills
@@ -1004,13 +1474,346 @@ def validate_cv_payload(payload: dict) -> CVSchema:
     return CVSchema.model_validate(payload)
 
 
+def set_usage_headers(response: Response, usage: dict) -> None:
+    """Expose the per-request LLM token report as response headers."""
+    response.headers["X-Prompt-Tokens"] = str(usage["prompt_tokens"])
+    response.headers["X-Completion-Tokens"] = str(usage["completion_tokens"])
+    response.headers["X-Estimated-Prompt-Tokens"] = str(usage["estimated_prompt_tokens"])
+    response.headers["X-Num-Ctx"] = str(usage["num_ctx"])
+    response.headers["X-Text-Chars"] = f"{usage['raw_chars']}->{usage['compacted_chars']}"
+
+
+async def local_fallback(
+    response: Response, data: bytes, error: DeadlineExceeded, tenant: str = DEFAULT_TENANT
+) -> CVSchema:
+    """
+    Best-effort answer once the request deadline is exhausted: the local
+    extraction, flagged with the X-Deadline-Exceeded header.
+    """
+    logger.warning(f"{str(error)}, returning the local extraction instead")
+    try:
+        result, _ = await parse_flight.do(flight_key(data, "local", tenant), parse_pdf_locally, data, None, tenant)
+    except Exception as e:
+        raise HTTPException(
+            status_code=504,
+            detail=f"{str(error)} and the local extraction failed: {str(e)}"
+        )
+    response.headers["X-Deadline-Exceeded"] = error.stage
+    response.headers["X-Parse-Backend"] = "local"
+    return transform_extracta_response(result)
+
+
+async def admit_document(
+    response: Optional[Response],
+    data: bytes,
+    text_required: bool = True,
+    work: Optional[WorkTicket] = None,
+    backend: str = "local",
+) -> PdfInspection:
+    """
+    Pre-inspect the PDF structure, wait for a ``backend`` slot in the fair
+    scheduler (``work``: priority class and tenant of the request), then
+    reserve the document's estimated cost before any extraction work; must be
+    paired with ``release_document``. The cost class is returned in the
+    X-Cost-Class and X-Estimated-Cost headers, the scheduler wait in X-Queue-Wait-Ms.
+    
+    Raises:
+        HTTPException: 413 (oversize, or a structure exceeding the PDF worker
+            ceilings), 422 (no text layer and no OCR while ``text_required``),
+            503 with Retry-After (no slot or capacity in time)
+    """
+    try:
+        # In a PDF worker: the structure of an untrusted upload is parsed under its ceilings
+        inspection = await run_in_threadpool(
+            pdf_pool.inspect, data, ocr_available(), PDF_WORKER_CPU_SECONDS * 2
+        )
+    except PdfLimitExceeded as e:
+        raise HTTPException(status_code=413, detail=f"The PDF structure is too costly to process: {str(e)}")
+    except FuturesTimeoutError:
+        raise HTTPException(
+            status_code=503,
+            detail="The PDF workers are busy, retry later",
+            headers={"Retry-After": str(PDF_WORKER_CPU_SECONDS)},
+        )
+    headers = inspection.headers()
+    if response is not None:
+        response.headers.update(headers)
+    logger.info(
+        f"Admission: {inspection.pages} pages ({inspection.text_pages} text, {inspection.image_pages} image-only), "
+        f"{inspection.objects} objects, cost {inspection.cost} ({inspection.cost_class}), "
+        f"inspected in {inspection.inspect_ms}ms"
+    )
+    
+    if text_required and inspection.route == "external":
+        raise HTTPException(
+            status_code=422,
+            detail="The PDF has no text layer and OCR is unavailable: use /parse-cv-external",
+            headers=headers,
+        )
+    try:
+        if work is not None:
+            # Queued before the admission reservation: waiting work holds no capacity
+            work.backend, work.cost = backend, inspection.cost
+            await scheduler.acquire(work)
+            headers.update(work.headers())
+            if response is not None:
+                response.headers.update(work.headers())
+        try:
+            await admission.acquire(inspection)
+        except BaseException:
+            # Rejected, failed or cancelled (client gone): the scheduler slot must not leak
+            if work is not None:
+                await scheduler.release(work)
+            raise
+    except AdmissionRejected as e:
+        if e.retry_after:
+            headers["Retry-After"] = str(e.retry_after)
+        raise HTTPException(status_code=e.status_code, detail=e.detail, headers=headers)
+    return inspection
+
+
+async def release_document(inspection: PdfInspection, work: Optional[WorkTicket] = None) -> None:
+    """Return the admission cost and the scheduler slot taken by ``admit_document``."""
+    await admission.release(inspection)
+    if work is not None:
+        await scheduler.release(work)
+
+
+async def switch_backend(response: Response, work: WorkTicket, backend: str) -> None:
+    """
+    Move the request's scheduler slot to the backend it is about to call
+    (smart escalation, scans routed to the external APIs).
+    
+    Raises:
+        HTTPException: 503 with Retry-After (no slot in time)
+    """
+    try:
+        await scheduler.switch(work, backend)
+    except AdmissionRejected as e:
+        raise HTTPException(status_code=e.status_code, detail=e.detail, headers={"Retry-After": str(e.retry_after)})
+    response.headers.update(work.headers())
+
+
+def set_near_duplicate_headers(response: Response, data: bytes, backend: str, tenant: str = DEFAULT_TENANT) -> None:
+    """
+    Flag a near-duplicate upload: X-Near-Duplicate-Of (SHA-256 of the most
+    similar CV the tenant sent before), X-Near-Duplicate-Similarity and, when its
+    ``backend`` result was served instead of calling the backend again,
+    X-Near-Duplicate-Reused.
+    """
+    report = near_duplicates.report(tenant, document_hash(data)) if near_duplicates is not None else None
+    if not report or not report["matches"]:
+        return
+    match, similarity = report["matches"][0]
+    response.headers["X-Near-Duplicate-Of"] = match
+    response.headers["X-Near-Duplicate-Similarity"] = str(similarity)
+    if report["reused"] and report["reused"]["backend"] == backend:
+        response.headers["X-Near-Duplicate-Reused"] = report["reused"]["document"]
+
+
+async def store_parsed_cv(data: bytes, cv_data: CVSchema, backend: str) -> None:
+    """Save a parsed CV in the search store (CV_STORE_ENABLED); storing never fails a parse."""
+    if cv_store is None:
+        return
+    try:
+        await run_in_threadpool(cv_store.add, document_hash(data), cv_data.model_dump(), backend)
+    except Exception as e:
+        logger.warning(f"Could not store the parsed CV: {str(e)}")
+
+
+def requested_profile(
+    profile: Optional[str] = Query(None, description="Profile this request: sample | cprofile (admin only)"),
+    x_profile: Optional[str] = Header(None),
+    x_profile_token: Optional[str] = Header(None),
+) -> Optional[ProfileRequest]:
+    """
+    Profiling requested with `?profile=` or the `X-Profile` header (admin token
+    in `X-Profile-Token`), or picked at random for PROFILE_SAMPLE_RATE of the requests.
+    """
+    mode = (profile or x_profile or "").lower()
+    if not mode:
+        return sampled_request()
+    if not check_token(x_profile_token):
+        raise HTTPException(status_code=403, detail="Profiling requires a valid X-Profile-Token")
+    if mode in ("1", "true", "yes"):
+        mode = "sample"
+    if mode not in PROFILE_MODES:
+        raise HTTPException(status_code=400, detail=f"profile must be one of: {', '.join(PROFILE_MODES)}")
+    return ProfileRequest(mode=mode)
+
+
+def requested_work(
+    x_priority: Optional[str] = Header(None, description="Scheduling class: interactive (default) | bulk"),
+    x_tenant: Optional[str] = Header(None, description="Tenant sharing the backends fairly with the others"),
+) -> WorkTicket:
+    """Priority class (`X-Priority`) and tenant (`X-Tenant`) of a parse request for the fair scheduler."""
+    priority = (x_priority or "interactive").strip().lower()
+    if priority not in PRIORITIES:
+        raise HTTPException(status_code=400, detail=f"X-Priority must be one of: {', '.join(PRIORITIES)}")
+    return WorkTicket(tenant=(x_tenant or "").strip()[:64] or DEFAULT_TENANT, priority=priority)
+
+
+async def run_pipeline(
+    key: Tuple[str, str, str, Optional[float]],
+    profile: Optional[ProfileRequest],
+    response: Response,
+    transform: Callable[[Any], Any],
+    func: Callable[..., Any],
+    *args: Any,
+) -> Any:
+    """
+    Run ``transform(func(*args))``: coalesced with identical uploads of the same
+    tenant and time budget (``key``: see ``flight_key``; the near-duplicate
+    lookups inside are per tenant), or on its own under the profiler when the
+    request is profiled. The profile id is
+    returned in the X-Profile-Id header (only for explicitly profiled requests).
+    """
+    if profile is None:
+        result, _ = await parse_flight.do(key, func, *args)
+        return transform(result)
+    
+    result, profile_id = await run_in_threadpool(
+        profile_call, profile, key[1].split(":")[0], lambda: transform(func(*args))
+    )
+    logger.info(f"Request profiled ({profile.mode}): {profile_id}")
+    if profile.explicit:
+        response.headers["X-Profile-Id"] = profile_id
+    return result
+
+
+@app.get("/profiles/{profile_id}")
+def get_profile(profile_id: str, x_profile_token: Optional[str] = Header(None)):
+    """
+    Download a stored request profile (admin only).
+    `.folded` files are collapsed stacks for flamegraph.pl / speedscope / inferno,
+    `.prof` files are cProfile stats for snakeviz / flameprof.
+    """
+    if not check_token(x_profile_token):
+        raise HTTPException(status_code=403, detail="Profiling requires a valid X-Profile-Token")
+    path = profile_path(profile_id)
+    if path is None:
+        raise HTTPException(status_code=404, detail="Profile not found")
+    return FileResponse(path, media_type="application/octet-stream", filename=path.name)
+
+
 @app.get("/healthz", status_code=status.HTTP_200_OK)
 def healthz():
     return {"status": "ok"}
 
 
+@app.get("/stats/page-cache", status_code=status.HTTP_200_OK)
+def page_cache_stats():
+    """
+    Page-level cache statistics: hits/misses on per-page text (pages reused
+    from a previous upload) and on whole-document local extraction results.
+    """
+    return cache_stats()
+
+
+@app.get("/stats/pdf-workers", status_code=status.HTTP_200_OK)
+def pdf_workers_stats():
+    """
+    Isolated PDF worker pool: documents processed, recycles, documents that hit
+    a memory/CPU ceiling, last health check, per-worker throughput (warm-up,
+    documents, pages/s, work vs hand-off time) and peak RSS / CPU time of the
+    most recent documents.
+    """
+    return pdf_pool.stats()
+
+
+@app.get("/stats/admission", status_code=status.HTTP_200_OK)
+def admission_stats():
+    """
+    Cost-based admission control: capacity and cost in flight, and per cost class
+    (light, standard, heavy, oversize) the admitted, queued, rejected and completed
+    requests with their average processing time.
+    """
+    return admission.stats()
+
+
+@app.get("/stats/scheduler", status_code=status.HTTP_200_OK)
+def scheduler_stats():
+    """
+    Fair scheduler: per backend (local, ollama, external) the slot caps and, per
+    priority class (interactive, bulk), running and waiting requests, grants,
+    rejections and p50/p95 queue wait, plus the busiest tenants.
+    """
+    return scheduler.stats()
+
+
+@app.get("/stats/cv-store", status_code=status.HTTP_200_OK)
+def cv_store_stats(x_search_token: Optional[str] = Header(None)):
+    """Parsed CV store: stored documents, distinct index terms and postings (CV_STORE_TOKEN required)."""
+    if cv_store is None:
+        raise HTTPException(status_code=503, detail="CV store disabled: set CV_STORE_ENABLED=true")
+    if not check_search_token(x_search_token):
+        raise HTTPException(status_code=403, detail="The CV store requires a valid X-Search-Token")
+    return cv_store.stats()
+
+
+@app.get("/stats/near-duplicates", status_code=status.HTTP_200_OK)
+def near_duplicates_stats():
+    """Near-duplicate detection: indexed signatures, lookups, flagged and reused documents."""
+    if near_duplicates is None:
+        raise HTTPException(status_code=503, detail="Near-duplicate detection disabled: set NEAR_DUPLICATE_ENABLED=true")
+    return near_duplicates.stats()
+
+
+@app.get("/stats/providers", status_code=status.HTTP_200_OK)
+def providers_stats():
+    """
+    External providers and Ollama models: latency percentiles behind the adaptive
+    timeouts, outcome counts and retry budget usage over the current window.
+    """
+    return provider_policy.stats()
+
+
+@app.get("/stats/extractors", status_code=status.HTTP_200_OK)
+def extractors_stats():
+    """
+    Aggregated run time of each local field extractor (runs, avg/max/total ms),
+    to spot expensive extractors and disable them with DISABLED_EXTRACTORS.
+    """
+    return extractor_stats.snapshot()
+
+
+@app.get("/search")
+async def search_cvs(
+    q: str = Query(..., description='Query, e.g. skill:python skill:docker NOT location:paris, company:"acme corp" OR title:devops'),
+    limit: int = Query(20, ge=1, le=100),
+    offset: int = Query(0, ge=0),
+    ranked: bool = Query(True, description="Rank by field-weighted term rarity (else most recently parsed first)"),
+    match: str = Query("all", description="Operator between terms without AND/OR: all | any"),
+    x_search_token: Optional[str] = Header(None),
+):
+    """
+    Search the parsed CVs (CV_STORE_ENABLED=true) by skills, titles, companies and locations.
+    Results hold the candidates' personal data: the `X-Search-Token` header must be CV_STORE_TOKEN.
+    
+    Terms are `field:value` (fields: skill, title, company, location) or bare words searched
+    in every field; `AND` (implicit with `match=all`), `OR`, `NOT` and parentheses combine them.
+    Values are normalized (case, accents, company legal suffixes).
+    """
+    if cv_store is None:
+        raise HTTPException(status_code=503, detail="CV store disabled: set CV_STORE_ENABLED=true")
+    if not check_search_token(x_search_token):
+        raise HTTPException(status_code=403, detail="The CV store requires a valid X-Search-Token")
+    if match not in ("all", "any"):
+        raise HTTPException(status_code=400, detail="match must be one of: all, any")
+    try:
+        return await run_in_threadpool(cv_store.search, q, limit, offset, ranked, "and" if match == "all" else "or")
+    except QuerySyntaxError as e:
+        raise HTTPException(status_code=400, detail=f"Invalid query: {str(e)}")
+
+
 @app.post("/parse-cv", response_model=CVSchema)
-async def parse_cv_local(file: UploadFile = File(...)):
+async def parse_cv_local(
+    response: Response,
+    file: UploadFile = File(...),
+    x_request_timeout: Optional[str] = Header(None),
+    profile: Optional[ProfileRequest] = Depends(requested_profile),
+    work: WorkTicket = Depends(requested_work),
+):
     """
     Parse a CV PDF file using LOCAL extraction (pdfplumber).
     
@@ -1027,10 +1830,15 @@ async def parse_cv_local(file: UploadFile = File(...)):
     2. Extracts text using pdfplumber
     3. Parses information using regex patterns
     4. Returns structured JSON that can be used to fill forms in the frontend
+    
+    The optional `X-Request-Timeout` header (seconds) bounds OCR of scanned pages.
+    Oversize documents are rejected (413) and scans without OCR refused (422)
+    before any extraction; `X-Cost-Class` gives the estimated cost class.
     """
     if file.content_type != "application/pdf":
         raise HTTPException(status_code=400, detail="Only PDF files are supported")
 
+    deadline = Deadline.from_header(x_request_timeout)
     data = await file.read()
     if len(data) > MAX_FILE_SIZE:
         raise HTTPException(
@@ -1038,27 +1846,232 @@ async def parse_cv_local(file: UploadFile = File(...)):
             detail=f"File too large. Maximum size is {MAX_FILE_SIZE / (1024 * 1024):.1f}MB"
         )
 
+    inspection = await admit_document(response, data, work=work)
     try:
         logger.info("Using LOCAL PDF extraction")
-        extracta_result = parse_pdf_locally(data)
-        
-        # Transform response to CVSchema format
-        cv_data = transform_extracta_response(extracta_result)
+        # Extract, then transform the response to CVSchema format
+        cv_data = await run_pipeline(
+            flight_key(data, "local", work.tenant, deadline), profile, response, transform_extracta_response,
+            parse_pdf_locally, data, deadline, work.tenant
+        )
         
         logger.info(f"CV parsed successfully (local). Found {len(cv_data.experience)} experiences, {len(cv_data.education)} education entries")
         
+        set_near_duplicate_headers(response, data, "local", work.tenant)
+        await store_parsed_cv(data, cv_data, "local")
         return cv_data
         
+    except DeadlineExceeded as e:
+        raise HTTPException(status_code=504, detail=str(e))
     except Exception as e:
         logger.error(f"Unexpected error during local CV parsing: {str(e)}", exc_info=True)
         raise HTTPException(
             status_code=500,
             detail=f"An error occurred while parsing the CV: {str(e)}"
         )
+    finally:
+        await release_document(inspection, work)
+
+
+@app.post("/parse-cv-smart", response_model=CVSchema)
+async def parse_cv_smart(
+    response: Response,
+    file: UploadFile = File(...),
+    escalation: str = SMART_ESCALATION,
+    x_request_timeout: Optional[str] = Header(None),
+    profile: Optional[ProfileRequest] = Depends(requested_profile),
+    work: WorkTicket = Depends(requested_work),
+):
+    """
+    Parse a CV PDF file with TIERED extraction.
+    
+    The endpoint:
+    1. Runs the local extraction (pdfplumber + regex, milliseconds)
+    2. Scores the confidence of each section (personal, profile, skills, experience, education, languages)
+    3. Sends only the low-confidence or missing sections to Ollama (reduced prompt)
+       or to an external API (`escalation=ollama|external|none`)
+    4. Merges the upgraded sections into the local result
+    
+    Most CVs are served by the fast local path. The response headers
+    `X-Parse-Backend` and `X-Escalated-Sections` tell which tier answered.
+    If the escalation fails or the `X-Request-Timeout` deadline (seconds) expires,
+    the local result is returned (`X-Deadline-Exceeded` names the stage that ran out of time).
+    Scanned PDFs without OCR are sent directly to the external APIs.
+    """
+    if escalation not in ("ollama", "external", "none"):
+        raise HTTPException(status_code=400, detail="escalation must be one of: ollama, external, none")
+    
+    if file.content_type != "application/pdf":
+        raise HTTPException(status_code=400, detail="Only PDF files are supported")
+
+    deadline = Deadline.from_header(x_request_timeout)
+    data = await file.read()
+    if len(data) > MAX_FILE_SIZE:
+        raise HTTPException(
+            status_code=413,
+            detail=f"File too large. Maximum size is {MAX_FILE_SIZE / (1024 * 1024):.1f}MB"
+        )
+
+    # Scans without OCR go straight to the external APIs when they can be used
+    inspection = await admit_document(
+        response, data, text_required=escalation == "none" or not external_api_configured(), work=work
+    )
+    try:
+        # Take a slot of the backend the document will actually use: the local
+        # tier runs first and is handed to the pipeline, escalations wait for their backend
+        local = None
+        if inspection.route == "external":
+            await switch_backend(response, work, "external")
+        elif escalation != "none":
+            local, _ = await parse_flight.do(
+                flight_key(data, "local-pages", work.tenant, deadline), parse_pdf_pages, data, deadline, work.tenant
+            )
+            if weak_sections(score_fields(local[0], join_pages_text(local[1]))):
+                await switch_backend(response, work, escalation)
+        
+        cv_data, report = await run_pipeline(
+            flight_key(data, f"smart:{escalation}", work.tenant, deadline), profile, response,
+            lambda output: (transform_extracta_response(output[0]), output[1]),
+            run_smart_pipeline, data, file.filename, escalation, deadline, inspection.route, local, work.tenant
+        )
+        
+        response.headers["X-Parse-Backend"] = report["backend"]
+        response.headers["X-Escalated-Sections"] = ",".join(report["escalated"])
+        set_usage_headers(response, report["usage"])
+        if "deadline_exceeded" in report:
+            response.headers["X-Deadline-Exceeded"] = report["deadline_exceeded"]
+        
+        logger.info(f"CV parsed successfully (smart, {report['backend']}). Found {len(cv_data.experience)} experiences, {len(cv_data.education)} education entries")
+        
+        set_near_duplicate_headers(response, data, f"smart:{escalation}", work.tenant)
+        await store_parsed_cv(data, cv_data, report["backend"])
+        return cv_data
+        
+    except HTTPException:
+        raise
+    except DeadlineExceeded as e:
+        # Not even the local tier finished in time
+        raise HTTPException(status_code=504, detail=str(e))
+    except Exception as e:
+        logger.error(f"Unexpected error during smart CV parsing: {str(e)}", exc_info=True)
+        raise HTTPException(
+            status_code=500,
+            detail=f"An error occurred while parsing the CV: {str(e)}"
+        )
+    finally:
+        await release_document(inspection, work)
+
+
+def sse_event(event: str, data: Any) -> str:
+    """Format one Server-Sent Events message."""
+    return f"event: {event}\ndata: {json.dumps(data, ensure_ascii=False)}\n\n"
+
+
+@app.post("/parse-cv-progressive")
+async def parse_cv_progressive(
+    file: UploadFile = File(...),
+    escalation: str = SMART_ESCALATION,
+    x_request_timeout: Optional[str] = Header(None),
+    work: WorkTicket = Depends(requested_work),
+):
+    """
+    Parse a CV PDF file PROGRESSIVELY over Server-Sent Events (text/event-stream).
+    
+    Events sent on the stream:
+    - `local`: the full CVSchema from the local extraction (milliseconds), to fill the form right away
+    - `patch`: field-level diff (JSON Patch operations) bringing the local result to the
+      upgraded one, once Ollama or the external API (`escalation=ollama|external|none`)
+      has re-extracted the low-confidence sections; `ops` is empty when nothing changed
+    - `error`: the upgrade failed, the local result stands
+    - `done`: end of the stream
+    
+    The `X-Request-Timeout` header (seconds) bounds the whole stream, upgrade included.
+    Browsers' EventSource only supports GET: read the stream with fetch() instead.
+    """
+    if escalation not in ("ollama", "external", "none"):
+        raise HTTPException(status_code=400, detail="escalation must be one of: ollama, external, none")
+    
+    if file.content_type != "application/pdf":
+        raise HTTPException(status_code=400, detail="Only PDF files are supported")
+
+    data = await file.read()
+    if len(data) > MAX_FILE_SIZE:
+        raise HTTPException(
+            status_code=413,
+            detail=f"File too large. Maximum size is {MAX_FILE_SIZE / (1024 * 1024):.1f}MB"
+        )
+
+    deadline = Deadline.from_header(x_request_timeout)
+    filename = file.filename
+    # Only the local tier is charged: the upgrade runs on Ollama or the provider
+    inspection = await admit_document(None, data, work=work)
+    try:
+        # The local tier answers before the response starts, so its errors are plain HTTP errors
+        (local_result, page_texts), _ = await parse_flight.do(
+            flight_key(data, "local-pages", work.tenant, deadline), parse_pdf_pages, data, deadline, work.tenant
+        )
+    except DeadlineExceeded as e:
+        raise HTTPException(status_code=504, detail=str(e))
+    except Exception as e:
+        logger.error(f"Unexpected error during progressive CV parsing: {str(e)}", exc_info=True)
+        raise HTTPException(
+            status_code=500,
+            detail=f"An error occurred while parsing the CV: {str(e)}"
+        )
+    finally:
+        await release_document(inspection, work)
+    local_schema = transform_extracta_response(local_result)
+    local_cv = local_schema.model_dump()
+    await store_parsed_cv(data, local_schema, "local")
+
+    async def events():
+        yield sse_event("local", local_cv)
+        
+        # The upgrade waits for a slot of its backend, only when some section is weak
+        upgrade_work = None
+        try:
+            if escalation != "none" and weak_sections(score_fields(local_result, join_pages_text(page_texts))):
+                upgrade_work = WorkTicket(tenant=work.tenant, priority=work.priority, backend=escalation, cost=work.cost)
+                await scheduler.acquire(upgrade_work)
+            (result, report), _ = await parse_flight.do(
+                flight_key(data, f"upgrade:{escalation}", work.tenant, deadline),
+                escalate_weak_sections, data, filename, local_result, escalation, deadline, page_texts
+            )
+            upgraded = transform_extracta_response(result)
+            ops = diff_cv(local_cv, upgraded.model_dump())
+            if ops:
+                await store_parsed_cv(data, upgraded, report["backend"])
+            logger.info(f"Progressive parse upgraded by {report['backend']}: {len(ops)} field changes")
+            yield sse_event("patch", {
+                "backend": report["backend"],
+                "escalated": report["escalated"],
+                "ops": ops,
+            })
+        except Exception as e:
+            logger.error(f"Progressive CV upgrade failed: {str(e)}", exc_info=True)
+            yield sse_event("error", {"detail": str(e)})
+        finally:
+            if upgrade_work is not None:
+                await scheduler.release(upgrade_work)
+        
+        yield sse_event("done", {})
+
+    return StreamingResponse(
+        events(),
+        media_type="text/event-stream",
+        # Disable proxy buffering (nginx) so the local event is delivered immediately
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no", **inspection.headers()},
+    )
 
 
 @app.post("/parse-cv-external", response_model=CVSchema)
-async def parse_cv_external(file: UploadFile = File(...)):
+async def parse_cv_external(
+    response: Response,
+    file: UploadFile = File(...),
+    x_request_timeout: Optional[str] = Header(None),
+    profile: Optional[ProfileRequest] = Depends(requested_profile),
+    work: WorkTicket = Depends(requested_work),
+):
     """
     Parse a CV PDF file using EXTERNAL APIs (DocParserAI, HrFlow, Extracta).
     
@@ -1083,9 +2096,13 @@ async def parse_cv_external(file: UploadFile = File(...)):
     2. Tries available external APIs automatically
     3. Transforms the response to CVSchema format
     4. Returns structured JSON that can be used to fill forms in the frontend
+    
+    All APIs tried share one deadline (`X-Request-Timeout` header in seconds, default
+    REQUEST_DEADLINE_SECONDS). If it expires, the local extraction is returned instead
+    with the `X-Deadline-Exceeded` header.
     """
     # Check if at least one API is configured
-    if not DOCPARSERAI_API_KEY and not NANONETS_API_KEY and not HRFLOW_API_KEY and not EXTRACTA_API_KEY:
+    if not external_api_configured():
         raise HTTPException(
             status_code=500,
             detail=(
@@ -1103,6 +2120,7 @@ async def parse_cv_external(file: UploadFile = File(...)):
     if file.content_type != "application/pdf":
         raise HTTPException(status_code=400, detail="Only PDF files are supported")
 
+    deadline = Deadline.from_header(x_request_timeout)
     data = await file.read()
     if len(data) > MAX_FILE_SIZE:
         raise HTTPException(
@@ -1110,18 +2128,24 @@ async def parse_cv_external(file: UploadFile = File(...)):
             detail=f"File too large. Maximum size is {MAX_FILE_SIZE / (1024 * 1024):.1f}MB"
         )
 
+    inspection = await admit_document(response, data, text_required=False, work=work, backend="external")
     try:
         logger.info("Using EXTERNAL Extracta API for extraction")
-        extracta_result = call_external_api(data, file.filename, api_name="auto")
+        # Extract, then transform the response to CVSchema format
+        cv_data = await run_pipeline(
+            flight_key(data, "external:auto", work.tenant, deadline), profile, response, transform_extracta_response,
+            run_external_pipeline, data, file.filename, deadline, work.tenant
+        )
         logger.info(f"Extracta API response received for file: {file.filename}")
         
-        # Transform response to CVSchema format
-        cv_data = transform_extracta_response(extracta_result)
-        
         logger.info(f"CV parsed successfully (external). Found {len(cv_data.experience)} experiences, {len(cv_data.education)} education entries")
         
+        set_near_duplicate_headers(response, data, "external", work.tenant)
+        await store_parsed_cv(data, cv_data, "external")
         return cv_data
         
+    except DeadlineExceeded as e:
+        return await local_fallback(response, data, e, work.tenant)
     except requests.exceptions.Timeout:
         logger.error("Extracta API timeout")
         raise HTTPException(
@@ -1161,6 +2185,8 @@ async def parse_cv_external(file: UploadFile = File(...)):
             status_code=500,
             detail=f"An error occurred while parsing the CV: {str(e)}"
         )
+    finally:
+        await release_document(inspection, work)
 
 
 @app.post("/test-nanonets")
@@ -1339,7 +2365,13 @@ async def test_docparserai_endpoint(file: UploadFile = File(...)):
 
 
 @app.post("/parse-cv-ollama", response_model=CVSchema)
-async def parse_cv_with_ollama_endpoint(file: UploadFile = File(...)):
+async def parse_cv_with_ollama_endpoint(
+    response: Response,
+    file: UploadFile = File(...),
+    x_request_timeout: Optional[str] = Header(None),
+    profile: Optional[ProfileRequest] = Depends(requested_profile),
+    work: WorkTicket = Depends(requested_work),
+):
     """
     Parse un CV PDF en utilisant Ollama (LLM local) pour extraire les informations.
     
@@ -1355,6 +2387,15 @@ async def parse_cv_with_ollama_endpoint(file: UploadFile = File(...)):
     - Variables d'environnement optionnelles:
       - OLLAMA_BASE_URL (défaut: http://localhost:11434)
       - OLLAMA_MODEL (défaut: llama3.2)
+      - OLLAMA_INPUT_TOKEN_BUDGET (défaut: 2000), OLLAMA_MIN_CTX / OLLAMA_MAX_CTX (défaut: 2048 / 8192)
+    
+    L'en-tête optionnel `X-Request-Timeout` (secondes, défaut REQUEST_DEADLINE_SECONDS) borne
+    l'OCR et les appels à Ollama. À l'échéance, le résultat de l'extraction locale est renvoyé
+    avec l'en-tête `X-Deadline-Exceeded`.
+    
+    Le texte est compacté (en-têtes/pieds de page répétés, numéros de page, césures)
+    et `num_ctx` est dimensionné sur le prompt. Les en-têtes X-Prompt-Tokens,
+    X-Completion-Tokens et X-Num-Ctx de la réponse indiquent la consommation réelle.
     
     **Avantages:**
     - Traitement local, pas besoin d'API externe
@@ -1369,6 +2410,7 @@ async def parse_cv_with_ollama_endpoint(file: UploadFile = File(...)):
     if file.content_type != "application/pdf":
         raise HTTPException(status_code=400, detail="Seuls les fichiers PDF sont supportés")
 
+    deadline = Deadline.from_header(x_request_timeout)
     data = await file.read()
     if len(data) > MAX_FILE_SIZE:
         raise HTTPException(
@@ -1376,23 +2418,16 @@ async def parse_cv_with_ollama_endpoint(file: UploadFile = File(...)):
             detail=f"Fichier trop volumineux. Taille maximale: {MAX_FILE_SIZE / (1024 * 1024):.1f}MB"
         )
 
+    inspection = await admit_document(response, data, work=work, backend="ollama")
     try:
-        # Étape 1: Extraire tout le texte du PDF
-        logger.info("Extraction du texte du PDF...")
-        pdf_text = extract_text_from_pdf(data)
-        
-        if not pdf_text or len(pdf_text.strip()) < 50:
-            raise HTTPException(
-                status_code=400,
-                detail="Le PDF ne contient pas assez de texte pour être analysé"
-            )
-        
-        # Étape 2: Utiliser Ollama pour extraire les informations structurées
-        logger.info("Analyse du CV avec Ollama...")
-        cv_data_dict = parse_cv_with_ollama(pdf_text)
-        
-        # Étape 3: Transformer en CVSchema
-        cv_data = transform_extracta_response(cv_data_dict)
+        # Étapes 1 et 2: extraction du texte puis analyse Ollama (partagées entre requêtes identiques),
+        # étape 3: transformation en CVSchema
+        cv_data, usage = await run_pipeline(
+            flight_key(data, f"ollama:{OLLAMA_MODEL}", work.tenant, deadline), profile, response,
+            lambda output: (transform_extracta_response(output[0]), output[1]),
+            run_ollama_pipeline, data, deadline, work.tenant
+        )
+        set_usage_headers(response, usage)
         
         logger.info(
             f"CV parsé avec succès via Ollama. "
@@ -1401,8 +2436,12 @@ async def parse_cv_with_ollama_endpoint(file: UploadFile = File(...)):
             f"{len(cv_data.skills.technical) + len(cv_data.skills.soft)} compétences"
         )
         
+        set_near_duplicate_headers(response, data, f"ollama:{OLLAMA_MODEL}", work.tenant)
+        await store_parsed_cv(data, cv_data, "ollama")
         return cv_data
         
+    except DeadlineExceeded as e:
+        return await local_fallback(response, data, e, work.tenant)
     except RuntimeError as e:
         error_msg = str(e)
         if "Impossible de se connecter" in error_msg:
@@ -1425,3 +2464,5 @@ async def parse_cv_with_ollama_endpoint(file: UploadFile = File(...)):
             status_code=500,
             detail=f"Une erreur est survenue lors du parsing du CV avec Ollama: {str(e)}"
         )
+    finally:
+        await release_document(inspection, work)
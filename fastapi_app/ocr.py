@@ -0,0 +1,243 @@
+"""
+OCR fallback for scanned CVs (pages without a text layer).
+
+Pages are rendered with pypdfium2 (already installed with pdfplumber) and
+recognised with Tesseract through the optional ``pytesseract`` package.
+Rendering + OCR run in a process pool, one page per task, and the result is
+cached by page hash so a re-uploaded scan is never OCRed twice. The page
+tasks share one spool file of the document (shared_buffers.py) instead of
+each pickling the whole upload. OCR workers run under the same memory
+and per-task CPU-time ceilings as the PDF workers (pdf_worker.py): a hostile
+scan fails its page, not the host.
+
+A page that cannot be recognised stays empty (``ocr_errors``) instead of
+failing the document; when Tesseract lacks a language of OCR_LANG (e.g. no
+``fra`` traineddata), pages are recognised with ``eng`` only.
+
+Benchmark (pages/sec per core):
+    python ocr.py <path_to_pdf_file> [max_workers]
+"""
+import logging
+import multiprocessing
+import os
+import sys
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor, wait
+from concurrent.futures.process import BrokenProcessPool
+from functools import lru_cache
+from typing import List, Optional, Tuple
+
+from page_cache import LRUCache
+from pdf_worker import _init_worker, run_task
+from shared_buffers import DocumentSource, SpooledDocument, shared_document
+
+try:
+    import pytesseract
+except ImportError:  # optional dependency
+    pytesseract = None
+
+logger = logging.getLogger("fastapi-cv-parser")
+
+OCR_ENABLED = os.getenv("OCR_ENABLED", "true").lower() == "true"
+OCR_DPI = int(os.getenv("OCR_DPI", "300"))
+OCR_LANG = os.getenv("OCR_LANG", "fra+eng")
+OCR_WORKERS = int(os.getenv("OCR_WORKERS", str(os.cpu_count() or 1)))
+OCR_CACHE_SIZE = int(os.getenv("OCR_CACHE_SIZE", "1024"))
+
+# Used when Tesseract cannot load OCR_LANG
+OCR_FALLBACK_LANG = "eng"
+
+# (page hash, dpi, lang) -> OCR text
+ocr_cache = LRUCache(OCR_CACHE_SIZE)
+
+_pool: Optional[ProcessPoolExecutor] = None
+_pool_lock = threading.Lock()
+
+
+@lru_cache(maxsize=1)
+def _tesseract_installed() -> bool:
+    try:
+        pytesseract.get_tesseract_version()
+        return True
+    except Exception:
+        return False
+
+
+def ocr_available() -> bool:
+    """True when OCR is enabled and pytesseract + the tesseract binary are usable."""
+    return OCR_ENABLED and pytesseract is not None and _tesseract_installed()
+
+
+def _new_pool(max_workers: int) -> ProcessPoolExecutor:
+    # "spawn": forking the threaded API process is unsafe; RLIMIT_AS and SIGXCPU as in the PDF workers
+    return ProcessPoolExecutor(
+        max_workers=max_workers,
+        mp_context=multiprocessing.get_context("spawn"),
+        initializer=_init_worker,
+    )
+
+
+def _get_pool() -> ProcessPoolExecutor:
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            _pool = _new_pool(OCR_WORKERS)
+        return _pool
+
+
+def _reset_pool() -> None:
+    """Drop a broken pool (worker killed): the next document gets a fresh one."""
+    global _pool
+    with _pool_lock:
+        pool, _pool = _pool, None
+    if pool is not None:
+        pool.shutdown(wait=False, cancel_futures=True)
+
+
+def ocr_page(file_data: DocumentSource, page_index: int, dpi: int = OCR_DPI, lang: str = OCR_LANG) -> str:
+    """
+    Render one PDF page at ``dpi`` and run Tesseract on it.
+
+    Executed inside a worker process: the document is opened in the worker so
+    only the raw bytes, or the path of its spool file, cross the process boundary.
+    """
+    import pypdfium2
+
+    pdf = pypdfium2.PdfDocument(file_data.path if isinstance(file_data, SpooledDocument) else file_data)
+    try:
+        page = pdf[page_index]
+        image = page.render(scale=dpi / 72).to_pil()
+        try:
+            return pytesseract.image_to_string(image, lang=lang)
+        except pytesseract.TesseractError as e:
+            if lang == OCR_FALLBACK_LANG:
+                raise
+            # Typically a missing traineddata file for one of the languages
+            logger.warning(f"Tesseract failed with lang={lang} ({e}), retrying with {OCR_FALLBACK_LANG}")
+            return pytesseract.image_to_string(image, lang=OCR_FALLBACK_LANG)
+    finally:
+        pdf.close()
+
+
+def _ocr_task(file_data: DocumentSource, page_index: int, dpi: int, lang: str) -> str:
+    """Pool task: ``ocr_page`` under the per-task CPU-time ceiling of the worker."""
+    if multiprocessing.parent_process() is None:  # not in a worker process
+        return ocr_page(file_data, page_index, dpi, lang)
+    return run_task(ocr_page, None, file_data, page_index, dpi, lang)[0]
+
+
+def ocr_missing_pages(
+    file_data: bytes,
+    page_hashes: List[str],
+    page_texts: List[str],
+    dpi: int = OCR_DPI,
+    lang: str = OCR_LANG,
+    timeout: Optional[float] = None,
+) -> Tuple[List[str], dict]:
+    """
+    Fill the pages that have no text layer with OCR output.
+
+    Pages that already have text are left untouched. Pages whose hash was
+    OCRed before are served from the cache; the others are rendered and
+    recognised in parallel in the process pool. Pages not recognised within
+    ``timeout`` seconds are cancelled and stay empty (counted in ``ocr_timeouts``),
+    as do pages whose OCR failed (``ocr_errors``, not cached).
+
+    Returns:
+        Tuple (page_texts, stats) with the completed texts and OCR counters.
+    """
+    texts = list(page_texts)
+    stats = {"ocr_pages": 0, "ocr_cache_hits": 0, "ocr_timeouts": 0, "ocr_errors": 0}
+    missing = []
+
+    for index, text in enumerate(texts):
+        if text.strip():
+            continue
+        cached = ocr_cache.get((page_hashes[index], dpi, lang))
+        if cached is not None:
+            texts[index] = cached
+            stats["ocr_cache_hits"] += 1
+        else:
+            missing.append(index)
+
+    pending = {}
+    not_done = set()
+    if missing:
+        with shared_document(file_data) as source:
+            for index in missing:
+                pending[index] = _get_pool().submit(_ocr_task, source, index, dpi, lang)
+            _, not_done = wait(pending.values(), timeout=timeout)
+            # Before the spool file goes away: pages not started yet never will
+            for future in not_done:
+                future.cancel()
+    for index, future in pending.items():
+        if future in not_done:
+            stats["ocr_timeouts"] += 1
+            continue
+        try:
+            text = future.result()
+        except Exception as e:
+            if isinstance(e, BrokenProcessPool):
+                _reset_pool()
+            logger.warning(f"OCR of page {index + 1} failed: {str(e)}")
+            stats["ocr_errors"] += 1
+            continue
+        ocr_cache.put((page_hashes[index], dpi, lang), text)
+        texts[index] = text
+        stats["ocr_pages"] += 1
+
+    if pending or stats["ocr_cache_hits"]:
+        logger.info(
+            f"OCR: {stats['ocr_pages']} pages recognised, {stats['ocr_cache_hits']} from cache, "
+            f"{stats['ocr_timeouts']} timed out, {stats['ocr_errors']} failed (dpi={dpi})"
+        )
+    return texts, stats
+
+
+def benchmark(file_data: bytes, max_workers: int, dpi: int = OCR_DPI) -> List[dict]:
+    """
+    OCR every page of ``file_data`` with 1..max_workers processes (powers of
+    two) and report throughput overall and per core. The cache is bypassed.
+    """
+    import pypdfium2
+
+    page_count = len(pypdfium2.PdfDocument(file_data))
+    results = []
+    workers = 1
+    while True:
+        with _new_pool(workers) as pool:
+            start = time.perf_counter()
+            list(pool.map(ocr_page, [file_data] * page_count, range(page_count), [dpi] * page_count))
+            elapsed = time.perf_counter() - start
+        pages_per_sec = page_count / elapsed
+        results.append({
+            "workers": workers,
+            "pages": page_count,
+            "seconds": round(elapsed, 3),
+            "pages_per_sec": round(pages_per_sec, 2),
+            "pages_per_sec_per_core": round(pages_per_sec / workers, 2),
+        })
+        if workers >= max_workers:
+            break
+        workers = min(workers * 2, max_workers)
+    return results
+
+
+if __name__ == "__main__":
+    if len(sys.argv) < 2:
+        print("Usage: python ocr.py <path_to_pdf_file> [max_workers]")
+        sys.exit(1)
+    if not ocr_available():
+        print("❌ OCR indisponible: installez pytesseract et le binaire tesseract (ou OCR_ENABLED=false)")
+        sys.exit(1)
+
+    with open(sys.argv[1], "rb") as f:
+        data = f.read()
+    max_workers = int(sys.argv[2]) if len(sys.argv) > 2 else OCR_WORKERS
+
+    for row in benchmark(data, max_workers):
+        print(
+            f"{row['workers']:>3} workers: {row['pages']} pages in {row['seconds']}s "
+            f"-> {row['pages_per_sec']} pages/s ({row['pages_per_sec_per_core']} pages/s/core)"
+        )
@@ -0,0 +1,170 @@
+import hashlib
+import os
+import threading
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Hashable, List, Optional, Tuple
+
+from pdfminer.psparser import PSKeyword, PSLiteral
+from pdfminer.pdftypes import PDFObjRef, PDFStream, resolve1
+
+# Number of pages / documents kept in memory (LRU eviction)
+PAGE_CACHE_SIZE = int(os.getenv("PAGE_CACHE_SIZE", "4096"))
+RESULT_CACHE_SIZE = int(os.getenv("RESULT_CACHE_SIZE", "512"))
+
+
+class LRUCache:
+    """
+    Small thread-safe LRU cache with hit/miss counters.
+
+    Values are returned as stored; callers that mutate them must copy first.
+    """
+
+    def __init__(self, max_size: int) -> None:
+        self.max_size = max_size
+        self._data: "OrderedDict[Hashable, Any]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key: Hashable) -> Optional[Any]:
+        with self._lock:
+            if key in self._data:
+                self._data.move_to_end(key)
+                self.hits += 1
+                return self._data[key]
+            self.misses += 1
+            return None
+
+    def put(self, key: Hashable, value: Any) -> None:
+        with self._lock:
+            self._data[key] = value
+            self._data.move_to_end(key)
+            while len(self._data) > self.max_size:
+                self._data.popitem(last=False)
+
+    def stats(self) -> dict:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "entries": len(self._data),
+                "max_size": self.max_size,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0,
+            }
+
+
+# (engine name, page hash) -> extracted page text ("" when the page has no text layer)
+page_text_cache = LRUCache(PAGE_CACHE_SIZE)
+# (engine name, disabled extractors, tuple of page hashes) -> local extraction result (dict from parse_pdf_locally)
+page_result_cache = LRUCache(RESULT_CACHE_SIZE)
+
+
+# Back-references that would walk the whole page tree from a resource
+_SKIPPED_KEYS = frozenset({"Parent", "P"})
+
+
+def _object_digest(obj: Any, memo: Dict[int, bytes]) -> bytes:
+    """
+    Digest of a PDF object and everything it references (streams by their
+    decoded data). ``memo`` caches indirect objects by id for one document,
+    so fonts and XObjects shared by several pages are hashed once; an object
+    met again while being hashed (reference cycle) stands for its id.
+    """
+    if isinstance(obj, PDFObjRef):
+        if obj.objid not in memo:
+            memo[obj.objid] = b"ref %d" % obj.objid
+            try:
+                memo[obj.objid] = _object_digest(obj.resolve(), memo)
+            except Exception:
+                pass  # unresolvable reference: the id stands for it
+        return memo[obj.objid]
+
+    digest = hashlib.sha256()
+    if isinstance(obj, PDFStream):
+        digest.update(b"stream")
+        digest.update(_object_digest(obj.attrs, memo))
+        digest.update(obj.get_data())
+    elif isinstance(obj, dict):
+        digest.update(b"dict")
+        for key in sorted(obj, key=str):
+            if key not in _SKIPPED_KEYS:
+                digest.update(str(key).encode() + b"\0")
+                digest.update(_object_digest(obj[key], memo))
+    elif isinstance(obj, (list, tuple)):
+        digest.update(b"array")
+        for item in obj:
+            digest.update(_object_digest(item, memo))
+    elif isinstance(obj, PSLiteral):
+        digest.update(b"/" + str(obj.name).encode())
+    elif isinstance(obj, PSKeyword):
+        digest.update(b"kw " + (obj.name if isinstance(obj.name, bytes) else str(obj.name).encode()))
+    else:
+        digest.update(repr(obj).encode())
+    return digest.digest()
+
+
+def page_hash(page, memo: Optional[Dict[int, bytes]] = None) -> str:
+    """
+    Fingerprint a pdfplumber page from its raw content streams, its
+    resources and its page box.
+
+    The resources (fonts, Form and image XObjects) are part of the hash: a
+    content stream such as ``q /Fm0 Do Q`` is the same in many documents, the
+    text lives in the Form XObject it draws. No layout analysis is done, so
+    hashing every page is much cheaper than extracting its text. An edited
+    page gets a new hash while untouched pages keep theirs, even if the rest
+    of the file (metadata, other pages) changed.
+
+    Args:
+        page: pdfplumber page
+        memo: Digests of the indirect objects already hashed in this document
+    """
+    memo = {} if memo is None else memo
+    digest = hashlib.sha256()
+    digest.update(repr(page.bbox).encode())
+    digest.update(str(page.rotation).encode())
+    for stream in page.page_obj.contents:
+        stream = resolve1(stream)
+        if hasattr(stream, "get_data"):
+            digest.update(stream.get_data())
+    digest.update(_object_digest(page.page_obj.resources or {}, memo))
+    return digest.hexdigest()
+
+
+def extract_pages_text(
+    engine: str,
+    page_hashes: List[str],
+    read_pages: Callable[[List[int]], Dict[int, str]],
+) -> Tuple[List[str], dict]:
+    """
+    Text of every page of a document: pages whose hash was already seen
+    with ``engine`` come from the cache, the others are read in one call.
+
+    Args:
+        engine: Engine name, part of the cache key
+        page_hashes: ``page_hash`` of every page
+        read_pages: ``read_pages(indexes) -> {index: text}`` for the cache
+                    misses (a PDF worker, pdf_worker.py)
+
+    Returns:
+        Tuple (page_texts, stats) where stats counts page cache hits and
+        misses for this document.
+    """
+    texts: List[Optional[str]] = [page_text_cache.get((engine, digest)) for digest in page_hashes]
+    missing = [index for index, text in enumerate(texts) if text is None]
+    if missing:
+        read = read_pages(missing)
+        for index in missing:
+            texts[index] = read[index]
+            page_text_cache.put((engine, page_hashes[index]), read[index])
+    stats = {"pages": len(texts), "page_hits": len(texts) - len(missing), "page_misses": len(missing)}
+    return texts, stats
+
+
+def cache_stats() -> dict:
+    """Per-page and per-document cache statistics (exposed by /stats/page-cache)."""
+    return {
+        "pages": page_text_cache.stats(),
+        "documents": page_result_cache.stats(),
+    }
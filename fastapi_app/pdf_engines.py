@@ -0,0 +1,265 @@
+"""
+Pluggable PDF text engines behind ``extract_text_from_pdf``.
+
+Every engine extracts the text of one page at a time from a document that is
+always opened with pdfplumber first: the pdfminer page objects give the page
+hashes (page_cache.py), the OCR keys and the document characteristics used
+by the automatic selection, whatever engine reads the text.
+
+- ``pdfplumber``: reference engine, the output the local extractors were
+  written against; the slowest
+- ``pdfminer``: pdfminer layout analysis with tuned ``LAParams`` (no
+  hierarchical box ordering), on the document pdfplumber already parsed
+- ``pdfium``: native PDFium text layer through pypdfium2 (installed with
+  pdfplumber)
+- ``pymupdf``: native MuPDF, if the optional ``pymupdf`` package is installed
+
+``PDF_ENGINE`` picks one engine per deployment (default ``pdfplumber``, the
+layout the contact, name and date extractors were tuned on), or, opt-in,
+``auto``: documents of at most PDF_ENGINE_FAST_PAGES pages and
+PDF_ENGINE_FAST_CONTENT_KB of content streams (a typical CV) keep the
+reference engine, larger ones go to the fastest available engine.
+
+Benchmark (throughput and word F1 against pdfplumber, or against a
+``<name>.txt`` ground truth next to each PDF):
+    python pdf_engines.py <corpus_dir> [repeat]
+"""
+import io
+import logging
+import os
+import re
+import sys
+import time
+from collections import Counter
+from contextlib import contextmanager
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Callable, Dict, Iterator, List
+
+import pdfplumber
+from pdfminer.converter import PDFPageAggregator
+from pdfminer.layout import LAParams, LTTextContainer
+from pdfminer.pdfinterp import PDFPageInterpreter
+from pdfminer.pdftypes import resolve1
+
+try:
+    import pypdfium2
+except ImportError:  # normally installed with pdfplumber
+    pypdfium2 = None
+
+try:
+    import pymupdf
+except ImportError:  # optional dependency
+    pymupdf = None
+
+logger = logging.getLogger("fastapi-cv-parser")
+
+# Name of a registered engine, or "auto" (opt-in fast path for large documents)
+PDF_ENGINE = os.getenv("PDF_ENGINE", "pdfplumber").strip().lower()
+PDF_ENGINE_FAST_PAGES = int(os.getenv("PDF_ENGINE_FAST_PAGES", "5"))
+PDF_ENGINE_FAST_CONTENT_KB = int(os.getenv("PDF_ENGINE_FAST_CONTENT_KB", "512"))
+
+REFERENCE_ENGINE = "pdfplumber"
+# Fast path used by "auto", first available wins
+FAST_ENGINES = ("pymupdf", "pdfium", "pdfminer")
+
+# Layout analysis without the hierarchical grouping of text boxes (boxes_flow=None),
+# which is quadratic in the number of boxes, and without vertical text detection
+TUNED_LAPARAMS = LAParams(line_margin=0.5, char_margin=2.0, word_margin=0.1, boxes_flow=None, detect_vertical=False)
+
+WORD_PATTERN = re.compile(r"\w+")
+
+# read_page(index) -> text of that page ("" when the page has no text layer)
+PageReader = Callable[[int], str]
+
+
+@dataclass
+class PdfEngine:
+    name: str
+    # open(file_data, pdf) -> context manager yielding a PageReader; file_data is
+    # the PDF bytes or the path of its spool file (shared_buffers.py)
+    open: Callable
+    available: Callable[[], bool] = lambda: True
+
+
+PDF_ENGINES: Dict[str, PdfEngine] = {}
+
+
+def register_engine(name: str, available: Callable[[], bool] = lambda: True):
+    """Decorator registering a ``(file_data, pdf) -> PageReader`` context manager under ``name``."""
+    def decorator(func):
+        PDF_ENGINES[name] = PdfEngine(name=name, open=contextmanager(func), available=available)
+        return func
+    return decorator
+
+
+@register_engine("pdfplumber")
+def _pdfplumber_pages(file_data: bytes, pdf) -> Iterator[PageReader]:
+    yield lambda index: pdf.pages[index].extract_text() or ""
+
+
+@register_engine("pdfminer")
+def _pdfminer_pages(file_data: bytes, pdf) -> Iterator[PageReader]:
+    device = PDFPageAggregator(pdf.rsrcmgr, laparams=TUNED_LAPARAMS)
+    interpreter = PDFPageInterpreter(pdf.rsrcmgr, device)
+
+    def read_page(index: int) -> str:
+        interpreter.process_page(pdf.pages[index].page_obj)
+        layout = device.get_result()
+        return "".join(item.get_text() for item in layout if isinstance(item, LTTextContainer)).strip()
+
+    yield read_page
+
+
+@register_engine("pdfium", available=lambda: pypdfium2 is not None)
+def _pdfium_pages(file_data: bytes, pdf) -> Iterator[PageReader]:
+    document = None
+
+    def read_page(index: int) -> str:
+        nonlocal document
+        if document is None:
+            # Opened on the first page-cache miss only
+            document = pypdfium2.PdfDocument(file_data)
+        page = document[index]
+        textpage = page.get_textpage()
+        try:
+            return textpage.get_text_range().replace("\r\n", "\n").strip()
+        finally:
+            textpage.close()
+            page.close()
+
+    try:
+        yield read_page
+    finally:
+        if document is not None:
+            document.close()
+
+
+@register_engine("pymupdf", available=lambda: pymupdf is not None)
+def _pymupdf_pages(file_data: bytes, pdf) -> Iterator[PageReader]:
+    if isinstance(file_data, str):
+        document = pymupdf.open(file_data, filetype="pdf")
+    else:
+        document = pymupdf.open(stream=file_data, filetype="pdf")
+    try:
+        yield lambda index: document.load_page(index).get_text("text").strip()
+    finally:
+        document.close()
+
+
+def available_engines() -> List[str]:
+    return [name for name, engine in PDF_ENGINES.items() if engine.available()]
+
+
+def content_size(pdf) -> int:
+    """Total (compressed) size of the page content streams, in bytes."""
+    total = 0
+    for page in pdf.pages:
+        for stream in page.page_obj.contents:
+            stream = resolve1(stream)
+            if hasattr(stream, "attrs"):
+                total += resolve1(stream.attrs.get("Length", 0)) or 0
+    return total
+
+
+def select_engine(pdf, name: str = PDF_ENGINE) -> PdfEngine:
+    """
+    Engine for an open pdfplumber document: ``name`` when registered and
+    available, else the reference engine; ``auto`` decides from the page
+    count and content stream size.
+    """
+    if name != "auto":
+        engine = PDF_ENGINES.get(name)
+        if engine is not None and engine.available():
+            return engine
+        logger.warning(f"PDF engine '{name}' unavailable, using {REFERENCE_ENGINE}")
+        return PDF_ENGINES[REFERENCE_ENGINE]
+
+    if len(pdf.pages) <= PDF_ENGINE_FAST_PAGES and content_size(pdf) <= PDF_ENGINE_FAST_CONTENT_KB * 1024:
+        return PDF_ENGINES[REFERENCE_ENGINE]
+    for fast in FAST_ENGINES:
+        if PDF_ENGINES[fast].available():
+            return PDF_ENGINES[fast]
+    return PDF_ENGINES[REFERENCE_ENGINE]
+
+
+def word_f1(text: str, reference: str) -> float:
+    """Bag-of-words F1 of ``text`` against ``reference`` (case-insensitive), 1.0 when both are empty."""
+    words = Counter(WORD_PATTERN.findall(text.lower()))
+    expected = Counter(WORD_PATTERN.findall(reference.lower()))
+    common = sum((words & expected).values())
+    if not words and not expected:
+        return 1.0
+    if not common:
+        return 0.0
+    precision = common / sum(words.values())
+    recall = common / sum(expected.values())
+    return round(2 * precision * recall / (precision + recall), 4)
+
+
+def extract_with(engine: PdfEngine, file_data: bytes) -> List[str]:
+    """Text of every page with ``engine``, bypassing the page cache."""
+    with pdfplumber.open(io.BytesIO(file_data)) as pdf:
+        with engine.open(file_data, pdf) as read_page:
+            return [read_page(index) for index in range(len(pdf.pages))]
+
+
+def benchmark(corpus: List[Path], repeat: int = 1) -> List[dict]:
+    """
+    Run every available engine over the same corpus and report pages/s and
+    the mean word F1 against the ``.txt`` ground truth of each PDF (the
+    pdfplumber text when there is none).
+    """
+    documents = [(path, path.read_bytes()) for path in corpus]
+    references = {}
+    for path, data in documents:
+        truth = path.with_suffix(".txt")
+        references[path] = (
+            truth.read_text(encoding="utf-8") if truth.exists()
+            else "\n".join(extract_with(PDF_ENGINES[REFERENCE_ENGINE], data))
+        )
+
+    results = []
+    for name in available_engines():
+        engine = PDF_ENGINES[name]
+        pages, scores, failures = 0, [], 0
+        start = time.perf_counter()
+        for _ in range(repeat):
+            for path, data in documents:
+                try:
+                    texts = extract_with(engine, data)
+                except Exception as e:
+                    failures += 1
+                    logger.warning(f"{name} failed on {path.name}: {str(e)}")
+                    continue
+                pages += len(texts)
+                scores.append(word_f1("\n".join(texts), references[path]))
+        elapsed = time.perf_counter() - start
+        results.append({
+            "engine": name,
+            "documents": len(documents),
+            "pages": pages // repeat,
+            "failures": failures // repeat,
+            "seconds": round(elapsed / repeat, 3),
+            "pages_per_sec": round(pages / elapsed, 2) if elapsed else 0.0,
+            "word_f1": round(sum(scores) / len(scores), 4) if scores else 0.0,
+        })
+    return results
+
+
+if __name__ == "__main__":
+    if len(sys.argv) < 2:
+        print("Usage: python pdf_engines.py <corpus_dir> [repeat]")
+        sys.exit(1)
+
+    corpus_files = sorted(Path(sys.argv[1]).glob("*.pdf"))
+    if not corpus_files:
+        print(f"❌ Aucun PDF dans {sys.argv[1]}")
+        sys.exit(1)
+    logging.getLogger("pdfminer").setLevel(logging.ERROR)
+
+    for row in benchmark(corpus_files, int(sys.argv[2]) if len(sys.argv) > 2 else 1):
+        print(
+            f"{row['engine']:>10}: {row['pages']} pages in {row['seconds']}s -> {row['pages_per_sec']} pages/s, "
+            f"word F1 {row['word_f1']}, {row['failures']} failures"
+        )
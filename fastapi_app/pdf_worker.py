@@ -0,0 +1,622 @@
+"""
+Isolated pdfplumber/pdfminer processing with memory and CPU ceilings.
+
+pdfminer keeps per-page layout objects and caches alive as long as the
+document is open; a large or adversarial PDF can blow up the RSS of the
+long-lived uvicorn process. Text extraction therefore runs in a small pool
+of worker processes:
+
+- every page is closed (layout caches flushed) as soon as it is hashed or
+  its text is read
+- each document gets an address-space ceiling (PDF_WORKER_MEMORY_MB) and a
+  CPU-time ceiling (PDF_WORKER_CPU_SECONDS); exceeding them fails that
+  document only, with ``PdfLimitExceeded``
+- workers are recycled after PDF_WORKER_MAX_DOCUMENTS documents, or as soon
+  as one of them ends a document above PDF_WORKER_RECYCLE_RSS_MB
+- the peak RSS and CPU time of every document are returned in its stats
+- workers are warm: each one imports the PDF engines and extracts a small
+  built-in document in its initializer, the pool is started with the API
+  (and again after every recycle, PDF_WORKER_PRESTART), and idle workers are
+  pinged every PDF_WORKER_HEALTH_SECONDS (a pool that does not answer within
+  PDF_WORKER_HEALTH_TIMEOUT is recycled); a document therefore only pays its
+  own work time, reported per worker by ``PdfWorkerPool.stats``
+
+Uploads reach the workers through spool files in shared memory rather
+than pickled bytes (shared_buffers.py).
+
+A document takes two tasks: ``prepare_document`` picks the engine and
+hashes the pages, then ``extract_pages`` reads only the pages missing from
+the page text cache (page_cache.py), which stays in the API process: it is
+shared by all workers, survives recycling and its counters are the API's.
+Both tasks check the request deadline between pages, and a task still queued
+when the deadline expires is cancelled. While a request is profiled
+(profiling.py) its tasks run under the same profiler in the worker.
+
+PDF_WORKERS=0 keeps the extraction in the API process (no isolation).
+"""
+import logging
+import multiprocessing
+import os
+import re
+import signal
+import threading
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor, wait
+from contextlib import contextmanager
+from concurrent.futures import TimeoutError as FuturesTimeoutError
+from concurrent.futures.process import BrokenProcessPool
+from typing import Any, Callable, Dict, Iterator, List, Optional, Tuple
+
+import pdfplumber
+
+from admission import PdfInspection, inspect_pdf
+from deadline import DeadlineExceeded
+from page_cache import extract_pages_text, page_hash
+from pdf_engines import PDF_ENGINE, PDF_ENGINES, available_engines, select_engine
+from profiling import active_profile, add_worker_profile, run_profiled
+from shared_buffers import DocumentSource, attach, shared_buffers, shared_document
+
+try:
+    import resource
+except ImportError:  # Windows: no per-process limits
+    resource = None
+
+logger = logging.getLogger("fastapi-cv-parser")
+
+PDF_WORKERS = int(os.getenv("PDF_WORKERS", "2"))
+PDF_WORKER_MEMORY_MB = int(os.getenv("PDF_WORKER_MEMORY_MB", "1536"))
+PDF_WORKER_CPU_SECONDS = int(os.getenv("PDF_WORKER_CPU_SECONDS", "30"))
+PDF_WORKER_MAX_DOCUMENTS = int(os.getenv("PDF_WORKER_MAX_DOCUMENTS", "200"))
+PDF_WORKER_RECYCLE_RSS_MB = int(os.getenv("PDF_WORKER_RECYCLE_RSS_MB", "512"))
+PDF_WORKER_PRESTART = os.getenv("PDF_WORKER_PRESTART", "true").lower() == "true"
+# Health pings count as tasks towards PDF_WORKER_MAX_DOCUMENTS
+PDF_WORKER_HEALTH_SECONDS = float(os.getenv("PDF_WORKER_HEALTH_SECONDS", "60"))
+PDF_WORKER_HEALTH_TIMEOUT = float(os.getenv("PDF_WORKER_HEALTH_TIMEOUT", "10"))
+
+_RSS_PATTERN = re.compile(r"^(VmRSS|VmHWM):\s+(\d+) kB", re.MULTILINE)
+
+
+class PdfLimitExceeded(RuntimeError):
+    """The document exceeded the memory or CPU-time ceiling of a PDF worker."""
+
+
+def _memory_kb() -> dict:
+    """Current (VmRSS) and peak (VmHWM) resident memory of this process, in kB (Linux only)."""
+    try:
+        with open("/proc/self/status") as status:
+            return {name: int(value) for name, value in _RSS_PATTERN.findall(status.read())}
+    except OSError:
+        return {}
+
+
+def _reset_peak_rss() -> bool:
+    """Reset VmHWM so the next reading is the peak of the current document (Linux >= 4.0)."""
+    try:
+        with open("/proc/self/clear_refs", "w") as clear_refs:
+            clear_refs.write("5")
+        return True
+    except OSError:
+        return False
+
+
+def _on_cpu_limit(signum, frame) -> None:
+    raise PdfLimitExceeded(f"CPU time ceiling of {PDF_WORKER_CPU_SECONDS}s exceeded")
+
+
+# Time the initializer of this worker spent warming up (ms), reported by _ping
+_warm_ms: Optional[float] = None
+
+
+def _warmup_pdf() -> bytes:
+    """A one-page text PDF, enough to load pdfminer's fonts, parsers and layout code."""
+    content = b"BT /F1 11 Tf 50 780 Td (Warm up) Tj ET"
+    objects = [
+        b"<< /Type /Catalog /Pages 2 0 R >>",
+        b"<< /Type /Pages /Kids [4 0 R] /Count 1 >>",
+        b"<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica >>",
+        b"<< /Type /Page /Parent 2 0 R /MediaBox [0 0 612 842] /Resources << /Font << /F1 3 0 R >> >> /Contents 5 0 R >>",
+        b"<< /Length %d >>\nstream\n%s\nendstream" % (len(content), content),
+    ]
+    out = b"%PDF-1.4\n"
+    offsets = []
+    for number, body in enumerate(objects, 1):
+        offsets.append(len(out))
+        out += b"%d 0 obj\n%s\nendobj\n" % (number, body)
+    xref = len(out)
+    out += b"xref\n0 %d\n0000000000 65535 f \n" % (len(objects) + 1)
+    out += b"".join(b"%010d 00000 n \n" % offset for offset in offsets)
+    return out + b"trailer\n<< /Size %d /Root 1 0 R >>\nstartxref\n%d\n%%%%EOF" % (len(objects) + 1, xref)
+
+
+def _warm_up() -> None:
+    """Run every available engine once, so the first real document pays no import or first-use cost."""
+    global _warm_ms
+    start = time.perf_counter()
+    document = _warmup_pdf()
+    for name in available_engines():
+        try:
+            extract_document(document, name)
+        except Exception as e:
+            logger.warning(f"PDF worker warm-up with {name} failed: {e}")
+    _warm_ms = round((time.perf_counter() - start) * 1000, 1)
+
+
+def _init_worker() -> None:
+    if resource is not None:
+        limit = PDF_WORKER_MEMORY_MB * 1024 * 1024
+        _, hard = resource.getrlimit(resource.RLIMIT_AS)
+        resource.setrlimit(resource.RLIMIT_AS, (limit, hard if hard != resource.RLIM_INFINITY else limit))
+        signal.signal(signal.SIGXCPU, _on_cpu_limit)
+    _warm_up()
+
+
+def _ping() -> Tuple[int, Optional[float]]:
+    """Health check and start-up task: (pid, warm-up ms) of the worker that ran it."""
+    return os.getpid(), _warm_ms
+
+
+def _cpu_seconds() -> float:
+    usage = resource.getrusage(resource.RUSAGE_SELF)
+    return usage.ru_utime + usage.ru_stime
+
+
+def _check_deadline(expires_at: Optional[float]) -> None:
+    if expires_at is not None and time.time() > expires_at:
+        raise DeadlineExceeded("PDF extraction")
+
+
+def prepare_document(
+    file_data: DocumentSource,
+    engine_name: str = PDF_ENGINE,
+    expires_at: Optional[float] = None,
+) -> Tuple[str, List[str]]:
+    """
+    Select the text engine for a PDF (pdf_engines.py) and hash its pages.
+
+    Args:
+        file_data: PDF bytes or, from the pool, the handle of its spool file
+        engine_name: PDF_ENGINE setting (``auto`` or an engine name)
+        expires_at: Wall-clock expiry of the request, checked between pages
+
+    Returns:
+        Tuple (engine, page_hashes)
+    """
+    with attach(file_data) as (stream, _), pdfplumber.open(stream) as pdf:
+        engine = select_engine(pdf, engine_name)
+        hashes: List[str] = []
+        memo: Dict[int, bytes] = {}
+        for page in pdf.pages:
+            _check_deadline(expires_at)
+            hashes.append(page_hash(page, memo))
+            page.close()
+    return engine.name, hashes
+
+
+def extract_pages(
+    file_data: DocumentSource,
+    engine_name: str,
+    indexes: List[int],
+    expires_at: Optional[float] = None,
+) -> Dict[int, str]:
+    """
+    Text of the pages ``indexes`` of a PDF with the engine ``engine_name``,
+    releasing each page's layout objects as soon as its text is read.
+
+    Raises:
+        DeadlineExceeded: ``expires_at`` passed before every page was read
+    """
+    with attach(file_data) as (stream, data), pdfplumber.open(stream) as pdf:
+        with PDF_ENGINES[engine_name].open(data, pdf) as read_page:
+            texts: Dict[int, str] = {}
+            for index in indexes:
+                _check_deadline(expires_at)
+                texts[index] = read_page(index)
+                pdf.pages[index].close()
+    return texts
+
+
+def inspect_document(file_data: DocumentSource, ocr: bool = True) -> PdfInspection:
+    """``admission.inspect_pdf`` of a document source (the pre-inspection, in a worker)."""
+    with attach(file_data) as (stream, data):
+        return inspect_pdf(data if isinstance(data, bytes) else stream, ocr)
+
+
+def extract_document(file_data: DocumentSource, engine_name: str = PDF_ENGINE) -> Tuple[List[str], List[str], dict]:
+    """
+    Per-page hashes and text of a PDF in the current process, bypassing the
+    page cache (worker warm-up, benchmarks).
+
+    Returns:
+        Tuple (page_hashes, page_texts, stats)
+    """
+    engine, hashes = prepare_document(file_data, engine_name)
+    texts = extract_pages(file_data, engine, list(range(len(hashes))))
+    return hashes, [texts[index] for index in range(len(hashes))], {"pages": len(hashes), "engine": engine}
+
+
+def run_task(func: Callable, profile: Optional[Tuple[str, float]], *args: Any) -> Tuple[Any, dict, Any]:
+    """
+    Worker side of every document task: run ``func(*args)`` under the
+    per-document CPU-time ceiling, measuring it, and under the profiler when
+    ``profile`` is ``(mode, interval_ms)`` of a profiled request.
+
+    Returns:
+        Tuple (result, measures, profile payload): measures hold ``work_ms``,
+        ``worker_pid``, ``warm_ms`` (warm-up time of that worker),
+        ``rss_mb``, ``peak_rss_mb`` and ``cpu_seconds``
+
+    Raises:
+        PdfLimitExceeded: the task exceeded the memory or CPU-time ceiling
+    """
+    work_start = time.perf_counter()
+    measured = _reset_peak_rss()
+    cpu_start = _cpu_seconds() if resource is not None else 0.0
+    if resource is not None:
+        # RLIMIT_CPU counts the whole process lifetime: allow this task PDF_WORKER_CPU_SECONDS more
+        _, hard = resource.getrlimit(resource.RLIMIT_CPU)
+        resource.setrlimit(resource.RLIMIT_CPU, (int(cpu_start) + 1 + PDF_WORKER_CPU_SECONDS, hard))
+
+    payload = None
+    try:
+        if profile is None:
+            result = func(*args)
+        else:
+            result, payload = run_profiled(profile[0], profile[1], func, *args)
+    except MemoryError:
+        raise PdfLimitExceeded(f"Memory ceiling of {PDF_WORKER_MEMORY_MB}MB exceeded")
+    finally:
+        if resource is not None:
+            _, hard = resource.getrlimit(resource.RLIMIT_CPU)
+            resource.setrlimit(resource.RLIMIT_CPU, (hard, hard))
+
+    memory = _memory_kb()
+    measures = {
+        "work_ms": round((time.perf_counter() - work_start) * 1000, 1),
+        "worker_pid": os.getpid(),
+        "warm_ms": _warm_ms,
+        "rss_mb": round(memory.get("VmRSS", 0) / 1024, 1),
+        "peak_rss_mb": round(memory.get("VmHWM", 0) / 1024, 1) if measured else None,
+    }
+    if resource is not None:
+        measures["cpu_seconds"] = round(_cpu_seconds() - cpu_start, 3)
+    return result, measures, payload
+
+
+def _merge_measures(stats: dict, measures: dict) -> None:
+    """Add the measures of one task to the stats of its document."""
+    stats["work_ms"] = round(stats.get("work_ms", 0.0) + measures["work_ms"], 1)
+    stats["worker_pid"] = measures["worker_pid"]
+    stats["warm_ms"] = measures["warm_ms"]
+    stats["rss_mb"] = measures["rss_mb"]
+    if measures["peak_rss_mb"] is not None:
+        stats["peak_rss_mb"] = max(stats.get("peak_rss_mb") or 0.0, measures["peak_rss_mb"])
+    else:
+        stats.setdefault("peak_rss_mb", None)
+    if "cpu_seconds" in measures:
+        stats["cpu_seconds"] = round(stats.get("cpu_seconds", 0.0) + measures["cpu_seconds"], 3)
+
+
+class PdfWorkerPool:
+    """Warm process pool for PDF text extraction with health checks and document- and memory-based recycling."""
+
+    def __init__(self, workers: int = PDF_WORKERS) -> None:
+        self.workers = workers
+        self._executor: Optional[ProcessPoolExecutor] = None
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._health_thread: Optional[threading.Thread] = None
+        self.started = False
+        self.in_flight = 0
+        self.documents = 0
+        self.recycles = 0
+        self.failures = 0
+        self.recent = deque(maxlen=100)
+        # pid -> throughput of that worker (its warm-up, documents, pages, work and overhead time)
+        self.per_worker: Dict[int, dict] = {}
+        self.last_health: Optional[dict] = None
+
+    def _get_executor(self) -> ProcessPoolExecutor:
+        with self._lock:
+            if self._executor is None:
+                self._executor = ProcessPoolExecutor(
+                    max_workers=self.workers,
+                    # "spawn": forking a threaded server is unsafe; also required by max_tasks_per_child
+                    mp_context=multiprocessing.get_context("spawn"),
+                    initializer=_init_worker,
+                    max_tasks_per_child=PDF_WORKER_MAX_DOCUMENTS or None,
+                )
+            return self._executor
+
+    def _worker(self, pid: int) -> dict:
+        worker = self.per_worker.get(pid)
+        if worker is None:
+            worker = self.per_worker[pid] = {"warm_ms": None, "documents": 0, "pages": 0, "work_ms": 0.0, "overhead_ms": 0.0}
+            # Keep the workers of the last few recycles only
+            while len(self.per_worker) > 4 * max(self.workers, 1):
+                del self.per_worker[next(iter(self.per_worker))]
+        return worker
+
+    def _ping_all(self, timeout: float) -> List[int]:
+        """
+        One ``_ping`` per worker slot, sent together so an idle pool spawns (or
+        uses) every worker; returns the pids that answered.
+
+        Raises:
+            BrokenProcessPool, concurrent.futures.TimeoutError: the pool is not healthy
+        """
+        executor = self._get_executor()
+        futures = [executor.submit(_ping) for _ in range(self.workers)]
+        done, not_done = wait(futures, timeout=timeout)
+        if not_done:
+            raise FuturesTimeoutError(f"{len(not_done)} of {self.workers} PDF workers did not answer in {timeout}s")
+        pids = []
+        for future in done:
+            pid, warm_ms = future.result()
+            with self._lock:
+                self._worker(pid)["warm_ms"] = warm_ms
+            pids.append(pid)
+        return pids
+
+    def _prestart(self) -> None:
+        started = time.perf_counter()
+        try:
+            pids = self._ping_all(PDF_WORKER_HEALTH_TIMEOUT + 60)
+        except Exception as e:
+            logger.warning(f"PDF workers failed to start: {e}")
+            return
+        logger.info(
+            f"PDF workers ready: {len(set(pids))} warm processes in {(time.perf_counter() - started) * 1000:.0f}ms"
+        )
+
+    def start(self) -> None:
+        """Spawn and warm up every worker now, and start the health checks (API start-up)."""
+        if self.workers <= 0:
+            return
+        self.started = True
+        if PDF_WORKER_PRESTART:
+            self._prestart()
+        if PDF_WORKER_HEALTH_SECONDS > 0 and self._health_thread is None:
+            self._stop.clear()
+            self._health_thread = threading.Thread(target=self._health_loop, name="pdf-worker-health", daemon=True)
+            self._health_thread.start()
+
+    def stop(self) -> None:
+        """Stop the health checks and the workers (API shutdown)."""
+        self._stop.set()
+        self._health_thread = None
+        self.started = False
+        self.recycle("shutdown", prestart=False)
+
+    def check_health(self) -> bool:
+        """Ping the workers of an idle pool; recycle the pool when they do not all answer in time."""
+        if self.workers <= 0 or self._executor is None or self.in_flight:
+            return True  # busy workers answer through their documents
+        started = time.perf_counter()
+        try:
+            pids = self._ping_all(PDF_WORKER_HEALTH_TIMEOUT)
+        except FuturesTimeoutError:
+            if self.in_flight:
+                return True  # documents arrived meanwhile and the pings queued behind them
+            return self._unhealthy("no answer within PDF_WORKER_HEALTH_TIMEOUT")
+        except Exception as e:
+            return self._unhealthy(str(e))
+        self.last_health = {
+            "ok": True,
+            "at": time.time(),
+            "ms": round((time.perf_counter() - started) * 1000, 1),
+            "pids": sorted(set(pids)),
+        }
+        return True
+
+    def _unhealthy(self, error: str) -> bool:
+        self.last_health = {"ok": False, "at": time.time(), "error": error}
+        self.failures += 1
+        self.recycle(f"health check failed: {error}", terminate=True)
+        return False
+
+    def _health_loop(self) -> None:
+        while not self._stop.wait(PDF_WORKER_HEALTH_SECONDS):
+            self.check_health()
+
+    def recycle(
+        self,
+        reason: str,
+        executor: Optional[ProcessPoolExecutor] = None,
+        prestart: bool = True,
+        terminate: bool = False,
+    ) -> None:
+        """
+        Replace the workers; documents in flight finish in the old processes,
+        unless ``terminate`` (hung workers of an idle pool) kills them.
+        """
+        with self._lock:
+            if self._executor is None or (executor is not None and executor is not self._executor):
+                return
+            old, self._executor = self._executor, None
+            self.recycles += 1
+        logger.info(f"Recycling PDF workers: {reason}")
+        if terminate:
+            for process in list((old._processes or {}).values()):
+                process.terminate()
+        old.shutdown(wait=False)
+        if prestart and PDF_WORKER_PRESTART and self.started:
+            # Warm the replacements in the background rather than in the next document's time
+            threading.Thread(target=self._prestart, name="pdf-worker-prestart", daemon=True).start()
+
+    @contextmanager
+    def _document(self, executor: ProcessPoolExecutor) -> Iterator[None]:
+        """Count a document in flight; recycle the pool when the document kills or exceeds a worker."""
+        with self._lock:
+            self.in_flight += 1
+        try:
+            yield
+        except BrokenProcessPool:
+            # Killed by the OOM killer or a hard limit: the whole pool is unusable
+            self.failures += 1
+            self.recycle("worker process died", executor)
+            raise PdfLimitExceeded("PDF worker process died while processing the document")
+        except PdfLimitExceeded:
+            self.failures += 1
+            self.recycle("document exceeded a worker ceiling", executor)
+            raise
+        except DeadlineExceeded as e:
+            # Expired while the worker was between two pages
+            raise FuturesTimeoutError(str(e))
+        finally:
+            with self._lock:
+                self.in_flight -= 1
+
+    def _run(self, executor: ProcessPoolExecutor, expires_at: Optional[float], func: Callable, *args: Any) -> Tuple[Any, dict]:
+        """
+        Run one document task in a worker, waiting at most until ``expires_at``.
+
+        Raises:
+            concurrent.futures.TimeoutError: the deadline expired; the task is
+                cancelled if still queued, or stops at its next page otherwise
+        """
+        request = active_profile()
+        profile = None if request is None else (request.mode, request.interval_ms)
+        future = executor.submit(run_task, func, profile, *args)
+        try:
+            result, measures, payload = future.result(
+                timeout=None if expires_at is None else max(0.0, expires_at - time.time())
+            )
+        except FuturesTimeoutError:
+            future.cancel()
+            raise
+        if payload is not None:
+            add_worker_profile(payload)
+        return result, measures
+
+    def _extract_in_process(self, file_data: bytes, expires_at: Optional[float], engine: str) -> Tuple[List[str], List[str], dict]:
+        # Already in a worker process (bulk_parse.py): keep the per-document ceilings
+        isolated = multiprocessing.parent_process() is not None
+
+        def run(func: Callable, *args: Any) -> Any:
+            return run_task(func, None, *args)[0] if isolated else func(*args)
+
+        try:
+            engine, hashes = run(prepare_document, file_data, engine, expires_at)
+            texts, stats = extract_pages_text(
+                engine, hashes, lambda indexes: run(extract_pages, file_data, engine, indexes, expires_at)
+            )
+        except DeadlineExceeded as e:
+            raise FuturesTimeoutError(str(e))
+        stats["engine"] = engine
+        return hashes, texts, stats
+
+    def extract(
+        self,
+        file_data: bytes,
+        timeout: Optional[float] = None,
+        engine: str = PDF_ENGINE,
+    ) -> Tuple[List[str], List[str], dict]:
+        """
+        Per-page hashes and text of a PDF, hashed and read in a worker
+        (in-process when PDF_WORKERS=0); only the pages missing from the page
+        text cache are read.
+
+        The upload is handed over through a spool file, unlinked as soon as
+        the results arrive or the wait ends (timeout, worker failure).
+
+        Returns:
+            Tuple (page_hashes, page_texts, stats); stats count the pages and
+            page cache hits/misses and name the ``engine``; from a worker
+            they also hold ``work_ms``, ``worker_pid``, ``warm_ms``,
+            ``rss_mb``, ``peak_rss_mb`` and ``cpu_seconds``
+
+        Raises:
+            concurrent.futures.TimeoutError: ``timeout`` expired
+            PdfLimitExceeded: the document exceeded a worker ceiling
+        """
+        expires_at = None if timeout is None else time.time() + timeout
+        if self.workers <= 0:
+            return self._extract_in_process(file_data, expires_at, engine)
+
+        executor = self._get_executor()
+        start = time.perf_counter()
+        measured: dict = {}
+        with self._document(executor), shared_document(file_data) as source:
+            (engine, hashes), measures = self._run(executor, expires_at, prepare_document, source, engine, expires_at)
+            _merge_measures(measured, measures)
+
+            def read_pages(indexes: List[int]) -> Dict[int, str]:
+                pages, measures = self._run(executor, expires_at, extract_pages, source, engine, indexes, expires_at)
+                _merge_measures(measured, measures)
+                return pages
+
+            texts, stats = extract_pages_text(engine, hashes, read_pages)
+
+        stats["engine"] = engine
+        stats.update(measured)
+        ms = round((time.perf_counter() - start) * 1000, 1)
+        with self._lock:
+            self.documents += 1
+            worker = self._worker(stats["worker_pid"])
+            worker["warm_ms"] = stats.get("warm_ms")
+            worker["documents"] += 1
+            worker["pages"] += stats["pages"]
+            worker["work_ms"] += stats["work_ms"]
+            # Hand-off, queueing and result transfer: what a warm pool keeps close to zero
+            worker["overhead_ms"] += max(0.0, ms - stats["work_ms"])
+        self.recent.append({
+            "pages": stats["pages"],
+            "page_hits": stats["page_hits"],
+            "engine": stats["engine"],
+            "peak_rss_mb": stats.get("peak_rss_mb"),
+            "cpu_seconds": stats.get("cpu_seconds"),
+            "work_ms": stats["work_ms"],
+            "ms": ms,
+        })
+        if PDF_WORKER_RECYCLE_RSS_MB and stats.get("rss_mb", 0) > PDF_WORKER_RECYCLE_RSS_MB:
+            self.recycle(f"worker {stats['worker_pid']} at {stats['rss_mb']}MB RSS", executor)
+        return hashes, texts, stats
+
+    def inspect(self, file_data: bytes, ocr: bool = True, timeout: Optional[float] = None) -> PdfInspection:
+        """
+        Admission pre-inspection (``admission.inspect_pdf``) in a worker
+        (in-process when PDF_WORKERS=0): a hostile PDF structure hits the
+        worker ceilings, not the API process.
+
+        Raises:
+            concurrent.futures.TimeoutError: ``timeout`` expired
+            PdfLimitExceeded: the structure exceeded a worker ceiling
+        """
+        if self.workers <= 0:
+            return inspect_pdf(file_data, ocr)
+        executor = self._get_executor()
+        expires_at = None if timeout is None else time.time() + timeout
+        with self._document(executor), shared_document(file_data) as source:
+            inspection, _ = self._run(executor, expires_at, inspect_document, source, ocr)
+        return inspection
+
+    def stats(self) -> dict:
+        peaks = [item["peak_rss_mb"] for item in self.recent if item["peak_rss_mb"] is not None]
+        with self._lock:
+            workers = {
+                pid: {
+                    **worker,
+                    "work_ms": round(worker["work_ms"], 1),
+                    "overhead_ms": round(worker["overhead_ms"], 1),
+                    "avg_work_ms": round(worker["work_ms"] / worker["documents"], 1) if worker["documents"] else None,
+                    "avg_overhead_ms": round(worker["overhead_ms"] / worker["documents"], 1) if worker["documents"] else None,
+                    "pages_per_second": round(worker["pages"] * 1000 / worker["work_ms"], 1) if worker["work_ms"] else None,
+                }
+                for pid, worker in self.per_worker.items()
+            }
+        return {
+            "workers": self.workers,
+            "in_flight": self.in_flight,
+            "documents": self.documents,
+            "recycles": self.recycles,
+            "failures": self.failures,
+            "max_peak_rss_mb": max(peaks) if peaks else None,
+            "health": self.last_health,
+            "per_worker": workers,
+            "shared_buffers": shared_buffers.stats(),
+            "recent": list(self.recent),
+        }
+
+
+pdf_pool = PdfWorkerPool()
@@ -0,0 +1,253 @@
+"""
+On-demand profiling of individual parse requests.
+
+Two modes:
+- ``sample``: a background thread samples the stack of the worker thread
+  every PROFILE_INTERVAL_MS and writes collapsed stacks (``a;b;c count``),
+  the input format of flamegraph.pl, speedscope and inferno. Cheap enough
+  to stay on for a small slice of production traffic (PROFILE_SAMPLE_RATE).
+- ``cprofile``: deterministic cProfile stats (``.prof``, for snakeviz,
+  flameprof or pstats). Exact call counts, much higher overhead.
+
+Frames carry their file and line, so the pdfplumber/pdfminer internals and
+the regex call sites of the extractors and of ``transform_extracta_response``
+show up as separate boxes. The sampler also records the shared extractor
+thread pool while it runs an extractor (under an ``[extractor threads]``
+root; under concurrent load it may include other requests' extractors).
+cProfile only sees the request thread.
+
+PDF text extraction runs in worker processes (pdf_worker.py): while a
+request is profiled, its worker tasks run under the same profiler in the
+worker and their stacks/stats are merged into the request's profile (under
+a ``[pdf worker]`` root in sample mode).
+"""
+import cProfile
+import os
+import pstats
+import random
+import secrets
+import sys
+import threading
+import time
+from collections import Counter
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+# Profiling is disabled unless an admin token is configured
+PROFILING_ADMIN_TOKEN = os.getenv("PROFILING_ADMIN_TOKEN")
+# Fraction of requests profiled automatically (sample mode, stored only)
+PROFILE_SAMPLE_RATE = float(os.getenv("PROFILE_SAMPLE_RATE", "0"))
+PROFILE_INTERVAL_MS = float(os.getenv("PROFILE_INTERVAL_MS", "5"))
+PROFILE_DIR = Path(os.getenv("PROFILE_DIR", str(Path(__file__).parent / "profiles")))
+# Retention of stored profiles, applied on each write (0 = no limit)
+PROFILE_MAX_FILES = int(os.getenv("PROFILE_MAX_FILES", "500"))
+PROFILE_MAX_AGE_HOURS = float(os.getenv("PROFILE_MAX_AGE_HOURS", "72"))
+
+PROFILE_MODES = ("sample", "cprofile")
+_EXTENSIONS = {"sample": ".folded", "cprofile": ".prof"}
+
+
+@dataclass
+class ProfileRequest:
+    mode: str
+    # False for requests picked by PROFILE_SAMPLE_RATE
+    explicit: bool = True
+    interval_ms: float = PROFILE_INTERVAL_MS
+
+
+def _frame_label(frame) -> str:
+    code = frame.f_code
+    # Keep the package directory: "pdfminer/layout.py" rather than a full site-packages path
+    path = os.path.normpath(code.co_filename).split(os.sep)
+    return f"{code.co_name} ({'/'.join(path[-2:])}:{frame.f_lineno})"
+
+
+# Pool threads sampled alongside the request thread, and the frame proving they are busy
+HELPER_THREADS = {"extractor": "_timed"}
+
+
+class StackSampler:
+    """Samples the Python stack of one thread (plus busy helper pool threads) from a background thread."""
+
+    def __init__(self, thread_id: int, interval_ms: float = PROFILE_INTERVAL_MS) -> None:
+        self.thread_id = thread_id
+        self.interval = interval_ms / 1000
+        self.stacks: Counter = Counter()
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="stack-sampler", daemon=True)
+
+    def _record(self, frame, root: Optional[str] = None, busy_marker: Optional[str] = None) -> None:
+        labels = []
+        busy = busy_marker is None
+        while frame is not None:
+            labels.append(_frame_label(frame))
+            busy = busy or frame.f_code.co_name == busy_marker
+            frame = frame.f_back
+        if labels and busy:
+            if root:
+                labels.append(root)
+            self.stacks[";".join(reversed(labels))] += 1
+
+    def _run(self) -> None:
+        while not self._stop.wait(self.interval):
+            frames = sys._current_frames()
+            self._record(frames.get(self.thread_id))
+            for thread in threading.enumerate():
+                for prefix, busy_marker in HELPER_THREADS.items():
+                    if thread.name.startswith(prefix) and thread.ident in frames:
+                        self._record(frames[thread.ident], f"[{prefix} threads]", busy_marker)
+
+    def start(self) -> None:
+        self._thread.start()
+
+    def stop(self) -> None:
+        self._stop.set()
+        self._thread.join()
+
+    def folded(self) -> str:
+        """Collapsed stacks, one ``frame;frame;frame count`` line per distinct stack."""
+        return "".join(f"{stack} {count}\n" for stack, count in self.stacks.most_common())
+
+
+# Profile of the request running in this thread, and the worker profiles collected for it
+_active = threading.local()
+
+
+def active_profile() -> Optional[ProfileRequest]:
+    """Profile request of the current thread, if it is being profiled."""
+    return getattr(_active, "request", None)
+
+
+def add_worker_profile(payload: Any) -> None:
+    """Attach the profile of a worker task (``run_profiled``) to the current thread's profile."""
+    if active_profile() is not None:
+        _active.worker_profiles.append(payload)
+
+
+class _WorkerStats:
+    """cProfile stats shipped from a worker, in the shape ``pstats.Stats.add`` loads."""
+
+    def __init__(self, stats: dict) -> None:
+        self.stats = stats
+
+    def create_stats(self) -> None:
+        pass
+
+
+def run_profiled(mode: str, interval_ms: float, func: Callable, *args: Any) -> Tuple[Any, Any]:
+    """
+    Run ``func(*args)`` under the profiler in a worker process.
+
+    Returns:
+        Tuple (func result, payload): collapsed stack counts in sample mode,
+        cProfile stats in cprofile mode, for ``add_worker_profile``
+    """
+    if mode == "cprofile":
+        profiler = cProfile.Profile()
+        result = profiler.runcall(func, *args)
+        profiler.create_stats()
+        return result, profiler.stats
+    sampler = StackSampler(threading.get_ident(), interval_ms)
+    sampler.start()
+    try:
+        result = func(*args)
+    finally:
+        sampler.stop()
+    return result, dict(sampler.stacks)
+
+
+def check_token(token: Optional[str]) -> bool:
+    """True when profiling is enabled and ``token`` is the admin token."""
+    return bool(PROFILING_ADMIN_TOKEN) and token is not None and secrets.compare_digest(token, PROFILING_ADMIN_TOKEN)
+
+
+def sampled_request() -> Optional[ProfileRequest]:
+    """A stored-only sample profile for PROFILE_SAMPLE_RATE of the requests."""
+    if PROFILING_ADMIN_TOKEN and PROFILE_SAMPLE_RATE > 0 and random.random() < PROFILE_SAMPLE_RATE:
+        return ProfileRequest(mode="sample", explicit=False)
+    return None
+
+
+def profile_call(request: ProfileRequest, name: str, func: Callable, *args: Any) -> Tuple[Any, str]:
+    """
+    Run ``func(*args)`` in the current thread under the requested profiler
+    and store the profile (also when ``func`` raises).
+
+    Returns:
+        Tuple (func result, profile id)
+    """
+    profile_id = f"{time.strftime('%Y%m%d-%H%M%S')}-{name}-{secrets.token_hex(4)}"
+    path = PROFILE_DIR / f"{profile_id}{_EXTENSIONS[request.mode]}"
+    PROFILE_DIR.mkdir(parents=True, exist_ok=True)
+
+    _active.request, _active.worker_profiles = request, []
+    worker_profiles: List[Any] = _active.worker_profiles
+
+    if request.mode == "cprofile":
+        profiler = cProfile.Profile()
+        try:
+            return profiler.runcall(func, *args), profile_id
+        finally:
+            _active.request = None
+            stats = pstats.Stats(profiler)
+            for payload in worker_profiles:
+                if payload:  # pstats rejects empty stats
+                    stats.add(_WorkerStats(payload))
+            stats.dump_stats(str(path))
+            prune_profiles()
+
+    sampler = StackSampler(threading.get_ident(), request.interval_ms)
+    sampler.start()
+    try:
+        return func(*args), profile_id
+    finally:
+        _active.request = None
+        sampler.stop()
+        for payload in worker_profiles:
+            _merge_worker_stacks(sampler, payload)
+        path.write_text(sampler.folded(), encoding="utf-8")
+        prune_profiles()
+
+
+def _merge_worker_stacks(sampler: StackSampler, stacks: Dict[str, int]) -> None:
+    for stack, count in stacks.items():
+        sampler.stacks[f"[pdf worker];{stack}"] += count
+
+
+def prune_profiles() -> int:
+    """
+    Delete stored profiles older than PROFILE_MAX_AGE_HOURS, then the oldest
+    ones beyond PROFILE_MAX_FILES.
+
+    Returns:
+        Number of deleted files
+    """
+    profiles = []
+    for extension in _EXTENSIONS.values():
+        for path in PROFILE_DIR.glob(f"*{extension}"):
+            try:
+                profiles.append((path.stat().st_mtime, path))
+            except OSError:  # deleted by a concurrent prune
+                continue
+    profiles.sort()
+    expired = 0
+    if PROFILE_MAX_AGE_HOURS > 0:
+        cutoff = time.time() - PROFILE_MAX_AGE_HOURS * 3600
+        expired = sum(1 for mtime, _ in profiles if mtime < cutoff)
+    if PROFILE_MAX_FILES > 0:
+        expired = max(expired, len(profiles) - PROFILE_MAX_FILES)
+    for _, path in profiles[:expired]:
+        path.unlink(missing_ok=True)
+    return expired
+
+
+def profile_path(profile_id: str) -> Optional[Path]:
+    """Stored profile file for ``profile_id``, None if unknown."""
+    if not profile_id or "/" in profile_id or "\\" in profile_id or profile_id.startswith("."):
+        return None
+    for extension in _EXTENSIONS.values():
+        path = PROFILE_DIR / f"{profile_id}{extension}"
+        if path.is_file():
+            return path
+    return None
@@ -0,0 +1,179 @@
+"""
+Archive of raw external provider responses (DocParserAI, Nanonets, HrFlow, Extracta).
+
+Every successful provider response is stored compressed (zstd when the
+optional ``zstandard`` package is installed, gzip otherwise) under
+``<PROVIDER_ARCHIVE_DIR>/<hash[:2]>/<document hash>/<provider>-<api version>.json.<ext>``.
+After a fix in ``transform_extracta_response``, old CVs can be rebuilt from
+the archive without calling (and paying for) the providers again.
+
+Bulk re-transformation (no network access):
+    python provider_archive.py retransform <output_dir> [max_workers]
+    python provider_archive.py list
+"""
+import gzip
+import json
+import logging
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+from typing import Any, Iterator, List, Optional, Tuple
+
+try:
+    import zstandard
+except ImportError:  # optional dependency
+    zstandard = None
+
+logger = logging.getLogger("fastapi-cv-parser")
+
+PROVIDER_ARCHIVE_ENABLED = os.getenv("PROVIDER_ARCHIVE_ENABLED", "true").lower() == "true"
+PROVIDER_ARCHIVE_DIR = Path(os.getenv("PROVIDER_ARCHIVE_DIR", str(Path(__file__).parent / "raw_responses")))
+RETRANSFORM_WORKERS = int(os.getenv("RETRANSFORM_WORKERS", str(os.cpu_count() or 1)))
+
+# Version of each provider API we call: bump it when the request/response format changes,
+# so responses of different shapes never overwrite each other
+PROVIDER_API_VERSIONS = {
+    "docparserai": os.getenv("DOCPARSERAI_API_VERSION", "v1"),
+    "nanonets": os.getenv("NANONETS_API_VERSION", "v1"),
+    "hrflow": os.getenv("HRFLOW_API_VERSION", "v1"),
+    "extracta": os.getenv("EXTRACTA_API_VERSION", "v1"),
+}
+
+_EXTENSIONS = (".json.zst", ".json.gz")
+
+
+def _compress(data: bytes) -> Tuple[bytes, str]:
+    if zstandard is not None:
+        return zstandard.ZstdCompressor(level=10).compress(data), ".json.zst"
+    return gzip.compress(data, compresslevel=9), ".json.gz"
+
+
+def _decompress(path: Path) -> bytes:
+    raw = path.read_bytes()
+    if path.name.endswith(".zst"):
+        if zstandard is None:
+            raise RuntimeError(f"{path} is zstd-compressed: install the zstandard package to read it")
+        return zstandard.ZstdDecompressor().decompressobj().decompress(raw)
+    return gzip.decompress(raw)
+
+
+def archive_path(document_hash: str, provider: str, api_version: Optional[str] = None) -> Path:
+    """Archive path of a response, without the compression extension."""
+    version = api_version or PROVIDER_API_VERSIONS.get(provider, "v1")
+    return PROVIDER_ARCHIVE_DIR / document_hash[:2] / document_hash / f"{provider}-{version}"
+
+
+def archive_response(document_hash: str, provider: str, response: Any, filename: Optional[str] = None) -> Optional[Path]:
+    """
+    Store a raw provider response. Archiving must never fail a parse:
+    errors are logged and None is returned.
+    """
+    if not PROVIDER_ARCHIVE_ENABLED:
+        return None
+    try:
+        api_version = PROVIDER_API_VERSIONS.get(provider, "v1")
+        envelope = {
+            "document_hash": document_hash,
+            "provider": provider,
+            "api_version": api_version,
+            "filename": filename,
+            "archived_at": time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime()),
+            "response": response,
+        }
+        data, extension = _compress(json.dumps(envelope, ensure_ascii=False).encode("utf-8"))
+        base = archive_path(document_hash, provider, api_version)
+        path = base.with_name(base.name + extension)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        # Write then rename so a concurrent reader never sees a partial file
+        tmp_path = path.with_name(path.name + ".tmp")
+        tmp_path.write_bytes(data)
+        os.replace(tmp_path, path)
+        return path
+    except Exception as e:
+        logger.warning(f"Could not archive {provider} response: {str(e)}")
+        return None
+
+
+def load_archived(path: Path) -> dict:
+    """Envelope of an archived response (document_hash, provider, api_version, filename, response)."""
+    return json.loads(_decompress(Path(path)).decode("utf-8"))
+
+
+def iter_archive(root: Optional[Path] = None) -> Iterator[Path]:
+    """Every archived response file, sorted by path."""
+    root = Path(root or PROVIDER_ARCHIVE_DIR)
+    if not root.exists():
+        return
+    for path in sorted(root.glob("*/*/*")):
+        if path.name.endswith(_EXTENSIONS):
+            yield path
+
+
+def retransform_file(path: Path, output_dir: Path) -> Tuple[str, Optional[str]]:
+    """
+    Rebuild the CVSchema of one archived response into
+    ``<output_dir>/<document hash>/<provider>-<api version>.json``.
+
+    Returns:
+        Tuple (archive path, error message or None)
+    """
+    # Imported here: main imports this module
+    from main import transform_extracta_response
+
+    try:
+        envelope = load_archived(path)
+        cv_data = transform_extracta_response(envelope["response"])
+        target = Path(output_dir) / envelope["document_hash"] / f"{envelope['provider']}-{envelope['api_version']}.json"
+        target.parent.mkdir(parents=True, exist_ok=True)
+        target.write_text(cv_data.model_dump_json(indent=2), encoding="utf-8")
+        return str(path), None
+    except Exception as e:
+        return str(path), str(e)
+
+
+def retransform_archive(output_dir: Path, max_workers: int = RETRANSFORM_WORKERS, root: Optional[Path] = None) -> dict:
+    """
+    Re-run ``transform_extracta_response`` on every archived response, in parallel.
+
+    Returns:
+        Report {"files", "transformed", "failed": [(path, error), ...], "seconds"}
+    """
+    paths = list(iter_archive(root))
+    start = time.perf_counter()
+    failed: List[Tuple[str, str]] = []
+    with ProcessPoolExecutor(max_workers=max_workers) as pool:
+        for path, error in pool.map(retransform_file, paths, [output_dir] * len(paths), chunksize=16):
+            if error:
+                failed.append((path, error))
+    return {
+        "files": len(paths),
+        "transformed": len(paths) - len(failed),
+        "failed": failed,
+        "seconds": round(time.perf_counter() - start, 3),
+    }
+
+
+if __name__ == "__main__":
+    usage = "Usage: python provider_archive.py retransform <output_dir> [max_workers] | list"
+    if len(sys.argv) < 2 or sys.argv[1] not in ("retransform", "list"):
+        print(usage)
+        sys.exit(1)
+
+    if sys.argv[1] == "list":
+        for archived in iter_archive():
+            print(archived.relative_to(PROVIDER_ARCHIVE_DIR))
+        sys.exit(0)
+
+    if len(sys.argv) < 3:
+        print(usage)
+        sys.exit(1)
+
+    logging.getLogger("fastapi-cv-parser").setLevel(logging.WARNING)
+    workers = int(sys.argv[3]) if len(sys.argv) > 3 else RETRANSFORM_WORKERS
+    report = retransform_archive(Path(sys.argv[2]), workers)
+    print(f"{report['transformed']}/{report['files']} réponses retransformées en {report['seconds']}s -> {sys.argv[2]}")
+    for failed_path, error in report["failed"]:
+        print(f"❌ {failed_path}: {error}")
+    sys.exit(1 if report["failed"] else 0)
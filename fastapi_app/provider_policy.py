@@ -0,0 +1,226 @@
+"""
+Adaptive timeouts and retry budgets for the external providers and Ollama.
+
+Each provider (DocParserAI, Nanonets, HrFlow, Extracta, one entry per Ollama
+model) keeps a latency histogram of its recent calls. Once it has
+PROVIDER_TIMEOUT_MIN_SAMPLES samples, a call gets
+``p99 x PROVIDER_TIMEOUT_FACTOR`` (at least PROVIDER_TIMEOUT_MIN_SECONDS, at
+most the historical 60/120/300 s), still bounded by the request deadline.
+
+Only transient failures are retried: connection errors, timeouts and the
+RETRYABLE_STATUS codes (a 401 or 422 fails at once). Retries wait a jittered
+exponential backoff (Retry-After when the provider sends one) and are drawn
+from a per-provider budget: at most RETRY_BUDGET_RATIO of the calls of the
+last RETRY_BUDGET_WINDOW_SECONDS (plus RETRY_BUDGET_MIN), so a provider
+outage never multiplies the load sent to it.
+"""
+import bisect
+import logging
+import os
+import random
+import threading
+import time
+from collections import deque
+from typing import Callable, Deque, Dict, Optional
+
+import requests
+
+from deadline import MIN_STAGE_SECONDS, Deadline, stage_timeout
+
+logger = logging.getLogger("fastapi-cv-parser")
+
+PROVIDER_TIMEOUT_FACTOR = float(os.getenv("PROVIDER_TIMEOUT_FACTOR", "3"))
+PROVIDER_TIMEOUT_PERCENTILE = float(os.getenv("PROVIDER_TIMEOUT_PERCENTILE", "99"))
+PROVIDER_TIMEOUT_MIN_SECONDS = float(os.getenv("PROVIDER_TIMEOUT_MIN_SECONDS", "5"))
+# Below this many samples the historical fixed timeout is used
+PROVIDER_TIMEOUT_MIN_SAMPLES = int(os.getenv("PROVIDER_TIMEOUT_MIN_SAMPLES", "20"))
+PROVIDER_MAX_RETRIES = int(os.getenv("PROVIDER_MAX_RETRIES", "2"))
+RETRY_BUDGET_RATIO = float(os.getenv("RETRY_BUDGET_RATIO", "0.1"))
+RETRY_BUDGET_MIN = int(os.getenv("RETRY_BUDGET_MIN", "3"))
+RETRY_BUDGET_WINDOW_SECONDS = float(os.getenv("RETRY_BUDGET_WINDOW_SECONDS", "60"))
+RETRY_BACKOFF_BASE_SECONDS = float(os.getenv("RETRY_BACKOFF_BASE_SECONDS", "0.5"))
+RETRY_BACKOFF_MAX_SECONDS = float(os.getenv("RETRY_BACKOFF_MAX_SECONDS", "10"))
+
+RETRYABLE_STATUS = frozenset({408, 425, 429, 500, 502, 503, 504})
+
+# Histogram bucket upper bounds: 50 ms to 20 min, 25 % apart
+LATENCY_BUCKETS = [0.05 * 1.25 ** i for i in range(58)]
+# Counts are halved past this many samples, so the histogram follows recent behaviour
+LATENCY_SAMPLES = 2000
+
+
+class LatencyHistogram:
+    """Log-bucketed call durations (seconds), decaying towards recent calls."""
+
+    def __init__(self) -> None:
+        self.counts = [0] * (len(LATENCY_BUCKETS) + 1)
+        self.total = 0
+
+    def record(self, seconds: float) -> None:
+        self.counts[bisect.bisect_left(LATENCY_BUCKETS, seconds)] += 1
+        self.total += 1
+        if self.total > LATENCY_SAMPLES:
+            self.counts = [count // 2 for count in self.counts]
+            self.total = sum(self.counts)
+
+    def percentile(self, q: float) -> Optional[float]:
+        """Upper bound of the bucket holding the ``q``-th percentile; None without samples."""
+        if not self.total:
+            return None
+        rank = q / 100 * self.total
+        seen = 0
+        for index, count in enumerate(self.counts):
+            seen += count
+            if count and seen >= rank:
+                return LATENCY_BUCKETS[min(index, len(LATENCY_BUCKETS) - 1)]
+        return LATENCY_BUCKETS[-1]
+
+
+class RetryBudget:
+    """Retries allowed in a sliding window, proportional to the calls made in it."""
+
+    def __init__(self, window: float = RETRY_BUDGET_WINDOW_SECONDS) -> None:
+        self.window = window
+        self.calls: Deque[float] = deque()
+        self.retries: Deque[float] = deque()
+        self.denied = 0
+
+    def _trim(self, now: float) -> None:
+        for events in (self.calls, self.retries):
+            while events and events[0] < now - self.window:
+                events.popleft()
+
+    def record_call(self) -> None:
+        self.calls.append(time.monotonic())
+
+    def try_retry(self) -> bool:
+        now = time.monotonic()
+        self._trim(now)
+        if len(self.retries) >= RETRY_BUDGET_MIN + RETRY_BUDGET_RATIO * len(self.calls):
+            self.denied += 1
+            return False
+        self.retries.append(now)
+        return True
+
+
+def backoff_delay(attempt: int, retry_after: Optional[str] = None) -> float:
+    """Full-jitter exponential backoff, or the provider's Retry-After (seconds) when given."""
+    try:
+        if retry_after:
+            return min(float(retry_after), RETRY_BACKOFF_MAX_SECONDS)
+    except ValueError:
+        pass
+    return random.uniform(0, min(RETRY_BACKOFF_MAX_SECONDS, RETRY_BACKOFF_BASE_SECONDS * 2 ** attempt))
+
+
+class ProviderPolicy:
+    """Latency histograms, adaptive timeouts and retry budgets of every provider."""
+
+    def __init__(self, sleep: Callable[[float], None] = time.sleep) -> None:
+        self.sleep = sleep
+        self.histograms: Dict[str, LatencyHistogram] = {}
+        self.budgets: Dict[str, RetryBudget] = {}
+        self.outcomes: Dict[str, Dict[str, int]] = {}
+        self._lock = threading.Lock()
+
+    def _count(self, provider: str, outcome: str) -> None:
+        counts = self.outcomes.setdefault(provider, {})
+        counts[outcome] = counts.get(outcome, 0) + 1
+
+    def timeout(self, provider: str, cap: float) -> float:
+        """``p99 x factor`` of the provider's recent calls, within [minimum, cap]; ``cap`` until enough samples."""
+        with self._lock:
+            histogram = self.histograms.get(provider)
+            if histogram is None or histogram.total < PROVIDER_TIMEOUT_MIN_SAMPLES:
+                return cap
+            p99 = histogram.percentile(PROVIDER_TIMEOUT_PERCENTILE)
+        return min(cap, max(PROVIDER_TIMEOUT_MIN_SECONDS, p99 * PROVIDER_TIMEOUT_FACTOR))
+
+    def record(self, provider: str, seconds: float) -> None:
+        with self._lock:
+            self.histograms.setdefault(provider, LatencyHistogram()).record(seconds)
+
+    def call(
+        self,
+        provider: str,
+        stage: str,
+        send: Callable[[float], requests.Response],
+        deadline: Optional[Deadline] = None,
+        cap: float = 60,
+    ) -> requests.Response:
+        """
+        ``send(timeout)`` with an adaptive timeout, retried on transient failures within the budget.
+
+        Args:
+            provider: Histogram and budget key ("docparserai", "ollama:llama3.2", ...)
+            stage: Stage name reported by DeadlineExceeded
+            send: Performs one HTTP call with the given timeout
+            deadline: Request deadline bounding every attempt and backoff
+            cap: Historical fixed timeout, the upper bound of the adaptive one
+
+        Returns:
+            The last response: a non-retryable status, or a retryable one once retries are exhausted
+
+        Raises:
+            DeadlineExceeded: the deadline expired before an attempt could start
+            requests.exceptions.RequestException: the last attempt failed to connect or timed out
+        """
+        with self._lock:
+            budget = self.budgets.setdefault(provider, RetryBudget())
+            budget.record_call()
+        attempt = 0
+        while True:
+            timeout = stage_timeout(deadline, stage, self.timeout(provider, cap))
+            started = time.perf_counter()
+            retry_after = None
+            try:
+                response = send(timeout)
+            except (requests.exceptions.ConnectionError, requests.exceptions.Timeout) as e:
+                failure: Optional[Exception] = e
+                # A timed out call still tells how slow the provider is
+                if isinstance(e, requests.exceptions.Timeout):
+                    self.record(provider, time.perf_counter() - started)
+                outcome = type(e).__name__
+            else:
+                failure = None
+                self.record(provider, time.perf_counter() - started)
+                if response.status_code not in RETRYABLE_STATUS:
+                    with self._lock:
+                        self._count(provider, "retried_ok" if attempt else "ok")
+                    return response
+                retry_after = response.headers.get("Retry-After")
+                outcome = str(response.status_code)
+
+            delay = backoff_delay(attempt, retry_after)
+            with self._lock:
+                self._count(provider, outcome)
+                retry = (
+                    attempt < PROVIDER_MAX_RETRIES
+                    and (deadline is None or deadline.remaining() - delay >= MIN_STAGE_SECONDS)
+                    and budget.try_retry()
+                )
+            if not retry:
+                if failure is not None:
+                    raise failure
+                return response
+            attempt += 1
+            logger.warning(f"{stage}: {outcome}, retry {attempt}/{PROVIDER_MAX_RETRIES} in {delay:.2f}s")
+            self.sleep(delay)
+
+    def stats(self) -> dict:
+        now = time.monotonic()
+        with self._lock:
+            stats = {}
+            for provider, budget in self.budgets.items():
+                budget._trim(now)
+                histogram = self.histograms.get(provider, LatencyHistogram())
+                stats[provider] = {
+                    "samples": histogram.total,
+                    "p50_s": histogram.percentile(50),
+                    "p99_s": histogram.percentile(PROVIDER_TIMEOUT_PERCENTILE),
+                    "outcomes": dict(self.outcomes.get(provider, {})),
+                    "retry_budget": {"calls": len(budget.calls), "retries": len(budget.retries), "denied": budget.denied},
+                }
+            return stats
+
+provider_policy = ProviderPolicy()
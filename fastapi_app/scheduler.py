@@ -0,0 +1,240 @@
+"""
+Fair scheduling of parse work in front of the extraction backends.
+
+Interactive uploads (the Angular cv-upload page) and bulk imports share the
+same local workers, Ollama capacity and provider quotas. Every parse request
+takes a slot of the backend it is about to use ("local", "ollama",
+"external"), at most SCHEDULER_CAPS slots per backend:
+
+- priority classes: ``interactive`` (default) is always served first; ``bulk``
+  (``X-Priority: bulk``) may only hold SCHEDULER_BULK_SHARE of a backend's
+  slots, so a long import never occupies the capacity interactive requests
+  need
+- within a class, tenants (``X-Tenant``) share the backend by weighted fair
+  queuing (start-time fair queuing on the admission cost of each document,
+  weights from SCHEDULER_TENANT_WEIGHTS): a tenant uploading a thousand CVs
+  does not delay another tenant's single one
+- a request waiting more than SCHEDULER_QUEUE_SECONDS is rejected (503)
+
+The "local" cap defaults to PDF_WORKERS: the worker pool runs its tasks in
+FIFO order, so slots beyond the worker count would only let interactive
+documents queue behind bulk ones inside the pool, where priority no longer
+applies.
+
+Queue length, running slots, grants, rejections and wait percentiles per
+backend and class are exposed by /stats/scheduler.
+"""
+import asyncio
+import heapq
+import itertools
+import logging
+import math
+import os
+import time
+from collections import deque
+from dataclasses import dataclass, field
+from typing import Deque, Dict, List, Optional, Tuple
+
+from admission import AdmissionRejected
+from pdf_worker import PDF_WORKERS
+
+logger = logging.getLogger("fastapi-cv-parser")
+
+PRIORITIES = ("interactive", "bulk")
+
+
+def _parse_mapping(value: str) -> Dict[str, float]:
+    """``"local=16,ollama=2"`` -> {"local": 16.0, "ollama": 2.0}"""
+    mapping = {}
+    for item in value.split(","):
+        name, _, number = item.partition("=")
+        if name.strip() and number.strip():
+            mapping[name.strip()] = float(number)
+    return mapping
+
+
+SCHEDULER_DEFAULT_CAP = int(os.getenv("SCHEDULER_DEFAULT_CAP", "8"))
+# One local slot per PDF worker process (PDF_WORKERS=0: extraction in the API threadpool)
+SCHEDULER_CAPS = _parse_mapping(
+    os.getenv("SCHEDULER_CAPS", f"local={PDF_WORKERS or SCHEDULER_DEFAULT_CAP},ollama=2,external=8")
+)
+# Fraction of each backend's slots bulk work may hold (at least one slot)
+SCHEDULER_BULK_SHARE = float(os.getenv("SCHEDULER_BULK_SHARE", "0.5"))
+SCHEDULER_QUEUE_SECONDS = float(os.getenv("SCHEDULER_QUEUE_SECONDS", "30"))
+SCHEDULER_TENANT_WEIGHTS = _parse_mapping(os.getenv("SCHEDULER_TENANT_WEIGHTS", ""))
+DEFAULT_TENANT = "default"
+
+# Recent waits kept per backend and class for the percentiles
+WAIT_SAMPLES = 1000
+MAX_TRACKED_TENANTS = 10000
+
+
+@dataclass
+class WorkTicket:
+    tenant: str = DEFAULT_TENANT
+    priority: str = "interactive"
+    backend: str = "local"
+    # Admission cost of the document (page units), the fair-queuing "packet size"
+    cost: float = 1.0
+    # Filled by FairScheduler.acquire
+    granted: bool = field(default=False, repr=False)
+    wait_ms: float = 0.0
+
+    def headers(self) -> Dict[str, str]:
+        return {"X-Priority": self.priority, "X-Queue-Wait-Ms": str(round(self.wait_ms, 1))}
+
+
+def _percentile(values, q: float) -> float:
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    return round(ordered[max(1, math.ceil(q / 100 * len(ordered))) - 1], 1)
+
+
+class BackendQueue:
+    """Slots of one backend: per-class waiting heaps ordered by fair-queuing start tag."""
+
+    def __init__(self, name: str, cap: int) -> None:
+        self.name = name
+        self.cap = cap
+        self.bulk_cap = max(1, int(cap * SCHEDULER_BULK_SHARE))
+        self.running = {priority: 0 for priority in PRIORITIES}
+        self.waiting: Dict[str, List[Tuple[float, int, WorkTicket, asyncio.Future]]] = {p: [] for p in PRIORITIES}
+        # Start-time fair queuing state, per class
+        self.virtual_time = {priority: 0.0 for priority in PRIORITIES}
+        self.last_finish: Dict[Tuple[str, str], float] = {}
+        self.granted = {priority: 0 for priority in PRIORITIES}
+        self.rejected = {priority: 0 for priority in PRIORITIES}
+        self.waits: Dict[str, Deque[float]] = {priority: deque(maxlen=WAIT_SAMPLES) for priority in PRIORITIES}
+        self.tenants: Dict[str, int] = {}
+
+    def has_slot(self, priority: str) -> bool:
+        if sum(self.running.values()) >= self.cap:
+            return False
+        return priority == "interactive" or self.running["bulk"] < self.bulk_cap
+
+    def enqueue(self, ticket: WorkTicket, future: asyncio.Future, sequence: int) -> None:
+        weight = SCHEDULER_TENANT_WEIGHTS.get(ticket.tenant, 1.0) or 1.0
+        key = (ticket.priority, ticket.tenant)
+        start = max(self.virtual_time[ticket.priority], self.last_finish.get(key, 0.0))
+        self.last_finish[key] = start + max(ticket.cost, 0.01) / weight
+        heapq.heappush(self.waiting[ticket.priority], (start, sequence, ticket, future))
+        if len(self.last_finish) > MAX_TRACKED_TENANTS:
+            # Tenants already behind the virtual time start from it anyway
+            self.last_finish = {
+                entry: finish for entry, finish in self.last_finish.items() if finish > self.virtual_time[entry[0]]
+            }
+
+    def dispatch(self) -> None:
+        """Grant free slots: interactive first, then bulk within its share."""
+        for priority in PRIORITIES:
+            heap = self.waiting[priority]
+            while heap and self.has_slot(priority):
+                start, _, ticket, future = heapq.heappop(heap)
+                if future.done():  # timed out or cancelled while waiting
+                    continue
+                self.virtual_time[priority] = start
+                self.running[priority] += 1
+                future.set_result(None)
+
+    def live_waiting(self, priority: str) -> int:
+        return sum(1 for *_, future in self.waiting[priority] if not future.done())
+
+    def stats(self) -> dict:
+        return {
+            "cap": self.cap,
+            "bulk_cap": self.bulk_cap,
+            "classes": {
+                priority: {
+                    "running": self.running[priority],
+                    "waiting": self.live_waiting(priority),
+                    "granted": self.granted[priority],
+                    "rejected": self.rejected[priority],
+                    "wait_p50_ms": _percentile(self.waits[priority], 50),
+                    "wait_p95_ms": _percentile(self.waits[priority], 95),
+                }
+                for priority in PRIORITIES
+            },
+            "tenants": dict(sorted(self.tenants.items(), key=lambda item: -item[1])[:20]),
+        }
+
+
+class FairScheduler:
+    """Per-backend concurrency caps with priority classes and per-tenant fair queuing."""
+
+    def __init__(self, queue_seconds: float = SCHEDULER_QUEUE_SECONDS) -> None:
+        self.queue_seconds = queue_seconds
+        self.queues: Dict[str, BackendQueue] = {}
+        self._sequence = itertools.count()
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+
+    def _queue(self, backend: str) -> BackendQueue:
+        # Futures are bound to one event loop (tests start several): start over on a new loop
+        loop = asyncio.get_running_loop()
+        if self._loop is not loop:
+            self.queues, self._loop = {}, loop
+        if backend not in self.queues:
+            self.queues[backend] = BackendQueue(backend, int(SCHEDULER_CAPS.get(backend, SCHEDULER_DEFAULT_CAP)))
+        return self.queues[backend]
+
+    async def acquire(self, ticket: WorkTicket) -> None:
+        """
+        Wait for a slot of ``ticket.backend``, in priority then fair-queuing order.
+
+        Raises:
+            AdmissionRejected: no slot within ``queue_seconds`` (503)
+        """
+        queue = self._queue(ticket.backend)
+        start = time.perf_counter()
+        future = asyncio.get_running_loop().create_future()
+        queue.enqueue(ticket, future, next(self._sequence))
+        queue.dispatch()
+        try:
+            await asyncio.wait_for(asyncio.shield(future), self.queue_seconds)
+        except (asyncio.TimeoutError, asyncio.CancelledError) as e:
+            if future.done() and not future.cancelled():
+                # Granted just as the wait ended: give the slot back
+                queue.running[ticket.priority] -= 1
+                queue.dispatch()
+            future.cancel()
+            if isinstance(e, asyncio.CancelledError):
+                raise
+            queue.rejected[ticket.priority] += 1
+            raise AdmissionRejected(
+                503,
+                f"Server busy: no {ticket.backend} slot for {ticket.priority} work within {self.queue_seconds}s",
+                retry_after=max(1, int(self.queue_seconds)),
+            )
+
+        ticket.granted = True
+        ticket.wait_ms = (time.perf_counter() - start) * 1000
+        queue.granted[ticket.priority] += 1
+        queue.waits[ticket.priority].append(ticket.wait_ms)
+        queue.tenants[ticket.tenant] = queue.tenants.get(ticket.tenant, 0) + 1
+        if ticket.wait_ms > 1000:
+            logger.info(f"Scheduler: {ticket.priority} work of {ticket.tenant} waited {ticket.wait_ms:.0f}ms for {ticket.backend}")
+
+    async def release(self, ticket: WorkTicket) -> None:
+        """Give the slot back and grant it to the next waiting request."""
+        if not ticket.granted:
+            return
+        ticket.granted = False
+        queue = self._queue(ticket.backend)
+        queue.running[ticket.priority] = max(0, queue.running[ticket.priority] - 1)
+        queue.dispatch()
+
+    async def switch(self, ticket: WorkTicket, backend: str) -> None:
+        """Move a granted ticket to another backend (re-queued there, priority and tenant kept)."""
+        await self.release(ticket)
+        ticket.backend = backend
+        await self.acquire(ticket)
+
+    def stats(self) -> dict:
+        return {
+            "caps": {name: int(cap) for name, cap in SCHEDULER_CAPS.items()},
+            "bulk_share": SCHEDULER_BULK_SHARE,
+            "backends": {name: queue.stats() for name, queue in self.queues.items()},
+        }
+
+
+scheduler = FairScheduler()
@@ -0,0 +1,317 @@
+"""
+Rules-plus-layout segmentation of the experience and education sections.
+
+``COMPANY_ROLE_PATTERN`` only catches "Company - Role" lines, without dates
+or descriptions, so most CVs scored low and were escalated to an LLM. This
+segmenter recovers complete items from the usual CV layouts in one pass
+over the lines of the document:
+
+1. Section headings are whole short lines ("Expérience professionnelle",
+   "EDUCATION:"), so the experience block stops at the next heading of any
+   kind instead of the next occurrence of a stop word.
+2. Every non-bullet line carrying a date or period (dates.py) whose
+   remaining text reads like a header anchors an entry ("Migrated the
+   billing platform in 2021" is a description line). The entry header is
+   that line plus up to two short header-like lines just above it (or below
+   it when the line only holds the dates), until it holds two pieces.
+3. The lines up to the next entry header are its body: bullets ("•", "-",
+   "▪", ...) and sentences form the description.
+4. Header pieces (split on " - ", " | ", ", ", " at ", " chez ") are
+   classified with small word tables: job titles, company suffixes, degrees,
+   schools, places.
+
+Each line is looked at a bounded number of times: the cost is linear in the
+size of the section. Sections without any date anchor yield no entries (the
+caller keeps its previous behaviour).
+"""
+import re
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional, Tuple
+
+from dates import fold, has_date, parse_period, strip_dates
+
+# Folded heading texts (lowercase, no accents) -> section
+HEADINGS: Dict[str, str] = {
+    **{name: "experience" for name in [
+        "experience", "experiences", "work experience", "professional experience", "employment",
+        "employment history", "work history", "career", "career history",
+        "experience professionnelle", "experiences professionnelles", "parcours professionnel",
+    ]},
+    **{name: "education" for name in [
+        "education", "academic background", "education and training", "formation", "formations",
+        "formation academique", "diplomes", "diplomes et formations", "etudes", "cursus", "parcours academique",
+    ]},
+    **{name: "other" for name in [
+        "skills", "technical skills", "competences", "competences techniques", "languages", "langues",
+        "projects", "projets", "interests", "hobbies", "centres d'interet", "loisirs", "certifications",
+        "summary", "profile", "profil", "about me", "objective", "references", "publications",
+        "volunteering", "benevolat", "activites", "contact",
+    ]},
+}
+HEADING_MAX_CHARS = 40
+
+BULLET_PATTERN = re.compile(r"^\s*(?:[•●▪◦■□➢►▸✓✔*·>–—-]|\d{1,2}[.)])\s+")
+PIECE_SPLIT_PATTERN = re.compile(r"\s+[-–—|@]\s+|\s*[|•·]\s*|,\s+|\s+(?:at|chez)\s+", re.IGNORECASE)
+LEFTOVER_PATTERN = re.compile(r"^[\s()\[\]\-–—|,:/.à]*(?:(?:to|au|a|until|jusqu'a|from|de|du|since|depuis)\b[\s\-–—,:]*)*$", re.IGNORECASE)
+TRIM_PATTERN = re.compile(r"^[\s()\[\]\-–—|,:/]+|[\s()\[\]\-–—|,:/]+$")
+WORD_PATTERN = re.compile(r"[a-z0-9+#&']+")
+
+HEADER_MAX_CHARS = 100
+HEADER_MAX_WORDS = 8
+HEADER_LOOKBACK = 2
+
+ROLE_WORDS = {
+    "developer", "developpeur", "developpeuse", "engineer", "ingenieur", "ingenieure", "manager", "analyst",
+    "analyste", "consultant", "consultante", "designer", "intern", "internship", "stagiaire", "stage",
+    "alternant", "alternante", "alternance", "apprenti", "apprentie", "chef", "lead", "head", "director",
+    "directeur", "directrice", "responsable", "architect", "architecte", "technicien", "technicienne",
+    "technician", "administrator", "administrateur", "scientist", "officer", "assistant", "assistante",
+    "specialist", "specialiste", "coordinator", "coordinateur", "coordinatrice", "cto", "ceo", "founder",
+    "cofounder", "fondateur", "fondatrice", "freelance", "owner", "scrum", "devops", "programmer",
+    "programmeur", "charge", "chargee", "commercial", "commerciale", "comptable", "teacher", "professeur",
+    "researcher", "chercheur", "doctorant", "associate", "president", "vp", "tester", "testeur",
+}
+COMPANY_WORDS = {
+    "inc", "llc", "ltd", "corp", "corporation", "sa", "sas", "sasu", "sarl", "gmbh", "bv", "plc", "ag",
+    "group", "groupe", "company", "technologies", "labs", "consulting", "bank", "banque", "studio",
+    "agency", "agence", "solutions", "systems", "services", "startup",
+}
+DEGREE_WORDS = {
+    "master", "mastere", "licence", "bachelor", "bts", "dut", "but", "ingenieur", "diplome", "doctorat",
+    "phd", "mba", "baccalaureat", "bac", "msc", "bsc", "ba", "ma", "certificate", "certificat", "cap",
+    "deug", "dea", "dess", "degree", "diploma", "associate", "hnd",
+}
+SCHOOL_WORDS = {
+    "universite", "university", "ecole", "school", "institut", "institute", "college", "lycee", "iut",
+    "insa", "polytechnique", "academy", "academie", "faculte", "faculty", "centrale", "epitech", "epita",
+    "hec", "essec", "escp", "mines", "telecom", "supelec", "campus",
+}
+PLACE_WORDS = {
+    "remote", "teletravail", "france", "belgique", "belgium", "suisse", "switzerland", "canada", "quebec",
+    "maroc", "morocco", "tunisie", "tunisia", "algerie", "algeria", "senegal", "usa", "uk", "germany",
+    "allemagne", "spain", "espagne", "italy", "italie", "luxembourg", "netherlands", "pays-bas",
+    "paris", "lyon", "marseille", "toulouse", "lille", "nantes", "bordeaux", "nice", "rennes", "strasbourg",
+    "montpellier", "grenoble", "london", "londres", "berlin", "madrid", "bruxelles", "brussels", "geneve",
+    "geneva", "lausanne", "montreal", "casablanca", "rabat", "tunis", "alger", "dakar", "new york",
+}
+KNOWN_WORDS = ROLE_WORDS | COMPANY_WORDS | DEGREE_WORDS | SCHOOL_WORDS | PLACE_WORDS
+# Folded function words: a header may contain some, a description line ends with one before its date
+CONNECTOR_WORDS = {
+    "a", "an", "the", "in", "of", "to", "for", "by", "with", "on", "and", "at", "en", "le", "la", "les", "l",
+    "un", "une", "des", "du", "de", "d", "et", "pour", "par", "avec", "sur", "dans", "au", "aux", "chez",
+}
+# First word of a description line: "Migrated", "Leading", "Développé", "Réalisée"
+VERB_PATTERN = re.compile(r"^\w+(?:ed|ing|é|ée|és|ées)$", re.IGNORECASE)
+# "Master en Informatique" -> degree "Master", field "Informatique" (last "en"/"in")
+FIELD_PATTERN = re.compile(r"^(.*)\s+(?:en|in)\s+(.+)$", re.IGNORECASE)
+
+
+@dataclass
+class Entry:
+    header: List[str]
+    body: List[str] = field(default_factory=list)
+    start_date: Optional[str] = None
+    end_date: Optional[str] = None
+
+
+def heading_of(line: str) -> Optional[str]:
+    """Section of a heading line ("experience", "education", "other"), None for other lines."""
+    stripped = line.strip()
+    if not stripped or len(stripped) > HEADING_MAX_CHARS:
+        return None
+    key = fold(stripped).rstrip(" :.").replace("’", "'")
+    return HEADINGS.get(" ".join(key.split()))
+
+
+def find_sections(lines: List[str]) -> Dict[str, List[str]]:
+    """
+    Lines of the first experience and education sections, found by their heading line.
+
+    Returns:
+        {"experience": [...], "education": [...]} (sections without a heading are absent)
+    """
+    sections: Dict[str, List[str]] = {}
+    current: Optional[str] = None
+    for line in lines:
+        heading = heading_of(line)
+        if heading is not None:
+            current = heading if heading != "other" and heading not in sections else None
+            if current:
+                sections[current] = []
+            continue
+        if current:
+            sections[current].append(line)
+    return sections
+
+
+def _is_bullet(line: str) -> bool:
+    return bool(BULLET_PATTERN.match(line))
+
+
+def _is_sentence(stripped: str) -> bool:
+    # "Hooli Inc." ends with a period but is not a sentence
+    return stripped.endswith(".") and stripped.rsplit(None, 1)[-1].rstrip(".").lower() not in COMPANY_WORDS
+
+
+def _is_header_line(line: str) -> bool:
+    stripped = line.strip()
+    return bool(stripped) and len(stripped) <= HEADER_MAX_CHARS and not _is_bullet(line) and not _is_sentence(stripped)
+
+
+def _header_text(line: str) -> str:
+    """Header line without its dates and the range separators left around them."""
+    text = strip_dates(line)
+    return "" if LEFTOVER_PATTERN.match(text) else TRIM_PATTERN.sub("", text)
+
+
+def _reads_like_header(text: str) -> bool:
+    """Whether the text of a line (dates removed) is a header, not a description sentence."""
+    words = text.split()
+    if not words:
+        return True
+    if len(words) > HEADER_MAX_WORDS:
+        return False
+    if _words(text) & KNOWN_WORDS:
+        return True
+    if "%" in text or VERB_PATTERN.match(words[0]) or fold(words[-1]) in CONNECTOR_WORDS:
+        return False
+    # Headers are mostly capitalized names; sentences are mostly lowercase words
+    lowercase = [word for word in words if word[0].islower() and fold(word) not in CONNECTOR_WORDS]
+    return len(lowercase) < 2
+
+
+def _is_anchor(line: str) -> bool:
+    return _is_header_line(line) and has_date(line) and _reads_like_header(_header_text(line))
+
+
+def _joins_header(line: str, header: List[str]) -> bool:
+    """Whether a neighbouring undated line completes ``header`` (not yet two pieces)."""
+    return _is_header_line(line) and not has_date(line) and _reads_like_header(line.strip()) \
+        and len([piece for piece in _pieces(header) if not _is_place(piece)]) < 2
+
+
+def segment_entries(lines: List[str]) -> List[Entry]:
+    """Split the lines of a section into dated entries (header lines, body lines, period)."""
+    anchors = [i for i, line in enumerate(lines) if _is_anchor(line)]
+    entries: List[Entry] = []
+    spans: List[Tuple[int, int]] = []  # (first header line, last header line) of each entry
+    previous = -1
+    for position, anchor in enumerate(anchors):
+        first = anchor
+        while first - 1 > previous and anchor - (first - 1) <= HEADER_LOOKBACK \
+                and _joins_header(lines[first - 1], lines[first:anchor + 1]):
+            first -= 1
+        last = anchor
+        if first == anchor and not _header_text(lines[anchor]):
+            # Date-only line on top: the header follows it
+            limit = anchors[position + 1] if position + 1 < len(anchors) else len(lines)
+            while last + 1 < limit and last - anchor < HEADER_LOOKBACK \
+                    and _joins_header(lines[last + 1], lines[anchor:last + 1]):
+                last += 1
+        start_date, end_date = parse_period(lines[anchor])
+        entries.append(Entry(header=lines[first:last + 1], start_date=start_date, end_date=end_date))
+        spans.append((first, last))
+        previous = last
+
+    for position, (entry, (_, last)) in enumerate(zip(entries, spans)):
+        end = spans[position + 1][0] if position + 1 < len(spans) else len(lines)
+        entry.body = [line for line in lines[last + 1:end] if line.strip()]
+    return entries
+
+
+def _pieces(header: List[str]) -> List[str]:
+    pieces = []
+    for line in header:
+        for piece in PIECE_SPLIT_PATTERN.split(_header_text(line)):
+            piece = TRIM_PATTERN.sub("", piece)
+            if piece and not LEFTOVER_PATTERN.match(piece):
+                pieces.append(piece)
+    return pieces
+
+
+def _words(piece: str) -> set:
+    return set(WORD_PATTERN.findall(fold(piece)))
+
+
+def _is_place(piece: str) -> bool:
+    words = _words(piece)
+    # "Université de Lyon" is a school, "Paris, France" a place
+    if words & (SCHOOL_WORDS | COMPANY_WORDS | ROLE_WORDS | DEGREE_WORDS):
+        return False
+    return fold(piece) in PLACE_WORDS or (len(piece.split()) <= 3 and bool(words & PLACE_WORDS))
+
+
+def _take(pieces: List[str], words: set) -> Optional[str]:
+    for index, piece in enumerate(pieces):
+        if _words(piece) & words:
+            return pieces.pop(index)
+    return None
+
+
+def _split_place(pieces: List[str], body: List[str]) -> Tuple[List[str], Optional[str]]:
+    """Header pieces without the location, and the location (header or first body line)."""
+    places = [piece for piece in pieces if _is_place(piece)]
+    rest = [piece for piece in pieces if not _is_place(piece)]
+    if not places and body and not _is_bullet(body[0]):
+        line_pieces = [TRIM_PATTERN.sub("", piece) for piece in PIECE_SPLIT_PATTERN.split(body[0])]
+        if line_pieces and all(_is_place(piece) for piece in line_pieces if piece):
+            places = [piece for piece in line_pieces if piece]
+            body.pop(0)
+    return rest, ", ".join(places) or None
+
+
+def _description(body: List[str]) -> Optional[str]:
+    lines = [BULLET_PATTERN.sub("", line).strip() for line in body]
+    return "\n".join(line for line in lines if line) or None
+
+
+def experience_items(lines: List[str]) -> List[dict]:
+    """``ExperienceItem``-shaped dicts of the dated entries of an experience section."""
+    items = []
+    for entry in segment_entries(lines):
+        body = list(entry.body)
+        pieces, location = _split_place(_pieces(entry.header), body)
+        role = _take(pieces, ROLE_WORDS)
+        company = _take(pieces, COMPANY_WORDS)
+        # Unclassified pieces: "Company - Role" is the most common order
+        if company is None and pieces:
+            company = pieces.pop(0)
+        if role is None and pieces:
+            role = pieces.pop(0)
+        items.append({
+            "company": company,
+            "role": role,
+            "start_date": entry.start_date,
+            "end_date": entry.end_date,
+            "description": _description(body),
+            "location": location,
+        })
+    return items
+
+
+def education_items(lines: List[str]) -> List[dict]:
+    """``EducationItem``-shaped dicts of the dated entries of an education section."""
+    items = []
+    for entry in segment_entries(lines):
+        body = list(entry.body)
+        pieces, location = _split_place(_pieces(entry.header), body)
+        school = _take(pieces, SCHOOL_WORDS)
+        degree = _take(pieces, DEGREE_WORDS)
+        if degree is None and pieces:
+            degree = pieces.pop(0)
+        if school is None and pieces:
+            school = pieces.pop(0)
+        field_name = pieces.pop(0) if pieces else None
+        if degree and field_name is None:
+            match = FIELD_PATTERN.match(degree)
+            if match and _words(match.group(1)) & DEGREE_WORDS:
+                degree, field_name = match.group(1).strip(), match.group(2).strip()
+        items.append({
+            "school": school,
+            "degree": degree,
+            "field": field_name,
+            "start_date": entry.start_date,
+            "end_date": entry.end_date,
+            "location": location,
+        })
+    return items
@@ -0,0 +1,230 @@
+"""
+Zero-copy handoff of uploaded PDFs to the worker processes.
+
+Submitting ``file_data`` to a ProcessPoolExecutor pickles the whole upload,
+pushes it through a pipe, unpickles it in the worker and copies it once more
+into ``io.BytesIO``; OCR did that once per scanned page. Instead, an upload is
+written once into a spool file on a memory-backed filesystem
+(SHARED_BUFFER_DIR, ``/dev/shm`` when available) and only a small
+``SpooledDocument`` handle (path + size) crosses the process boundary. The
+worker maps the file read-only (pdfplumber/pdfminer read the mapping) or
+hands its path to pdfium/PyMuPDF, which open it themselves.
+
+Lifecycle: ``shared_document(file_data)`` unlinks the spool file when the
+block exits, whether the work completed, failed, timed out or was cancelled.
+A worker still reading keeps its mapping valid until it is done (POSIX
+unlink semantics); a worker starting after the unlink fails a task whose
+result nobody waits for anymore. Spool files left by a killed API process
+(``cv-spool-<pid>-*``) are removed on the first spool of the next one.
+
+Uploads under SHARED_BUFFER_MIN_BYTES are still pickled (cheaper than a
+file), and a full or missing spool directory falls back to pickling too.
+
+Benchmark (pickled transfer vs spool handoff):
+    python shared_buffers.py [size_mb] [documents] [workers]
+"""
+import io
+import logging
+import mmap
+import os
+import sys
+import tempfile
+import threading
+import time
+from contextlib import contextmanager
+from dataclasses import dataclass
+from typing import Iterator, Tuple, Union
+
+logger = logging.getLogger("fastapi-cv-parser")
+
+SHARED_BUFFERS_ENABLED = os.getenv("SHARED_BUFFERS_ENABLED", "true").lower() == "true"
+SHARED_BUFFER_MIN_BYTES = int(os.getenv("SHARED_BUFFER_MIN_BYTES", str(64 * 1024)))
+SHARED_BUFFER_DIR = os.getenv(
+    "SHARED_BUFFER_DIR", "/dev/shm" if os.access("/dev/shm", os.W_OK) else tempfile.gettempdir()
+)
+
+SPOOL_PREFIX = "cv-spool-"
+
+
+@dataclass(frozen=True)
+class SpooledDocument:
+    """Picklable handle of an upload spooled to SHARED_BUFFER_DIR."""
+
+    path: str
+    size: int
+
+
+# What a worker task receives: the raw bytes (pickled) or a spool handle
+DocumentSource = Union[bytes, SpooledDocument]
+
+
+class SharedBuffers:
+    """Creates and releases spool files, with counters for /stats/pdf-workers."""
+
+    def __init__(self, directory: str = SHARED_BUFFER_DIR, min_bytes: int = SHARED_BUFFER_MIN_BYTES) -> None:
+        self.directory = directory
+        self.min_bytes = min_bytes
+        self._lock = threading.Lock()
+        self._swept = False
+        self.spooled = 0
+        self.spooled_bytes = 0
+        self.pickled = 0
+        self.fallbacks = 0
+        self.live = 0
+
+    def _sweep_stale(self) -> None:
+        """Remove spool files of API processes that no longer exist."""
+        self._swept = True
+        try:
+            names = os.listdir(self.directory)
+        except OSError:
+            return
+        for name in names:
+            if not name.startswith(SPOOL_PREFIX):
+                continue
+            pid = name[len(SPOOL_PREFIX):].split("-", 1)[0]
+            if not pid.isdigit() or int(pid) == os.getpid():
+                continue
+            try:
+                os.kill(int(pid), 0)
+            except ProcessLookupError:
+                try:
+                    os.unlink(os.path.join(self.directory, name))
+                except OSError:
+                    pass
+            except OSError:  # alive, owned by another user
+                pass
+
+    def spool(self, file_data: bytes) -> DocumentSource:
+        """``file_data`` written once to a spool file, or returned as is when it should be pickled."""
+        if not SHARED_BUFFERS_ENABLED or len(file_data) < self.min_bytes:
+            with self._lock:
+                self.pickled += 1
+            return file_data
+        if not self._swept:
+            self._sweep_stale()
+        try:
+            fd, path = tempfile.mkstemp(prefix=f"{SPOOL_PREFIX}{os.getpid()}-", suffix=".pdf", dir=self.directory)
+        except OSError as e:
+            return self._fallback(file_data, e)
+        try:
+            with os.fdopen(fd, "wb") as spool:
+                spool.write(file_data)
+        except OSError as e:  # e.g. /dev/shm full
+            _unlink(path)
+            return self._fallback(file_data, e)
+        with self._lock:
+            self.spooled += 1
+            self.spooled_bytes += len(file_data)
+            self.live += 1
+        return SpooledDocument(path, len(file_data))
+
+    def _fallback(self, file_data: bytes, error: OSError) -> bytes:
+        logger.warning(f"Cannot spool upload to {self.directory} ({error}), pickling it instead")
+        with self._lock:
+            self.fallbacks += 1
+        return file_data
+
+    def release(self, source: DocumentSource) -> None:
+        if isinstance(source, SpooledDocument):
+            _unlink(source.path)
+            with self._lock:
+                self.live -= 1
+
+    def stats(self) -> dict:
+        return {
+            "directory": self.directory,
+            "spooled": self.spooled,
+            "spooled_mb": round(self.spooled_bytes / 1024 / 1024, 1),
+            "pickled": self.pickled,
+            "fallbacks": self.fallbacks,
+            "live": self.live,
+        }
+
+
+def _unlink(path: str) -> None:
+    try:
+        os.unlink(path)
+    except OSError:
+        pass
+
+
+shared_buffers = SharedBuffers()
+
+
+@contextmanager
+def shared_document(file_data: bytes) -> Iterator[DocumentSource]:
+    """Spool ``file_data`` for the worker tasks submitted in the block; released on exit."""
+    source = shared_buffers.spool(file_data)
+    try:
+        yield source
+    finally:
+        shared_buffers.release(source)
+
+
+@contextmanager
+def attach(source: DocumentSource) -> Iterator[Tuple[io.RawIOBase, Union[bytes, str]]]:
+    """
+    Worker side: ``(stream, data)`` for a document source.
+
+    ``stream`` is a seekable file object for pdfplumber (a read-only mapping
+    of the spool file, or ``io.BytesIO`` over pickled bytes); ``data`` is what
+    the text engines open (the spool path, or the bytes).
+    """
+    if not isinstance(source, SpooledDocument):
+        yield io.BytesIO(source), source
+        return
+    with open(source.path, "rb") as spool:
+        mapping = mmap.mmap(spool.fileno(), 0, access=mmap.ACCESS_READ)
+    try:
+        yield mapping, source.path
+    finally:
+        mapping.close()
+
+
+def _touch(source: DocumentSource) -> int:
+    """Benchmark task: open the document like extract_document and read every page of it."""
+    with attach(source) as (stream, _):
+        checksum = 0
+        while True:
+            chunk = stream.read(mmap.PAGESIZE * 16)
+            if not chunk:
+                return checksum
+            checksum += chunk[0]
+
+
+def benchmark(size_mb: float, documents: int, workers: int) -> dict:
+    """Handoff time per document of pickled bytes vs spool files, through a spawn process pool."""
+    import multiprocessing
+    from concurrent.futures import ProcessPoolExecutor
+
+    file_data = os.urandom(int(size_mb * 1024 * 1024))
+    results = {}
+    with ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context("spawn")) as pool:
+        list(pool.map(_touch, [b"warm-up"] * workers))
+        for mode in ("pickled", "spooled"):
+            start = time.perf_counter()
+            if mode == "pickled":
+                list(pool.map(_touch, [file_data] * documents))
+            else:
+                sources = [shared_buffers.spool(file_data) for _ in range(documents)]
+                try:
+                    list(pool.map(_touch, sources))
+                finally:
+                    for source in sources:
+                        shared_buffers.release(source)
+            results[mode] = round((time.perf_counter() - start) * 1000 / documents, 2)
+    return results
+
+
+if __name__ == "__main__":
+    size_mb = float(sys.argv[1]) if len(sys.argv) > 1 else 8
+    documents = int(sys.argv[2]) if len(sys.argv) > 2 else 100
+    workers = int(sys.argv[3]) if len(sys.argv) > 3 else 4
+    if size_mb <= 0 or documents <= 0 or workers <= 0:
+        print("Usage: python shared_buffers.py [size_mb] [documents] [workers]")
+        sys.exit(1)
+    results = benchmark(size_mb, documents, workers)
+    print(f"{documents} documents de {size_mb} Mo, {workers} workers ({SHARED_BUFFER_DIR}):")
+    for mode, ms in results.items():
+        print(f"  {mode:8s} {ms:8.2f} ms/document")
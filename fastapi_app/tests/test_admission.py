@@ -0,0 +1,107 @@
+import asyncio
+
+import pytest
+
+from fastapi_app.admission import AdmissionController, AdmissionRejected, PdfInspection, cost_class, inspect_pdf
+
+
+def _scan_pdf() -> bytes:
+    # One page showing a 1x1 image, no font: a scan without text layer
+    content = b"q 100 0 0 100 0 0 cm /Im1 Do Q"
+    objects = [
+        b"<< /Type /Catalog /Pages 2 0 R >>",
+        b"<< /Type /Pages /Kids [3 0 R] /Count 1 >>",
+        b"<< /Type /Page /Parent 2 0 R /MediaBox [0 0 612 842] "
+        b"/Resources << /XObject << /Im1 4 0 R >> >> /Contents 5 0 R >>",
+        b"<< /Type /XObject /Subtype /Image /Width 1 /Height 1 /ColorSpace /DeviceGray "
+        b"/BitsPerComponent 8 /Length 1 >>\nstream\n\x00\nendstream",
+        b"<< /Length %d >>\nstream\n%s\nendstream" % (len(content), content),
+    ]
+    out = b"%PDF-1.4\n"
+    offsets = []
+    for number, body in enumerate(objects, 1):
+        offsets.append(len(out))
+        out += b"%d 0 obj\n%s\nendobj\n" % (number, body)
+    xref = len(out)
+    out += b"xref\n0 6\n0000000000 65535 f \n" + b"".join(b"%010d 00000 n \n" % offset for offset in offsets)
+    return out + b"trailer\n<< /Size 6 /Root 1 0 R >>\nstartxref\n%d\n%%%%EOF" % xref
+
+
+def test_text_pdf_is_light_and_local(text_pdf):
+    inspection = inspect_pdf(text_pdf([["Jean Dupont"], ["Python"]]))
+
+    assert (inspection.pages, inspection.text_pages, inspection.image_pages) == (2, 2, 0)
+    assert inspection.objects > 0
+    assert inspection.cost_class == "light"
+    assert inspection.route == "local"
+    assert inspection.error is None
+
+
+def test_scan_costs_ocr_or_routes_external():
+    with_ocr = inspect_pdf(_scan_pdf(), ocr=True)
+    without_ocr = inspect_pdf(_scan_pdf(), ocr=False)
+
+    assert with_ocr.image_only
+    assert with_ocr.cost > without_ocr.cost
+    assert (with_ocr.route, without_ocr.route) == ("local", "external")
+
+
+def test_malformed_pdf_is_admitted_on_file_size():
+    inspection = inspect_pdf(b"%PDF-1.4\n1 0 obj<<>>endobj\ntrailer<<>>\nstartxref\n0\n%%EOF")
+
+    assert inspection.error
+    assert inspection.cost_class == "light"
+
+
+def test_oversize_is_rejected_before_work():
+    assert cost_class(10, pages=1000) == "oversize"
+    with pytest.raises(AdmissionRejected) as excinfo:
+        asyncio.run(AdmissionController().acquire(PdfInspection(pages=1000, cost=1000, cost_class="oversize")))
+    assert excinfo.value.status_code == 413
+
+
+def test_requests_queue_for_capacity_then_give_up():
+    async def scenario():
+        controller = AdmissionController(capacity=10, queue_seconds=0.2)
+        first = PdfInspection(cost=8, cost_class="standard")
+        await controller.acquire(first)
+
+        # Waits for the first document, admitted once it is released
+        queued = asyncio.ensure_future(controller.acquire(PdfInspection(cost=5, cost_class="light")))
+        await asyncio.sleep(0.05)
+        assert controller.waiting == 1
+        await controller.release(first)
+        await queued
+
+        # No capacity within queue_seconds: 503
+        with pytest.raises(AdmissionRejected) as excinfo:
+            await controller.acquire(PdfInspection(cost=6, cost_class="light"))
+        assert excinfo.value.status_code == 503
+        return controller.stats()
+
+    stats = asyncio.run(scenario())
+    assert stats["classes"]["light"] == {"admitted": 1, "queued": 2, "rejected": 1, "completed": 0, "avg_ms": 0.0}
+    assert stats["classes"]["standard"]["completed"] == 1
+
+
+@pytest.mark.parametrize("failure", [RuntimeError("admission broken"), asyncio.CancelledError()])
+def test_scheduler_slot_is_released_when_admission_fails(monkeypatch, text_pdf, failure):
+    from fastapi_app import main
+    from fastapi_app.pdf_worker import PdfWorkerPool
+    from fastapi_app.scheduler import FairScheduler, WorkTicket
+
+    monkeypatch.setattr(main, "pdf_pool", PdfWorkerPool(workers=0))
+    monkeypatch.setattr(main, "scheduler", FairScheduler(queue_seconds=1))
+
+    async def failing_acquire(inspection):
+        raise failure
+
+    monkeypatch.setattr(main.admission, "acquire", failing_acquire)
+
+    async def scenario():
+        with pytest.raises(type(failure)):
+            await main.admit_document(None, text_pdf([["Jean Dupont"]]), work=WorkTicket("acme"))
+        return main.scheduler.stats()["backends"]["local"]["classes"]["interactive"]
+
+    classes = asyncio.run(scenario())
+    assert (classes["granted"], classes["running"]) == (1, 0)
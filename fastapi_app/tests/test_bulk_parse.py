@@ -0,0 +1,75 @@
+import json
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+
+from fastapi_app import bulk_parse as bulk_parse_module
+from fastapi_app.bulk_parse import bulk_parse, load_checkpoint, percentile
+
+
+def test_bulk_parse_writes_jsonl_and_resumes(tmp_path, text_pdf):
+    archive = tmp_path / "archive"
+    (archive / "2019").mkdir(parents=True)
+    (archive / "a.pdf").write_bytes(text_pdf([["Jean Dupont", "jean@example.com"]]))
+    (archive / "2019" / "b.PDF").write_bytes(text_pdf([["Marie Curie", "marie@example.com"]]))
+    (archive / "broken.pdf").write_bytes(b"%PDF-1.4 not a pdf")
+    (archive / "notes.txt").write_text("ignored")
+    output = tmp_path / "out" / "cvs.jsonl"
+
+    summary = bulk_parse(archive, output, max_workers=1)
+
+    assert (summary["documents"], summary["parsed"], summary["failed"], summary["skipped"]) == (3, 2, 1, 0)
+    assert summary["p50_ms"] > 0
+    records = {record["path"]: record for record in map(json.loads, output.read_text().splitlines())}
+    assert records["a.pdf"]["cv"]["personal"]["email"] == "jean@example.com"
+    assert "error" in records["broken.pdf"]
+
+    # Already written paths are skipped; a truncated last line is ignored
+    with output.open("a") as out:
+        out.write('{"path": "trunc')
+    assert load_checkpoint(output) == {"a.pdf", "2019/b.PDF", "broken.pdf"}
+    assert bulk_parse(archive, output, max_workers=1)["skipped"] == 3
+
+
+def test_percentile():
+    assert percentile([], 50) == 0.0
+    assert percentile([10, 20, 30, 40], 50) == 20
+    assert percentile(list(range(1, 101)), 99) == 99
+
+
+class FakeBrokenPool:
+    """Thread pool where parsing ``killer.pdf`` breaks the pool and every document in flight with it."""
+
+    def __init__(self, max_workers):
+        self.executor = ThreadPoolExecutor(max_workers)
+        self.broken = threading.Event()
+
+    def submit(self, fn, path, root):
+        return self.executor.submit(self._parse, path, root)
+
+    def _parse(self, path, root):
+        if path.endswith("killer.pdf"):
+            self.broken.set()
+        if self.broken.wait(0.2):
+            raise BrokenProcessPool("worker died")
+        return {"path": os.path.relpath(path, root), "sha256": None, "ms": 1.0, "cv": {}}
+
+    def shutdown(self, wait=True, cancel_futures=False):
+        self.executor.shutdown(wait=False, cancel_futures=cancel_futures)
+
+
+def test_only_the_document_killing_a_worker_alone_fails(monkeypatch, tmp_path):
+    monkeypatch.setattr(bulk_parse_module, "_new_pool", FakeBrokenPool)
+    archive = tmp_path / "archive"
+    archive.mkdir()
+    for name in ("a.pdf", "killer.pdf", "c.pdf"):
+        (archive / name).write_bytes(b"%PDF-1.4")
+    output = tmp_path / "cvs.jsonl"
+
+    summary = bulk_parse(archive, output, max_workers=2)
+
+    records = {record["path"]: record for record in map(json.loads, output.read_text().splitlines())}
+    assert (summary["parsed"], summary["failed"]) == (2, 1)
+    assert sorted(records) == ["a.pdf", "c.pdf", "killer.pdf"]
+    assert "error" in records["killer.pdf"] and "cv" in records["a.pdf"]
@@ -0,0 +1,84 @@
+import asyncio
+import threading
+import time
+
+from fastapi_app.coalescing import SingleFlight, document_hash, flight_key
+from fastapi_app.deadline import Deadline
+
+
+def test_concurrent_identical_calls_share_one_computation():
+    flight = SingleFlight()
+    calls = []
+    lock = threading.Lock()
+
+    def slow_parse(data: bytes) -> dict:
+        with lock:
+            calls.append(data)
+        time.sleep(0.05)
+        return {"size": len(data)}
+
+    async def run():
+        key = (document_hash(b"cv"), "local")
+        return await asyncio.gather(*[flight.do(key, slow_parse, b"cv") for _ in range(5)])
+
+    results = asyncio.run(run())
+
+    assert len(calls) == 1
+    assert all(result == {"size": 2} for result, _ in results)
+    assert sum(1 for _, shared in results if shared) == 4
+    assert flight.stats()["in_flight"] == 0
+
+
+def test_different_backends_do_not_share():
+    flight = SingleFlight()
+
+    async def run():
+        digest = document_hash(b"cv")
+        return await asyncio.gather(
+            flight.do((digest, "local"), lambda: "local"),
+            flight.do((digest, "ollama"), lambda: "ollama"),
+        )
+
+    results = asyncio.run(run())
+
+    assert [result for result, _ in results] == ["local", "ollama"]
+    assert flight.stats()["started"] == 2
+
+
+def test_exception_is_propagated_to_all_waiters():
+    flight = SingleFlight()
+
+    def failing():
+        time.sleep(0.02)
+        raise ValueError("boom")
+
+    async def run():
+        return await asyncio.gather(
+            *[flight.do("key", failing) for _ in range(3)], return_exceptions=True
+        )
+
+    results = asyncio.run(run())
+
+    assert all(isinstance(r, ValueError) for r in results)
+    assert flight.stats()["started"] == 1
+
+
+def test_joiners_share_the_first_callers_deadline_only_with_the_same_budget():
+    flight = SingleFlight()
+
+    def parse(deadline):
+        time.sleep(0.05)
+        return deadline.seconds
+
+    async def run():
+        short, long, same = Deadline(5), Deadline(120), Deadline(5)
+        return await asyncio.gather(*[
+            flight.do(flight_key(b"cv", "ollama", "acme", deadline), parse, deadline)
+            for deadline in (short, long, same)
+        ])
+
+    results = asyncio.run(run())
+
+    # The long-timeout request runs under its own deadline, the same-budget one joins
+    assert [(result, shared) for result, shared in results] == [(5, False), (120, False), (5, True)]
+    assert flight_key(b"cv", "ollama", "acme") != flight_key(b"cv", "ollama", "globex")
@@ -0,0 +1,46 @@
+import pytest
+
+from fastapi_app.columnar_export import export_columnar, flatten_cv
+
+CV = {
+    "personal": {"full_name": "Jane Doe", "email": "jane@example.com"},
+    "profile": {"title": "Software Engineer"},
+    "skills": {"technical": ["Python", "Docker"], "soft": []},
+    "experience": [{"company": "ACME Corp", "role": "Backend Engineer"}, {"company": "Initech"}],
+    "education": [],
+    "languages": [{"name": "French", "level": "Native"}],
+}
+
+
+def test_flatten_cv_keys_child_tables_by_document():
+    rows = flatten_cv("abc", CV, "2019/jane.pdf")
+
+    document = rows["documents"][0]
+    assert document["email"] == "jane@example.com"
+    assert document["technical_skills"] == ["Python", "Docker"]
+    assert (document["experience_count"], document["education_count"], document["languages_count"]) == (2, 0, 1)
+    assert [(row["document_id"], row["position"], row["company"]) for row in rows["experience"]] == [
+        ("abc", 0, "ACME Corp"), ("abc", 1, "Initech")
+    ]
+    assert rows["education"] == []
+
+
+@pytest.mark.parametrize("export_format", ["parquet", "arrow"])
+def test_export_writes_bounded_row_groups(tmp_path, export_format):
+    pyarrow = pytest.importorskip("pyarrow")
+    import pyarrow.ipc
+    import pyarrow.parquet
+
+    documents = ((f"doc{i}", CV, None) for i in range(5))
+    report = export_columnar(documents, tmp_path, export_format, row_group_size=2)
+
+    assert report["documents"] == 5
+    assert report["tables"]["documents"]["row_groups"] == 3
+    assert report["tables"]["experience"]["rows"] == 10
+    path = report["tables"]["experience"]["path"]
+    if export_format == "parquet":
+        table = pyarrow.parquet.read_table(path)
+    else:
+        table = pyarrow.ipc.open_file(path).read_all()
+    assert table.num_rows == 10
+    assert set(table.column("document_id").to_pylist()) == {f"doc{i}" for i in range(5)}
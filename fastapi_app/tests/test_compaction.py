@@ -0,0 +1,48 @@
+from fastapi_app.compaction import compact_pages, context_size, count_tokens, truncate_to_budget
+
+
+def test_compact_pages_drops_repeated_footers_and_page_numbers():
+    pages = [
+        "Jane Doe\nExperience\nDeveloper at Acme\nJane Doe - CV - page 1\n1",
+        "Jane Doe\nEducation\nMaster in Computer Sci-\nence\nJane Doe - CV - page 2\n2 / 2",
+    ]
+
+    text, stats = compact_pages(pages)
+
+    assert text.count("Jane Doe\n") == 1
+    assert "page 2" not in text
+    assert "\n2 / 2" not in text
+    assert "Computer Science" in text
+    assert stats["compacted_chars"] < stats["raw_chars"]
+
+
+def test_date_lines_in_the_body_survive():
+    pages = [
+        "Jane Doe\nDeveloper at Acme\n2016 - 2017\nPython\nLead at Initech\n2014 - 2015\nJava\nTeam work\nJane Doe - page 1",
+        "Jane Doe\nAnalyst at Hooli\n2012 - 2014\nSQL\nIntern at Acme\n2014 - 2015\nExcel\nReporting\nJane Doe - page 2",
+    ]
+
+    text, _ = compact_pages(pages)
+
+    for period in ("2016 - 2017", "2012 - 2014"):
+        assert period in text
+    # Repeated in the body of both pages, not a header or footer
+    assert text.count("2014 - 2015") == 2
+    assert "page 2" not in text
+
+
+def test_truncate_to_budget_keeps_head_and_tail():
+    text = "header " + "filler " * 2000 + "skills"
+
+    truncated = truncate_to_budget(text, budget=200)
+
+    assert truncated.startswith("header")
+    assert truncated.endswith("skills")
+    assert "[... texte tronqué ...]" in truncated
+    assert count_tokens(truncated) <= 220
+
+
+def test_context_size_is_rounded_and_clamped():
+    assert context_size(100, 100) == 2048
+    assert context_size(3000, 1500) == 5120
+    assert context_size(50000, 1500) == 8192
@@ -0,0 +1,67 @@
+from fastapi_app.confidence import merge_sections, score_fields, weak_sections
+
+
+LOCAL_RESULT = {
+    "personal": {"full_name": "Jane Doe", "email": "jane@example.com", "phone": "+33 6 12 34 56 78"},
+    "profile": {"title": "Backend Developer", "summary": "Backend engineer with Python experience."},
+    "skills": ["Python", "Docker", "Git", "Linux", "SQL"],
+    "experience": [{"company": "ACME Corp", "role": "Backend Engineer"}],
+    "education": [],
+    "languages": [],
+}
+
+
+def test_only_incomplete_sections_are_weak():
+    scores = score_fields(LOCAL_RESULT)
+
+    assert scores["personal"] == 1.0
+    assert scores["skills"] == 1.0
+    # Company and role are enough for an experience: dates and description are a bonus
+    assert scores["experience"] == 1.0
+    assert weak_sections(scores, threshold=0.6) == ["education", "languages"]
+
+
+def test_merge_keeps_local_values_for_empty_upgrades():
+    upgrade = {
+        "experience": [{"company": "ACME Corp", "role": "Backend Engineer", "start_date": "2020-01"}],
+        "languages": [],
+    }
+
+    merged = merge_sections(LOCAL_RESULT, upgrade, ["experience", "languages"])
+
+    assert merged["experience"][0]["start_date"] == "2020-01"
+    assert merged["languages"] == []
+    assert merged["skills"] == LOCAL_RESULT["skills"]
+
+
+NORMAL_CV = """Jane Doe
+Backend Developer
+jane.doe@example.com
++33612345678
+
+Experience
+Backend Engineer - ACME Corp
+2020 - Present
+Payment Developer - Beta Bank
+2017 - 2019
+
+Education
+Master of Computer Science - University of Lyon
+2015 - 2017
+
+Skills
+Python, FastAPI, PostgreSQL, Docker, Git, Linux
+"""
+
+
+def test_normal_cv_is_not_escalated():
+    from fastapi_app.extractors import assemble_result, run_extractors
+    from fastapi_app.text_index import TextIndex
+
+    result = assemble_result(run_extractors(TextIndex(NORMAL_CV))[0])
+    scores = score_fields(result, NORMAL_CV)
+
+    # No summary and no languages section in this CV: nothing to escalate
+    assert weak_sections(scores) == [], scores
+    # Without the text, the missing languages section is still weak
+    assert "languages" in weak_sections(score_fields(result))
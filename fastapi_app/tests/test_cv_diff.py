@@ -0,0 +1,40 @@
+import copy
+
+from fastapi_app.cv_diff import apply_diff, diff_cv
+
+
+LOCAL_CV = {
+    "personal": {"full_name": "Jane Doe", "email": None},
+    "skills": {"technical": ["Python"], "soft": []},
+    "experience": [
+        {"company": "ACME", "role": None, "start_date": "2020"},
+        {"company": "Initech", "role": "Dev", "start_date": None},
+    ],
+    "languages": [],
+}
+
+
+def test_diff_only_contains_changed_fields():
+    upgraded = copy.deepcopy(LOCAL_CV)
+    upgraded["personal"]["email"] = "jane@example.com"
+    upgraded["experience"][0]["role"] = "Backend Engineer"
+
+    ops = diff_cv(LOCAL_CV, upgraded)
+
+    assert ops == [
+        {"op": "replace", "path": "/personal/email", "value": "jane@example.com"},
+        {"op": "replace", "path": "/experience/0/role", "value": "Backend Engineer"},
+    ]
+
+
+def test_diff_round_trips_added_and_removed_items():
+    upgraded = copy.deepcopy(LOCAL_CV)
+    upgraded["skills"]["technical"] = ["Python", "Docker"]
+    upgraded["experience"] = [{"company": "ACME Corp", "role": "Backend Engineer", "start_date": "2020"}]
+    upgraded["languages"] = [{"name": "French", "level": "Native"}]
+
+    ops = diff_cv(LOCAL_CV, upgraded)
+
+    assert {"op": "remove", "path": "/experience/1"} in ops
+    assert apply_diff(copy.deepcopy(LOCAL_CV), ops) == upgraded
+    assert diff_cv(upgraded, upgraded) == []
@@ -0,0 +1,87 @@
+import pytest
+
+from fastapi_app.cv_store import CVStore, QuerySyntaxError, check_search_token, cv_terms, parse_query
+
+
+def _cv(skills, title=None, company=None, address=None):
+    return {
+        "personal": {"address": address},
+        "profile": {"title": title},
+        "skills": {"technical": skills, "soft": []},
+        "experience": [{"company": company, "role": title}] if company else [],
+        "education": [],
+        "languages": [],
+    }
+
+
+@pytest.fixture
+def store(tmp_path):
+    store = CVStore(tmp_path / "cvs.sqlite3")
+    store.add("jane", _cv(["Python", "Docker"], "Backend Engineer", "ACME Corp.", "Paris, France"))
+    store.add("john", _cv(["Python", "Java"], "Data Engineer", "Initech", "Lyon, France"))
+    store.add("lea", _cv(["Docker", "Kubernetes"], "DevOps", "Acme", "Montréal"))
+    return store
+
+
+def _ids(result):
+    return [item["document_id"] for item in result["results"]]
+
+
+def test_terms_are_normalized_per_field():
+    terms = cv_terms(_cv(["Node.js", "C++"], "Senior Développeur", "ACME Corp.", "Paris, France"))
+
+    assert {"skill:node.js", "skill:c++", "title:developpeur", "company:acme", "location:paris"} <= terms
+
+
+def test_boolean_queries(store):
+    assert _ids(store.search("skill:python skill:docker")) == ["jane"]
+    assert set(_ids(store.search("skill:python OR skill:kubernetes"))) == {"jane", "john", "lea"}
+    assert _ids(store.search("company:acme NOT location:paris")) == ["lea"]
+    assert _ids(store.search('location:montreal (title:devops OR skill:java)')) == ["lea"]
+    assert store.search("skill:rust")["total"] == 0
+
+
+def test_ranked_any_match_prefers_rarer_and_more_terms(store):
+    result = store.search("kubernetes docker python", default_operator="or")
+
+    assert _ids(result)[0] in ("jane", "lea")
+    assert result["results"][-1]["document_id"] == "john"
+    assert result["results"][0]["cv"]["skills"]["technical"]
+
+
+def test_updates_replace_terms_and_survive_reload(store, tmp_path):
+    store.add("john", _cv(["Go"], "Backend Engineer", "Initech", "Lyon"))
+
+    assert "john" not in _ids(store.search("skill:python"))
+    reloaded = CVStore(tmp_path / "cvs.sqlite3")
+    assert _ids(reloaded.search("skill:go")) == ["john"]
+    assert reloaded.stats()["documents"] == 3
+
+
+@pytest.mark.parametrize("query", ["", "skill:python AND", "(skill:python", "salary:100k", "OR docker"])
+def test_invalid_queries(query):
+    with pytest.raises(QuerySyntaxError):
+        parse_query(query)
+
+
+def test_search_token(monkeypatch):
+    monkeypatch.setattr("fastapi_app.cv_store.CV_STORE_TOKEN", None)
+    assert not check_search_token(None) and not check_search_token("")
+
+    monkeypatch.setattr("fastapi_app.cv_store.CV_STORE_TOKEN", "secret")
+    assert check_search_token("secret")
+    assert not check_search_token("guess") and not check_search_token(None)
+
+
+def test_search_endpoints_refuse_requests_without_the_token(monkeypatch, store):
+    from fastapi.testclient import TestClient
+
+    from fastapi_app import main
+
+    monkeypatch.setattr(main, "cv_store", store)
+    client = TestClient(main.app)
+
+    for path in ("/search?q=skill:python", "/stats/cv-store"):
+        response = client.get(path, headers={"X-Search-Token": "guess"})
+        assert response.status_code == 403
+        assert "Jane" not in response.text
@@ -0,0 +1,51 @@
+import pytest
+
+from fastapi_app.dates import normalize_date, normalize_period, parse_period
+from fastapi_app.extractors import extract_experience
+from fastapi_app.text_index import TextIndex
+
+
+@pytest.mark.parametrize("text, expected", [
+    ("Jan 2020 – Present", ("2020-01", "Present")),
+    ("janv. 2019 - aujourd’hui", ("2019-01", "Present")),
+    ("Sept 2018 – Oct 2019", ("2018-09", "2019-10")),
+    ("de Janvier 2020 à Mars 2021", ("2020-01", "2021-03")),
+    ("mars - juin 2019", ("2019-03", "2019-06")),
+    ("Été 2017", ("2017-06", None)),
+    ("Summer 2019 - Fall 2019", ("2019-06", "2019-09")),
+    ("2015-2018", ("2015", "2018")),
+    ("2020-01", ("2020-01", None)),
+    ("03/2020", ("2020-03", None)),
+    ("15/03/2020", ("2020-03", None)),
+    ("depuis mars 2021", ("2021-03", "Present")),
+    ("Feb 3, 2020 - Mar 5, 2021", ("2020-02", "2021-03")),
+    ("June 12 2019 - present", ("2019-06", "Present")),
+    ("June 12th, 2019", ("2019-06", None)),
+    ("Décembre 2019 à ce jour", ("2019-12", "Present")),
+    ("May", (None, None)),
+    ("", (None, None)),
+])
+def test_parse_period(text, expected):
+    assert parse_period(text) == expected
+
+
+def test_normalize_keeps_unparsable_values():
+    assert normalize_date("Février 2021") == "2021-02"
+    assert normalize_date("en cours") == "Present"
+    assert normalize_date("Q3") == "Q3"
+    assert normalize_date(None) is None
+
+
+def test_normalize_period_splits_single_field_ranges():
+    assert normalize_period("2018 - 2020", None) == ("2018", "2020")
+    assert normalize_period("Jan 2020", "current") == ("2020-01", "Present")
+    assert normalize_period(None, None, "2012 – 2014") == ("2012", "2014")
+
+
+def test_local_experience_gets_dates():
+    text = "Experience\nACME Corp - Backend Developer\nJan 2020 - Present\nInitech - Intern\n2018"
+
+    experience = extract_experience(TextIndex(text), {})
+
+    assert experience[0]["start_date"] == "2020-01"
+    assert experience[0]["end_date"] == "Present"
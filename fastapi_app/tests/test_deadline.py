@@ -0,0 +1,28 @@
+import pytest
+
+from fastapi_app.deadline import Deadline, DeadlineExceeded, stage_timeout
+
+
+def test_stage_timeout_is_capped_by_remaining_budget():
+    deadline = Deadline(10)
+
+    assert stage_timeout(None, "Ollama", 300) == 300
+    assert 9 < stage_timeout(deadline, "Ollama", 300) <= 10
+    assert stage_timeout(deadline, "HrFlow API", 5) == 5
+
+
+def test_expired_deadline_stops_the_next_stage():
+    deadline = Deadline(0.5)
+
+    with pytest.raises(DeadlineExceeded) as excinfo:
+        deadline.timeout("DocParserAI API", 60)
+    assert excinfo.value.stage == "DocParserAI API"
+
+
+def test_header_value_falls_back_to_default():
+    assert Deadline.from_header("12").seconds == 12
+    assert Deadline.from_header("abc").seconds == Deadline.from_header(None).seconds
+    assert Deadline.from_header("100000").seconds <= 600
+    for value in ("nan", "inf", "-inf"):
+        assert Deadline.from_header(value).seconds == Deadline.from_header(None).seconds
+        assert Deadline.from_header(value).remaining() > 0
@@ -0,0 +1,39 @@
+from fastapi_app.extractors import assemble_result, run_extractors
+from fastapi_app.text_index import TextIndex
+
+CV_TEXT = (
+    "Jane Doe\n"
+    "Senior Backend Developer\n"
+    "jane.doe@example.com\n"
+    "Professional Experience\n"
+    "ACME Corp - Backend Engineer\n"
+    "Education\n"
+    "Master of Computer Science\n"
+    "Languages\n"
+    "French: Native\n"
+    "English - C1\n"
+)
+
+
+def test_all_registered_extractors_run_and_are_timed():
+    outputs, timings = run_extractors(TextIndex(CV_TEXT), disabled=())
+
+    assert set(timings) == {
+        "contact", "name", "title", "summary", "experience", "education", "skills", "languages"
+    }
+    result = assemble_result(outputs)
+    assert result["personal"]["full_name"] == "Jane Doe"
+    assert result["personal"]["email"] == "jane.doe@example.com"
+    assert result["profile"]["title"] == "Senior Backend Developer"
+    assert result["languages"] == [
+        {"name": "French", "level": "Native"},
+        {"name": "English", "level": "C1"},
+    ]
+
+
+def test_disabled_extractors_are_skipped_and_dependents_still_run():
+    outputs, timings = run_extractors(TextIndex(CV_TEXT), disabled=("name", "languages"))
+
+    assert "name" not in timings and "languages" not in timings
+    assert outputs["title"] == "Senior Backend Developer"
+    assert assemble_result(outputs)["languages"] == []
@@ -0,0 +1,120 @@
+import random
+
+from fastapi_app.near_duplicates import LSHIndex, NearDuplicateDetector, minhash, similarity
+
+
+def _text(seed, words=400):
+    rng = random.Random(seed)
+    return " ".join(f"{rng.choice(['python', 'projet', 'client', 'paris', 'equipe'])}{rng.randrange(500)}" for _ in range(words))
+
+
+def _edited(text, start, count):
+    words = text.split()
+    return " ".join(words[:start] + [word + "x" for word in words[start:start + count]] + words[start + count:])
+
+
+def test_similarity_estimates_shared_shingles():
+    text = _text(1)
+
+    assert similarity(minhash(text), minhash(text.upper())) == 1.0
+    assert similarity(minhash(text), minhash(_edited(text, 100, 2))) > 0.95
+    assert similarity(minhash(text), minhash(_text(2))) < 0.1
+    assert minhash("") == ()
+
+
+def test_lsh_index_finds_near_duplicates_and_evicts_oldest():
+    index = LSHIndex(max_documents=2)
+    index.add(("t", "a"), minhash(_text(1)))
+    index.add(("t", "b"), minhash(_text(2)))
+
+    matches = index.query("t", minhash(_edited(_text(1), 10, 3)), 0.8)
+    assert [key for key, _ in matches] == ["a"]
+    assert index.query("t", minhash(_text(3)), 0.8) == []
+
+    index.add(("t", "c"), minhash(_text(3)))
+    assert len(index) == 2
+    assert index.query("t", minhash(_text(1)), 0.8) == []
+
+
+def test_detector_reuses_backend_result_above_threshold():
+    detector = NearDuplicateDetector(reuse=True)
+    original = _text(1)
+    detector.lookup("acme", "v1", original)
+    detector.remember("acme", "v1", "ollama:test", {"personal": {"full_name": "Jane"}})
+
+    report = detector.lookup("acme", "v2", _edited(original, 200, 1))
+    assert report["matches"][0][0] == "v1"
+    assert detector.reusable("acme", "v2", "ollama:test") == {"personal": {"full_name": "Jane"}}
+    assert report["reused"]["document"] == "v1"
+    # Results are only shared between calls of the same backend
+    assert detector.reusable("acme", "v2", "external") is None
+
+    # Same document, looked up again by another backend: indexed once
+    detector.lookup("acme", "v2", "ignored")
+    assert detector.stats()["lookups"] == 2
+
+
+def test_detector_only_flags_below_reuse_threshold():
+    detector = NearDuplicateDetector(reuse=True)
+    original = _text(1)
+    detector.lookup("acme", "v1", original)
+    detector.remember("acme", "v1", "external", {"data": {}})
+
+    report = detector.lookup("acme", "v2", _edited(original, 150, 25))
+    assert report["matches"] and report["matches"][0][1] < 0.95
+    assert detector.reusable("acme", "v2", "external") is None
+
+
+def test_reuse_is_off_by_default():
+    detector = NearDuplicateDetector()
+    original = _text(1)
+    detector.lookup("acme", "v1", original)
+    detector.remember("acme", "v1", "ollama:test", {"experience": []})
+
+    report = detector.lookup("acme", "v2", _edited(original, 200, 1))
+    assert report["matches"][0][0] == "v1"  # still flagged
+    assert detector.reusable("acme", "v2", "ollama:test") is None
+
+
+def test_tenants_never_see_each_others_documents():
+    detector = NearDuplicateDetector(reuse=True)
+    original = _text(1)
+    detector.lookup("acme", "v1", original)
+    detector.remember("acme", "v1", "ollama:test", {"experience": []})
+
+    report = detector.lookup("globex", "v2", _edited(original, 200, 1))
+    assert report["matches"] == []
+    assert detector.reusable("globex", "v2", "ollama:test") is None
+    assert detector.report("acme", "v2") is None
+
+
+def _cv_pages(email, phone):
+    rng = random.Random(7)
+    words = [f"{rng.choice(['python', 'projet', 'client', 'equipe', 'api'])}{rng.randrange(500)}" for _ in range(700)]
+    lines = [" ".join(words[i:i + 12]) for i in range(0, len(words), 12)]
+    return [["Jean Dupont", email, phone] + lines[:30], lines[30:]]
+
+
+def test_reused_result_gets_the_new_contact_details(monkeypatch, text_pdf):
+    from fastapi_app import main
+    from fastapi_app.pdf_worker import PdfWorkerPool
+
+    monkeypatch.setattr(main, "near_duplicates", NearDuplicateDetector(reuse=True))
+    monkeypatch.setattr(main, "pdf_pool", PdfWorkerPool(workers=0))
+    calls = []
+
+    def fake_ollama(text, usage=None, deadline=None):
+        calls.append(text)
+        email, phone = text.splitlines()[1:3]
+        return {"personal": {"full_name": "Jean Dupont", "email": email, "phone": phone, "address": "Lyon"}}
+
+    monkeypatch.setattr(main, "parse_cv_with_ollama", fake_ollama)
+    main.run_ollama_pipeline(text_pdf(_cv_pages("jean.dupont@example.com", "0612345678")))
+    result, _ = main.run_ollama_pipeline(text_pdf(_cv_pages("jdupont@mail.fr", "0798765432")))
+
+    assert len(calls) == 1  # second CV served from the near-duplicate
+    assert result["personal"]["email"] == "jdupont@mail.fr"
+    assert result["personal"]["phone"] == "0798765432"
+    assert result["personal"]["full_name"] == "Jean Dupont"
+    # Not written in the new CV anymore: not carried over
+    assert result["personal"]["address"] is None
@@ -0,0 +1,91 @@
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from types import SimpleNamespace
+
+import pytest
+
+from fastapi_app import ocr
+from fastapi_app.page_cache import LRUCache
+
+pytest.importorskip("pypdfium2")
+
+
+class TesseractError(RuntimeError):
+    pass
+
+
+def fake_tesseract(image_to_string):
+    return SimpleNamespace(TesseractError=TesseractError, image_to_string=image_to_string)
+
+
+@pytest.fixture
+def threaded_ocr(monkeypatch):
+    """OCR pages in threads, where the mocked pytesseract is visible."""
+    pool = ThreadPoolExecutor(2)
+    monkeypatch.setattr(ocr, "_get_pool", lambda: pool)
+    monkeypatch.setattr(ocr, "ocr_cache", LRUCache(16))
+    yield
+    pool.shutdown()
+
+
+def test_missing_language_falls_back_to_english(monkeypatch, text_pdf):
+    langs = []
+
+    def image_to_string(image, lang):
+        langs.append(lang)
+        if lang != "eng":
+            raise TesseractError("Failed loading language 'fra'")
+        return "Jean Dupont"
+
+    monkeypatch.setattr(ocr, "pytesseract", fake_tesseract(image_to_string))
+
+    assert ocr.ocr_page(text_pdf([["scan"]]), 0, dpi=36, lang="fra+eng") == "Jean Dupont"
+    assert langs == ["fra+eng", "eng"]
+
+
+def test_failed_page_stays_empty_and_others_are_recognised(monkeypatch, text_pdf, threaded_ocr):
+    lock, calls = threading.Lock(), []
+
+    def image_to_string(image, lang):
+        with lock:
+            calls.append(lang)
+            first = len(calls) == 1
+        if first:
+            raise TesseractError("corrupt page")
+        return "Recognised"
+
+    monkeypatch.setattr(ocr, "pytesseract", fake_tesseract(image_to_string))
+
+    texts, stats = ocr.ocr_missing_pages(text_pdf([["scan"], ["scan"]]), ["h1", "h2"], ["", ""], dpi=36, lang="eng")
+
+    assert sorted(texts) == ["", "Recognised"]
+    assert (stats["ocr_pages"], stats["ocr_errors"]) == (1, 1)
+    # Only the recognised page is cached: the failed one is retried on the next upload
+    failed = texts.index("")
+    assert ocr.ocr_cache.get((["h1", "h2"][failed], 36, "eng")) is None
+    assert ocr.ocr_cache.get((["h1", "h2"][1 - failed], 36, "eng")) == "Recognised"
+
+
+def test_pool_uses_spawn_and_the_pdf_worker_ceilings(monkeypatch):
+    monkeypatch.setattr(ocr, "ProcessPoolExecutor", lambda **kwargs: kwargs)
+
+    kwargs = ocr._new_pool(1)
+    assert kwargs["mp_context"].get_start_method() == "spawn"
+    assert kwargs["initializer"].__name__ == "_init_worker"
+
+
+def test_concurrent_requests_share_one_pool(monkeypatch):
+    created = []
+
+    def slow_pool(max_workers):
+        created.append(max_workers)
+        threading.Event().wait(0.05)
+        return object()
+
+    monkeypatch.setattr(ocr, "_pool", None)
+    monkeypatch.setattr(ocr, "_new_pool", slow_pool)
+    with ThreadPoolExecutor(4) as threads:
+        pools = list(threads.map(lambda _: ocr._get_pool(), range(4)))
+
+    assert len(created) == 1
+    assert all(pool is pools[0] for pool in pools)
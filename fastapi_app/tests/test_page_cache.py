@@ -0,0 +1,121 @@
+import io
+
+import pdfplumber
+
+from fastapi_app.page_cache import LRUCache, extract_pages_text, page_hash
+
+
+def _pdf(objects) -> bytes:
+    out = b"%PDF-1.4\n"
+    offsets = []
+    for number, body in enumerate(objects, 1):
+        offsets.append(len(out))
+        out += b"%d 0 obj\n%s\nendobj\n" % (number, body)
+    xref = len(out)
+    out += b"xref\n0 %d\n0000000000 65535 f \n" % (len(objects) + 1)
+    out += b"".join(b"%010d 00000 n \n" % offset for offset in offsets)
+    return out + b"trailer\n<< /Size %d /Root 1 0 R >>\nstartxref\n%d\n%%%%EOF" % (len(objects) + 1, xref)
+
+
+def form_pdf(text: str) -> bytes:
+    """One page whose content is only ``q /Fm0 Do Q``: the text lives in the Form XObject."""
+    form = b"BT /F1 11 Tf 50 780 Td (%s) Tj ET" % text.encode("latin-1")
+    page = b"q /Fm0 Do Q"
+    return _pdf([
+        b"<< /Type /Catalog /Pages 2 0 R >>",
+        b"<< /Type /Pages /Kids [4 0 R] /Count 1 >>",
+        b"<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica >>",
+        b"<< /Type /Page /Parent 2 0 R /MediaBox [0 0 612 842] /Resources << /XObject << /Fm0 5 0 R >> >> /Contents 6 0 R >>",
+        b"<< /Type /XObject /Subtype /Form /BBox [0 0 612 842] /Resources << /Font << /F1 3 0 R >> >> /Length %d >>\nstream\n%s\nendstream" % (len(form), form),
+        b"<< /Length %d >>\nstream\n%s\nendstream" % (len(page), page),
+    ])
+
+
+def _hashes(data: bytes):
+    with pdfplumber.open(io.BytesIO(data)) as pdf:
+        return [page_hash(page) for page in pdf.pages]
+
+
+def test_lru_cache_hits_and_evicts_least_recently_used():
+    cache = LRUCache(2)
+    cache.put("a", 1)
+    cache.put("b", 2)
+    assert cache.get("a") == 1
+    cache.put("c", 3)
+
+    assert cache.get("b") is None
+    assert (cache.get("a"), cache.get("c")) == (1, 3)
+    assert cache.stats()["hits"] == 3 and cache.stats()["misses"] == 1
+
+
+def test_same_content_stream_with_other_resources_hashes_differently():
+    jane, john = form_pdf("Jane Doe jane@example.com"), form_pdf("John Roe john@example.com")
+
+    assert _hashes(jane) == _hashes(form_pdf("Jane Doe jane@example.com"))
+    assert _hashes(jane) != _hashes(john)
+
+
+def _read_pages(data: bytes):
+    def read_pages(indexes):
+        with pdfplumber.open(io.BytesIO(data)) as pdf:
+            return {index: pdf.pages[index].extract_text() or "" for index in indexes}
+    return read_pages
+
+
+def test_cache_never_serves_another_documents_page(monkeypatch):
+    monkeypatch.setattr("fastapi_app.page_cache.page_text_cache", LRUCache(16))
+    texts = []
+    for data in (form_pdf("Jane Doe"), form_pdf("John Roe")):
+        texts.append(extract_pages_text("pdfplumber", _hashes(data), _read_pages(data))[0][0])
+
+    assert "Jane Doe" in texts[0] and "John Roe" in texts[1]
+
+
+def test_only_missing_pages_are_read(monkeypatch):
+    monkeypatch.setattr("fastapi_app.page_cache.page_text_cache", LRUCache(16))
+    data = form_pdf("Jane Doe")
+    read = []
+
+    def read_pages(indexes):
+        read.append(indexes)
+        return _read_pages(data)(indexes)
+
+    extract_pages_text("pdfplumber", _hashes(data), read_pages)
+    texts, stats = extract_pages_text("pdfplumber", _hashes(data), read_pages)
+
+    assert read == [[0]]
+    assert "Jane Doe" in texts[0]
+    assert (stats["page_hits"], stats["page_misses"]) == (1, 0)
+
+
+def test_result_cache_is_keyed_by_engine_and_disabled_extractors(monkeypatch):
+    from fastapi_app import main
+
+    monkeypatch.setattr(main, "page_result_cache", LRUCache(16))
+    monkeypatch.setattr(main, "near_duplicates", None)
+    engine = {"name": "pdfplumber"}
+    runs = []
+    run_extractors = main.run_extractors
+
+    def read_pdf_pages(file_data, deadline=None):
+        stats = {"pages": 1, "page_hits": 0, "page_misses": 1, "engine": engine["name"]}
+        return ["h1"], ["Jane Doe\njane@example.com\nPython developer"], stats
+
+    def counting_run(index):
+        runs.append(1)
+        return run_extractors(index)
+
+    monkeypatch.setattr(main, "read_pdf_pages", read_pdf_pages)
+    monkeypatch.setattr(main, "run_extractors", counting_run)
+
+    main.parse_pdf_locally(b"%PDF")
+    main.parse_pdf_locally(b"%PDF")
+    assert len(runs) == 1
+
+    engine["name"] = "pdfium"
+    main.parse_pdf_locally(b"%PDF")
+    assert len(runs) == 2
+
+    monkeypatch.setattr(main, "DISABLED_EXTRACTORS", {"languages"})
+    main.parse_pdf_locally(b"%PDF")
+    assert len(runs) == 3
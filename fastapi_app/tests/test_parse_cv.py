@@ -1,4 +1,4 @@
-uvicorn fastapi_app.main:apport Path
+from pathlib import Path
 
 import pytest
 from fastapi.testclient import TestClient
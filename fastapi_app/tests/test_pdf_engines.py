@@ -0,0 +1,34 @@
+import io
+
+import pdfplumber
+import pytest
+
+from fastapi_app import pdf_engines
+from fastapi_app.pdf_engines import PDF_ENGINES, available_engines, extract_with, select_engine, word_f1
+
+
+@pytest.mark.parametrize("name", available_engines())
+def test_every_engine_reads_the_text_layer(name, text_pdf):
+    texts = extract_with(PDF_ENGINES[name], text_pdf([["Jean Dupont", "jean@example.com"], ["Python developer"]]))
+
+    assert len(texts) == 2
+    assert "jean@example.com" in texts[0]
+    assert word_f1(texts[1], "Python developer") == 1.0
+
+
+def test_auto_keeps_reference_engine_for_short_documents(monkeypatch, text_pdf):
+    monkeypatch.setattr(pdf_engines, "PDF_ENGINE_FAST_PAGES", 2)
+    short = pdfplumber.open(io.BytesIO(text_pdf([["a"]] * 2)))
+    long = pdfplumber.open(io.BytesIO(text_pdf([["a"]] * 3)))
+
+    assert select_engine(short, "auto").name == "pdfplumber"
+    assert select_engine(long, "auto").name != "pdfplumber"
+    assert select_engine(long, "pdfminer").name == "pdfminer"
+    assert select_engine(long, "unknown").name == "pdfplumber"
+
+
+def test_word_f1():
+    assert word_f1("Jean Dupont Python", "jean dupont python") == 1.0
+    assert word_f1("", "") == 1.0
+    assert word_f1("Java", "Python") == 0.0
+    assert 0 < word_f1("Jean Dupont", "Jean Dupont Python") < 1
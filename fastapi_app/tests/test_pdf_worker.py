@@ -0,0 +1,84 @@
+import uuid
+from concurrent.futures import TimeoutError as FuturesTimeoutError
+
+import pytest
+
+from fastapi_app import pdf_worker
+from fastapi_app.pdf_worker import PdfWorkerPool
+
+
+def test_in_process_extraction(text_pdf):
+    hashes, texts, stats = PdfWorkerPool(workers=0).extract(text_pdf([["Jean Dupont", "Python"]]))
+
+    assert len(hashes) == 1
+    assert "Jean Dupont" in texts[0]
+    assert stats["pages"] == 1
+    assert stats["engine"] == "pdfplumber"
+
+
+def test_worker_reports_memory_and_recycles_above_threshold(monkeypatch, text_pdf):
+    monkeypatch.setattr(pdf_worker, "PDF_WORKER_RECYCLE_RSS_MB", 1)
+    pool = PdfWorkerPool(workers=1)
+    try:
+        _, texts, stats = pool.extract(text_pdf([["Jean Dupont"]]), timeout=60)
+        recycles = pool.recycles
+    finally:
+        pool.recycle("test done")
+
+    assert "Jean Dupont" in texts[0]
+    assert stats["worker_pid"] != pdf_worker.os.getpid()
+    assert stats["rss_mb"] > 1
+    assert pool.stats()["documents"] == 1
+    assert recycles == 1
+
+
+def test_started_pool_is_warm_and_health_checked(monkeypatch, text_pdf):
+    monkeypatch.setattr(pdf_worker, "PDF_WORKER_HEALTH_SECONDS", 0)
+    pool = PdfWorkerPool(workers=1)
+    try:
+        pool.start()
+        healthy = pool.check_health()
+        _, _, stats = pool.extract(text_pdf([["Jean Dupont"], ["Python"]]), timeout=60)
+        pool_stats = pool.stats()
+    finally:
+        pool.stop()
+
+    assert healthy and pool_stats["health"]["pids"] == [stats["worker_pid"]]
+    worker = pool_stats["per_worker"][stats["worker_pid"]]
+    # Warmed up in the initializer, before the document arrived
+    assert worker["warm_ms"] is not None
+    assert worker["documents"] == 1 and worker["pages"] == 2
+    assert worker["avg_work_ms"] == stats["work_ms"]
+
+
+def test_page_cache_is_shared_by_workers_and_survives_recycling(text_pdf):
+    document = text_pdf([["Jean Dupont", uuid.uuid4().hex], [uuid.uuid4().hex]])
+    pool = PdfWorkerPool(workers=1)
+    try:
+        _, _, first = pool.extract(document, timeout=60)
+        pool.recycle("test")
+        _, texts, second = pool.extract(document, timeout=60)
+    finally:
+        pool.recycle("test done")
+
+    assert (first["page_hits"], first["page_misses"]) == (0, 2)
+    assert (second["page_hits"], second["page_misses"]) == (2, 0)
+    assert second["worker_pid"] != first["worker_pid"]
+    assert "Jean Dupont" in texts[0]
+
+
+def test_expired_deadline_stops_the_extraction(text_pdf):
+    with pytest.raises(FuturesTimeoutError):
+        PdfWorkerPool(workers=0).extract(text_pdf([["Jean Dupont"]]), timeout=0)
+
+
+def test_inspection_runs_in_a_worker(text_pdf):
+    pool = PdfWorkerPool(workers=1)
+    try:
+        inspection = pool.inspect(text_pdf([["Jean Dupont"], ["Python"]]), timeout=60)
+        assert pool.stats()["in_flight"] == 0
+    finally:
+        pool.recycle("test done")
+
+    assert (inspection.pages, inspection.text_pages) == (2, 2)
+    assert inspection.route == "local"
@@ -0,0 +1,95 @@
+import os
+import pstats
+import time
+
+from fastapi_app import profiling
+from fastapi_app.profiling import ProfileRequest, profile_call
+
+
+def busy_parse():
+    end = time.perf_counter() + 0.1
+    while time.perf_counter() < end:
+        sum(range(1000))
+    return "done"
+
+
+def test_sample_profile_writes_collapsed_stacks(tmp_path, monkeypatch):
+    monkeypatch.setattr(profiling, "PROFILE_DIR", tmp_path)
+
+    result, profile_id = profile_call(ProfileRequest(mode="sample", interval_ms=1), "local", busy_parse)
+
+    assert result == "done"
+    lines = (tmp_path / f"{profile_id}.folded").read_text().splitlines()
+    assert lines
+    stack, count = lines[0].rsplit(" ", 1)
+    assert "busy_parse (tests/test_profiling.py:" in stack
+    assert int(count) > 0
+
+
+def test_cprofile_profile_and_lookup(tmp_path, monkeypatch):
+    monkeypatch.setattr(profiling, "PROFILE_DIR", tmp_path)
+
+    _, profile_id = profile_call(ProfileRequest(mode="cprofile"), "local", busy_parse)
+
+    path = profiling.profile_path(profile_id)
+    assert path == tmp_path / f"{profile_id}.prof"
+    assert pstats.Stats(str(path)).total_calls > 0
+    assert profiling.profile_path("../" + profile_id) is None
+
+
+def test_token_is_required(monkeypatch):
+    monkeypatch.setattr(profiling, "PROFILING_ADMIN_TOKEN", None)
+    assert not profiling.check_token("anything")
+
+    monkeypatch.setattr(profiling, "PROFILING_ADMIN_TOKEN", "s3cret")
+    assert profiling.check_token("s3cret")
+    assert not profiling.check_token("wrong")
+
+
+def test_worker_profiles_are_merged_into_the_request_profile(tmp_path, monkeypatch):
+    monkeypatch.setattr(profiling, "PROFILE_DIR", tmp_path)
+
+    def parse_with_worker():
+        # What a PDF worker task returns for a profiled request (pdf_worker.run_task)
+        _, stacks = profiling.run_profiled("sample", 1, busy_parse)
+        profiling.add_worker_profile(stacks)
+
+    _, profile_id = profile_call(ProfileRequest(mode="sample", interval_ms=1), "local", parse_with_worker)
+
+    folded = (tmp_path / f"{profile_id}.folded").read_text()
+    assert any(line.startswith("[pdf worker];") and "busy_parse" in line for line in folded.splitlines())
+    assert profiling.active_profile() is None
+
+
+def test_worker_cprofile_stats_are_added(tmp_path, monkeypatch):
+    monkeypatch.setattr(profiling, "PROFILE_DIR", tmp_path)
+
+    def worker_parse():
+        return sum(range(10))
+
+    def parse_with_worker():
+        _, stats = profiling.run_profiled("cprofile", 1, worker_parse)
+        profiling.add_worker_profile(stats)
+
+    _, profile_id = profile_call(ProfileRequest(mode="cprofile"), "local", parse_with_worker)
+
+    stats = pstats.Stats(str(tmp_path / f"{profile_id}.prof"))
+    assert any(function == "worker_parse" for _, _, function in stats.stats)
+
+
+def test_stored_profiles_are_pruned(tmp_path, monkeypatch):
+    monkeypatch.setattr(profiling, "PROFILE_DIR", tmp_path)
+    monkeypatch.setattr(profiling, "PROFILE_MAX_FILES", 3)
+    monkeypatch.setattr(profiling, "PROFILE_MAX_AGE_HOURS", 1)
+    now = time.time()
+    for age_hours, name in [(5, "stale"), (0.5, "a"), (0.4, "b"), (0.3, "c")]:
+        path = tmp_path / f"{name}.folded"
+        path.write_text("main 1\n")
+        os.utime(path, (now - age_hours * 3600, now - age_hours * 3600))
+
+    for _ in range(2):
+        profile_call(ProfileRequest(mode="sample", interval_ms=1), "parse", lambda: None)
+
+    names = sorted(path.stem for path in tmp_path.iterdir())
+    assert len(names) == 3
+    assert "stale" not in names and "a" not in names and "b" not in names
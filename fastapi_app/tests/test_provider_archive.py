@@ -0,0 +1,37 @@
+import json
+
+from fastapi_app import provider_archive
+
+
+EXTRACTA_RESPONSE = {
+    "extraction": {
+        "personal": {"full_name": "Jane Doe", "email": "jane@example.com"},
+        "experience": [{"company": "ACME", "position": "Backend Engineer", "start": "2020"}],
+        "skills": ["Python", "Communication"],
+    }
+}
+
+
+def test_archive_round_trip(tmp_path, monkeypatch):
+    monkeypatch.setattr(provider_archive, "PROVIDER_ARCHIVE_DIR", tmp_path)
+
+    path = provider_archive.archive_response("ab" * 32, "extracta", EXTRACTA_RESPONSE, "cv.pdf")
+
+    assert path.parent == tmp_path / "ab" / ("ab" * 32)
+    assert path.name.startswith("extracta-v1.json")
+    assert list(provider_archive.iter_archive()) == [path]
+    envelope = provider_archive.load_archived(path)
+    assert envelope["response"] == EXTRACTA_RESPONSE
+    assert envelope["filename"] == "cv.pdf"
+
+
+def test_retransform_rebuilds_cvschema_offline(tmp_path, monkeypatch):
+    monkeypatch.setattr(provider_archive, "PROVIDER_ARCHIVE_DIR", tmp_path / "archive")
+    path = provider_archive.archive_response("cd" * 32, "extracta", EXTRACTA_RESPONSE)
+
+    _, error = provider_archive.retransform_file(path, tmp_path / "out")
+
+    assert error is None
+    cv = json.loads((tmp_path / "out" / ("cd" * 32) / "extracta-v1.json").read_text())
+    assert cv["experience"][0]["role"] == "Backend Engineer"
+    assert cv["skills"] == {"technical": ["Python"], "soft": ["Communication"]}
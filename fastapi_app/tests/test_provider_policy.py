@@ -0,0 +1,100 @@
+import pytest
+import requests
+
+from fastapi_app.provider_policy import LatencyHistogram, ProviderPolicy
+
+
+class FakeResponse:
+    def __init__(self, status_code, headers=None):
+        self.status_code = status_code
+        self.headers = headers or {}
+
+
+def _provider(statuses):
+    calls = []
+
+    def send(timeout):
+        calls.append(timeout)
+        status = statuses[min(len(calls), len(statuses)) - 1]
+        if isinstance(status, Exception):
+            raise status
+        return FakeResponse(status)
+
+    return send, calls
+
+
+def test_histogram_percentiles():
+    histogram = LatencyHistogram()
+    for _ in range(99):
+        histogram.record(1.0)
+    histogram.record(30.0)
+
+    assert 1.0 <= histogram.percentile(50) < 1.3
+    assert 1.0 <= histogram.percentile(99) < 1.3
+    assert histogram.percentile(100) >= 30
+
+
+def test_timeout_adapts_to_recent_latency(monkeypatch):
+    monkeypatch.setattr("fastapi_app.provider_policy.PROVIDER_TIMEOUT_MIN_SAMPLES", 10)
+    policy = ProviderPolicy()
+
+    assert policy.timeout("hrflow", 60) == 60
+    for _ in range(10):
+        policy.record("hrflow", 4.0)
+    # p99 x 3, within [5, cap]
+    assert 12 <= policy.timeout("hrflow", 60) < 15
+    assert policy.timeout("hrflow", 10) == 10
+
+
+def test_only_transient_failures_are_retried():
+    sleeps = []
+    policy = ProviderPolicy(sleep=sleeps.append)
+
+    send, calls = _provider([502, 200])
+    assert policy.call("docparserai", "DocParserAI API", send).status_code == 200
+    assert len(calls) == 2 and len(sleeps) == 1
+
+    send, calls = _provider([401, 200])
+    assert policy.call("docparserai", "DocParserAI API", send).status_code == 401
+    assert len(calls) == 1
+
+    send, calls = _provider([requests.exceptions.ConnectionError("refused")])
+    with pytest.raises(requests.exceptions.ConnectionError):
+        policy.call("hrflow", "HrFlow API", send)
+    assert len(calls) == 3  # first attempt + PROVIDER_MAX_RETRIES
+
+
+def test_retry_budget_caps_retries_during_an_outage(monkeypatch):
+    monkeypatch.setattr("fastapi_app.provider_policy.RETRY_BUDGET_MIN", 3)
+    monkeypatch.setattr("fastapi_app.provider_policy.RETRY_BUDGET_RATIO", 0.1)
+    policy = ProviderPolicy(sleep=lambda delay: None)
+    send, calls = _provider([503])
+
+    for _ in range(50):
+        assert policy.call("nanonets", "Nanonets API", send).status_code == 503
+
+    # 50 calls: 3 + 10 % of them may be retried, instead of 100 retries
+    assert len(calls) - 50 <= 3 + 5
+    assert policy.stats()["nanonets"]["retry_budget"]["denied"] > 0
+
+
+def test_extracta_alternative_urls_go_through_the_policy(monkeypatch):
+    from fastapi_app import main
+
+    policy = ProviderPolicy(sleep=lambda delay: None)
+    monkeypatch.setattr(main, "provider_policy", policy)
+    monkeypatch.setattr(main, "EXTRACTA_API_KEY", "key")
+    calls = []
+
+    def post(url, timeout, **kwargs):
+        calls.append(url)
+        response = FakeResponse(404 if url == main.EXTRACTA_URL else 502 if len(calls) < 3 else 200)
+        response.json = lambda: {"url": url}
+        return response
+
+    monkeypatch.setattr(main.requests, "post", post)
+
+    assert main.call_extracta_api(b"%PDF", "cv.pdf") == {"url": "https://api.extracta.ai/v1/createExtraction"}
+    # The 502 of the first alternative URL is retried like any provider call
+    assert calls[1:] == ["https://api.extracta.ai/v1/createExtraction"] * 2
+    assert policy.stats()["extracta"]["retry_budget"]["retries"] >= 1
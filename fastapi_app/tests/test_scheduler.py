@@ -0,0 +1,113 @@
+import asyncio
+import time
+
+import pytest
+
+from fastapi_app.pdf_worker import PDF_WORKERS
+from fastapi_app.scheduler import SCHEDULER_CAPS, SCHEDULER_DEFAULT_CAP, AdmissionRejected, FairScheduler, WorkTicket
+
+
+def _run(scheduler, tickets, order, hold=None):
+    async def take(ticket):
+        await scheduler.acquire(ticket)
+        order.append(ticket.tenant)
+        if hold is not None:
+            await asyncio.sleep(hold)
+            await scheduler.release(ticket)
+
+    return [asyncio.ensure_future(take(ticket)) for ticket in tickets]
+
+
+def test_bulk_share_leaves_slots_for_interactive(monkeypatch):
+    monkeypatch.setattr("fastapi_app.scheduler.SCHEDULER_CAPS", {"ollama": 4})
+
+    async def scenario():
+        scheduler = FairScheduler(queue_seconds=5)
+        order = []
+        bulk = _run(scheduler, [WorkTicket("import", "bulk", "ollama") for _ in range(10)], order)
+        await asyncio.sleep(0.01)
+        # Bulk may hold only half of the slots
+        assert order == ["import", "import"]
+
+        interactive = WorkTicket("ui", "interactive", "ollama")
+        await asyncio.wait_for(scheduler.acquire(interactive), 0.1)
+        assert interactive.wait_ms < 100
+
+        for task in bulk:
+            task.cancel()
+        return scheduler.stats()["backends"]["ollama"]["classes"]
+
+    classes = asyncio.run(scenario())
+    assert classes["bulk"]["running"] == 2
+    assert classes["interactive"]["granted"] == 1
+
+
+def test_tenants_share_a_backend_fairly(monkeypatch):
+    monkeypatch.setattr("fastapi_app.scheduler.SCHEDULER_CAPS", {"local": 1})
+    monkeypatch.setattr("fastapi_app.scheduler.SCHEDULER_TENANT_WEIGHTS", {"gold": 2.0})
+
+    async def scenario():
+        scheduler = FairScheduler(queue_seconds=5)
+        blocker = WorkTicket("blocker")
+        await scheduler.acquire(blocker)
+        order = []
+        tickets = [WorkTicket("big") for _ in range(6)] + [WorkTicket("gold") for _ in range(4)]
+        tasks = _run(scheduler, tickets, order, hold=0.001)
+        await asyncio.sleep(0.01)
+        await scheduler.release(blocker)
+        await asyncio.gather(*tasks)
+        return order
+
+    order = asyncio.run(scenario())
+    # Queued after 6 "big" requests, "gold" (weight 2) still gets two turns for each "big" one
+    assert order == ["big", "gold", "gold", "big", "gold", "gold", "big", "big", "big", "big"]
+
+
+def test_waiting_too_long_is_rejected():
+    async def scenario():
+        scheduler = FairScheduler(queue_seconds=0.05)
+        for _ in range(scheduler._queue("external").cap):
+            await scheduler.acquire(WorkTicket(backend="external"))
+        with pytest.raises(AdmissionRejected) as error:
+            await scheduler.acquire(WorkTicket(backend="external"))
+        assert error.value.status_code == 503
+        return scheduler.stats()["backends"]["external"]["classes"]["interactive"]
+
+    stats = asyncio.run(scenario())
+    assert stats["rejected"] == 1 and stats["waiting"] == 0
+
+
+def test_interactive_latency_holds_against_a_saturated_local_backend(monkeypatch):
+    monkeypatch.setattr("fastapi_app.scheduler.SCHEDULER_CAPS", {"local": PDF_WORKERS})
+    document_seconds = 0.05
+
+    async def scenario():
+        scheduler = FairScheduler(queue_seconds=30)
+        # The PDF worker pool: FIFO, one document per worker process
+        pool = asyncio.Semaphore(PDF_WORKERS)
+
+        async def parse(ticket):
+            start = time.perf_counter()
+            await scheduler.acquire(ticket)
+            try:
+                async with pool:
+                    await asyncio.sleep(document_seconds)
+            finally:
+                await scheduler.release(ticket)
+            return time.perf_counter() - start
+
+        bulk = [asyncio.ensure_future(parse(WorkTicket("import", "bulk"))) for _ in range(20)]
+        await asyncio.sleep(0.01)
+        latencies = [await parse(WorkTicket("ui")) for _ in range(5)]
+        for task in bulk:
+            task.cancel()
+        await asyncio.gather(*bulk, return_exceptions=True)
+        return latencies
+
+    latencies = asyncio.run(scenario())
+    # Behind at most the bulk document already in a worker, never behind the bulk backlog
+    assert max(latencies) < document_seconds * 3
+
+
+def test_local_cap_follows_the_pdf_workers():
+    assert SCHEDULER_CAPS["local"] == (PDF_WORKERS or SCHEDULER_DEFAULT_CAP)
@@ -0,0 +1,80 @@
+from fastapi_app.extractors import assemble_result, run_extractors
+from fastapi_app.segmenter import education_items, experience_items, find_sections
+from fastapi_app.text_index import TextIndex
+
+CV_TEXT = """Jane Doe
+jane@example.com
+
+Expérience professionnelle
+Développeuse Backend - ACME SAS                 Janv. 2020 – Aujourd'hui
+Paris, France
+• Conception d'APIs REST en Python/FastAPI
+• Migration vers Kubernetes
+2016 - 2019
+Software Engineer at Hooli Inc.
+- Worked on search
+Formation
+Master en Informatique, Université de Lyon     2014 - 2016
+Compétences
+Python, Docker
+"""
+
+
+def test_sections_are_found_by_heading_lines():
+    sections = find_sections(CV_TEXT.split("\n"))
+
+    assert sections["experience"][0].startswith("Développeuse Backend")
+    assert sections["education"] == ["Master en Informatique, Université de Lyon     2014 - 2016"]
+
+
+def test_experience_entries_are_anchored_on_dates():
+    items = experience_items(find_sections(CV_TEXT.split("\n"))["experience"])
+
+    assert items == [
+        {
+            "company": "ACME SAS",
+            "role": "Développeuse Backend",
+            "start_date": "2020-01",
+            "end_date": "Present",
+            "description": "Conception d'APIs REST en Python/FastAPI\nMigration vers Kubernetes",
+            "location": "Paris, France",
+        },
+        {
+            # Date line on top: the header follows it
+            "company": "Hooli Inc.",
+            "role": "Software Engineer",
+            "start_date": "2016",
+            "end_date": "2019",
+            "description": "Worked on search",
+            "location": None,
+        },
+    ]
+
+
+def test_education_fields():
+    [item] = education_items(find_sections(CV_TEXT.split("\n"))["education"])
+
+    assert (item["school"], item["degree"], item["field"]) == ("Université de Lyon", "Master", "Informatique")
+    assert (item["start_date"], item["end_date"]) == ("2014", "2016")
+
+
+def test_undated_sections_keep_the_company_role_fallback():
+    outputs, _ = run_extractors(TextIndex("Experience\nACME Corp - Backend Engineer\n"), disabled=())
+
+    assert [item["role"] for item in assemble_result(outputs)["experience"]] == ["Backend Engineer"]
+
+
+def test_description_lines_with_years_do_not_anchor_entries():
+    text = (
+        "Experience\nDéveloppeur Backend\nACME Corp, Paris\nJan 2020 - Présent\n"
+        "Migrated the billing platform to Python 3 in 2021\nReduced latency by 40%\n"
+        "Stagiaire - Initech\nJuin 2019 - Août 2019\n"
+    )
+    outputs, _ = run_extractors(TextIndex(text), disabled=())
+    items = assemble_result(outputs)["experience"]
+
+    assert [(item["company"], item["role"]) for item in items] == [
+        ("ACME Corp", "Développeur Backend"),
+        ("Initech", "Stagiaire"),
+    ]
+    assert items[0]["description"] == "Migrated the billing platform to Python 3 in 2021\nReduced latency by 40%"
@@ -0,0 +1,54 @@
+import os
+
+import pytest
+
+from fastapi_app import pdf_worker, shared_buffers
+from fastapi_app.pdf_worker import PdfWorkerPool, extract_document
+from fastapi_app.shared_buffers import SharedBuffers, SpooledDocument, shared_document
+
+
+def test_spool_file_is_released_after_the_block(monkeypatch, tmp_path):
+    monkeypatch.setattr(shared_buffers, "shared_buffers", SharedBuffers(str(tmp_path), min_bytes=1))
+
+    with shared_document(b"%PDF-1.4 payload") as source:
+        assert isinstance(source, SpooledDocument)
+        assert open(source.path, "rb").read() == b"%PDF-1.4 payload"
+
+    assert not os.path.exists(source.path)
+    assert shared_buffers.shared_buffers.stats()["live"] == 0
+
+
+def test_small_uploads_and_missing_directory_fall_back_to_bytes(tmp_path):
+    buffers = SharedBuffers(str(tmp_path / "missing"), min_bytes=16)
+
+    assert buffers.spool(b"tiny") == b"tiny"
+    assert buffers.spool(b"x" * 100) == b"x" * 100
+    assert buffers.stats()["pickled"] == 1 and buffers.stats()["fallbacks"] == 1
+
+
+def test_workers_read_the_spooled_document(monkeypatch, tmp_path, text_pdf):
+    monkeypatch.setattr(pdf_worker.shared_buffers, "min_bytes", 1)
+    monkeypatch.setattr(pdf_worker.shared_buffers, "directory", str(tmp_path))
+    pool = PdfWorkerPool(workers=1)
+    spooled = pool.stats()["shared_buffers"]["spooled"]
+    try:
+        _, texts, _ = pool.extract(text_pdf([["Jean Dupont", "Python"]]), timeout=60)
+        stats = pool.stats()["shared_buffers"]
+    finally:
+        pool.recycle("test done")
+
+    assert "Jean Dupont" in texts[0]
+    assert stats["spooled"] == spooled + 1
+    assert stats["live"] == 0
+    assert not os.listdir(tmp_path)
+
+
+def test_engines_open_the_spool_path(monkeypatch, text_pdf):
+    pytest.importorskip("pypdfium2")
+    monkeypatch.setattr(pdf_worker.shared_buffers, "min_bytes", 1)
+
+    with pdf_worker.shared_document(text_pdf([["Jean Dupont"]])) as source:
+        _, texts, stats = extract_document(source, "pdfium")
+
+    assert stats["engine"] == "pdfium"
+    assert "Jean Dupont" in texts[0]
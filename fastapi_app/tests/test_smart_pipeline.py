@@ -0,0 +1,33 @@
+from fastapi.testclient import TestClient
+
+from fastapi_app import main
+from fastapi_app.pdf_worker import PdfWorkerPool
+
+
+def test_smart_parse_reads_the_pdf_once(monkeypatch, text_pdf):
+    monkeypatch.setattr(main, "pdf_pool", PdfWorkerPool(workers=0))
+    monkeypatch.setattr(main, "near_duplicates", None)
+    reads, prompts = [], []
+    read_pdf_pages = main.read_pdf_pages
+
+    def counting_read(file_data, deadline=None):
+        reads.append(1)
+        return read_pdf_pages(file_data, deadline)
+
+    def fake_sections(text, sections, usage=None, deadline=None):
+        prompts.append(text)
+        return {}
+
+    monkeypatch.setattr(main, "read_pdf_pages", counting_read)
+    monkeypatch.setattr(main, "parse_sections_with_ollama", fake_sections)
+    # Contact details only: every other section is weak and escalated
+    document = text_pdf([["Jeanne Martin", "jeanne.martin@example.com", "0612345678", "Lorem ipsum dolor sit amet"]])
+
+    response = TestClient(main.app).post(
+        "/parse-cv-smart?escalation=ollama", files={"file": ("cv.pdf", document, "application/pdf")}
+    )
+
+    assert response.status_code == 200
+    assert response.headers["X-Parse-Backend"] == "ollama"
+    assert len(reads) == 1
+    assert "Lorem ipsum" in prompts[0]
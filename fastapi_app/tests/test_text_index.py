@@ -0,0 +1,49 @@
+import re
+
+import pytest
+
+from fastapi_app.text_index import TextIndex
+
+SAMPLE_TEXT = (
+    "Jane Doe\n"
+    "Backend Developer\n"
+    "Summary\n"
+    "Engineer with Python experience.\n"
+    "Professional Experience\n"
+    "ACME Corp - Backend Engineer\n"
+    "Education\n"
+    "Master of Computer Science\n"
+    "Skills\n"
+    "Python, Docker\n"
+)
+
+
+@pytest.mark.parametrize(
+    "keywords, stops",
+    [
+        (["experience", "work experience", "employment"], ["education", "skills", "projects"]),
+        (["education", "academic", "university"], ["experience", "skills", "projects"]),
+        (["summary"], ["experience", "education", "skills"]),
+        (["projects"], ["skills"]),
+    ],
+)
+def test_section_matches_previous_regex(keywords, stops):
+    expected = ""
+    for keyword in keywords:
+        match = re.search(rf"{keyword}.*?(?=(?:{'|'.join(stops)}|$))", SAMPLE_TEXT, re.IGNORECASE | re.DOTALL)
+        if match:
+            expected = match.group(0)
+            break
+
+    section, _ = TextIndex(SAMPLE_TEXT).section(keywords, stops)
+
+    assert section == expected
+
+
+def test_lines_offsets_and_tokens():
+    index = TextIndex(SAMPLE_TEXT)
+
+    assert index.lines[:2] == ["Jane Doe", "Backend Developer"]
+    assert SAMPLE_TEXT[index.line_offsets[1]:].startswith("Backend Developer")
+    assert index.line_at(index.find("acme")) == 5
+    assert index.tokens["python"] == [m.start() for m in re.finditer("python", index.lower)]
@@ -0,0 +1,40 @@
+import pytest
+
+from fastapi_app.tolerant_json import repair_json
+
+
+def test_valid_json_with_surrounding_text():
+    assert repair_json('Voici le JSON: {"a": 1, "b": [1, 2]} merci') == ({"a": 1, "b": [1, 2]}, True)
+
+
+def test_trailing_commas_unquoted_keys_and_python_literals():
+    value, complete = repair_json("{personal: {'full_name': 'Jane', email: None,}, skills: ['Python',],}")
+
+    assert complete
+    assert value == {"personal": {"full_name": "Jane", "email": None}, "skills": ["Python"]}
+
+
+def test_truncated_output_keeps_complete_items_only():
+    value, complete = repair_json(
+        '{"skills": ["Python", "Docker"], "experience": [{"company": "ACME", "role": "Dev"}, {"company": "Glo'
+    )
+
+    assert not complete
+    assert value == {"skills": ["Python", "Docker"], "experience": [{"company": "ACME", "role": "Dev"}]}
+
+
+@pytest.mark.parametrize("text", ['{"a": tru', '{"a": 12', '{"a": "unterminated'])
+def test_truncated_scalar_is_dropped(text):
+    assert repair_json(text) == ({}, False)
+
+
+def test_no_json_raises():
+    with pytest.raises(ValueError):
+        repair_json("no json here")
+
+
+def test_long_junk_runs_do_not_recurse():
+    junk = "#" * 5000
+
+    assert repair_json('{"a": ' + junk + '1, "b": ' + junk + '"x"}') == ({"a": 1, "b": "x"}, True)
+    assert repair_json("{" + junk + "a: 1}") == ({"a": 1}, True)
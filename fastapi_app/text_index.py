@@ -0,0 +1,158 @@
+"""
+Per-document text index shared by the local field extractors.
+
+Built once per document, it replaces the independent full-text rescans each
+extractor used to do (lowercasing the whole text, splitting it into lines,
+one DOTALL regex per section keyword).
+
+Benchmark (extraction cost with and without the index):
+    python text_index.py <path_to_pdf_file> [iterations]
+"""
+import re
+import sys
+import time
+from bisect import bisect_right
+from typing import Dict, Iterable, List, Optional, Tuple
+
+TOKEN_PATTERN = re.compile(r"[\w+#.]+")
+
+
+class TextIndex:
+    """
+    Lightweight index over the full text of one CV.
+
+    - ``lower``: lowercase copy with the same offsets as ``text``
+    - ``line_offsets``: start offset of every line (``lines[i]`` starts at ``line_offsets[i]``)
+    - ``tokens``: lowercase token -> list of start offsets (built on first use)
+    - ``find``/``section``: keyword and section boundary lookups on ``lower``
+    """
+
+    def __init__(self, text: str) -> None:
+        self.text = text
+        lower = text.lower()
+        if len(lower) != len(text):
+            # A few characters (e.g. "İ") lowercase to two code points: keep offsets aligned
+            lower = "".join(c.lower() if len(c.lower()) == 1 else c for c in text)
+        self.lower = lower
+        self.lines = text.split("\n")
+        self.line_offsets: List[int] = []
+        offset = 0
+        for line in self.lines:
+            self.line_offsets.append(offset)
+            offset += len(line) + 1
+        # Without re.MULTILINE, "$" also matches just before a trailing newline
+        self.end = len(text) - 1 if text.endswith("\n") else len(text)
+        self._tokens: Optional[Dict[str, List[int]]] = None
+        self._first: Dict[Tuple[str, int], int] = {}
+
+    @property
+    def tokens(self) -> Dict[str, List[int]]:
+        if self._tokens is None:
+            tokens: Dict[str, List[int]] = {}
+            for match in TOKEN_PATTERN.finditer(self.lower):
+                tokens.setdefault(match.group(0), []).append(match.start())
+            self._tokens = tokens
+        return self._tokens
+
+    def line_at(self, offset: int) -> int:
+        """Index of the line containing ``offset``."""
+        return bisect_right(self.line_offsets, offset) - 1
+
+    def find(self, word: str, start: int = 0) -> int:
+        """Case-insensitive position of ``word`` at or after ``start`` (-1 if absent)."""
+        key = (word, start)
+        if key not in self._first:
+            self._first[key] = self.lower.find(word.lower(), start)
+        return self._first[key]
+
+    def section(self, keywords: Iterable[str], stops: Iterable[str]) -> Tuple[str, Optional[str]]:
+        """
+        Text from the first keyword found (in ``keywords`` order) up to the
+        next stop word, or to the end of the document.
+
+        Same boundaries as ``re.search(rf"{keyword}.*?(?=(?:stop1|stop2|$))", text, re.I | re.S)``.
+
+        Returns:
+            Tuple (section_text, matched_keyword); ("", None) when no keyword is present.
+        """
+        stops = list(stops)
+        for keyword in keywords:
+            start = self.find(keyword)
+            if start == -1:
+                continue
+            body_start = start + len(keyword)
+            end = self.end if body_start <= self.end else len(self.text)
+            for stop in stops:
+                position = self.find(stop, body_start)
+                if position != -1 and position < end:
+                    end = position
+            return self.text[start:end], keyword
+        return "", None
+
+
+def _legacy_scan(full_text: str) -> str:
+    """Previous approach: every extractor rescans the raw text on its own."""
+    text_lower = full_text.lower()
+    full_text.split("\n")[:10]
+    for keyword in ["experience", "work experience", "employment", "career", "professional experience"]:
+        if re.search(rf"{keyword}.*?(?=(?:education|skills|projects|$))", full_text, re.IGNORECASE | re.DOTALL):
+            break
+    for keyword in ["education", "academic", "university", "degree", "diploma"]:
+        if re.search(rf"{keyword}.*?(?=(?:experience|skills|projects|$))", full_text, re.IGNORECASE | re.DOTALL):
+            break
+    for keyword in ["summary", "profile", "about", "objective", "overview"]:
+        if re.search(rf"{keyword}.*?(?=(?:experience|education|skills|$))", full_text, re.IGNORECASE | re.DOTALL):
+            break
+    return text_lower
+
+
+def _indexed_scan(full_text: str) -> TextIndex:
+    index = TextIndex(full_text)
+    index.lines[:10]
+    index.section(["experience", "work experience", "employment", "career", "professional experience"],
+                  ["education", "skills", "projects"])
+    index.section(["education", "academic", "university", "degree", "diploma"],
+                  ["experience", "skills", "projects"])
+    index.section(["summary", "profile", "about", "objective", "overview"],
+                  ["experience", "education", "skills"])
+    return index
+
+
+def benchmark(full_text: str, iterations: int = 200) -> Dict[str, float]:
+    """Average milliseconds per document for the shared scans, without and with the index."""
+    results = {}
+    for name, func in (("without_index_ms", _legacy_scan), ("with_index_ms", _indexed_scan)):
+        start = time.perf_counter()
+        for _ in range(iterations):
+            func(full_text)
+        results[name] = round((time.perf_counter() - start) * 1000 / iterations, 4)
+    return results
+
+
+if __name__ == "__main__":
+    if len(sys.argv) < 2:
+        print("Usage: python text_index.py <path_to_pdf_file> [iterations]")
+        sys.exit(1)
+
+    import logging
+
+    from main import extract_text_from_pdf, parse_pdf_locally
+    from page_cache import page_result_cache
+
+    logging.getLogger("fastapi-cv-parser").setLevel(logging.WARNING)
+
+    with open(sys.argv[1], "rb") as f:
+        data = f.read()
+    iterations = int(sys.argv[2]) if len(sys.argv) > 2 else 200
+
+    text = extract_text_from_pdf(data)
+    print(f"Texte: {len(text)} caractères, {iterations} itérations")
+    for name, value in benchmark(text, iterations).items():
+        print(f"  {name}: {value} ms")
+
+    # End-to-end local extraction (page text cached, result cache bypassed)
+    page_result_cache.max_size = 0
+    start = time.perf_counter()
+    for _ in range(iterations):
+        parse_pdf_locally(data)
+    print(f"  parse_pdf_locally (indexed): {round((time.perf_counter() - start) * 1000 / iterations, 4)} ms")
@@ -0,0 +1,184 @@
+"""
+Tolerant JSON parser used to salvage LLM output instead of failing the request.
+
+Handles the usual defects of generated JSON: text around the object,
+trailing commas, unquoted or single-quoted keys/strings, Python literals
+(True/False/None) and output truncated in the middle of a value (e.g. the
+generation hit ``num_predict`` or a timeout). Whatever was fully generated is
+kept; an unfinished trailing scalar is dropped.
+"""
+import json
+from typing import Any, List, Tuple
+
+_LITERALS = {"true": True, "false": False, "null": None, "True": True, "False": False, "None": None}
+_BARE_CHARS = set("abcdefghijklmnopqrstuvwxyzABCDEFGHIJKLMNOPQRSTUVWXYZ0123456789_-+.$")
+_ESCAPES = {'"': '"', "'": "'", "\\": "\\", "/": "/", "b": "\b", "f": "\f", "n": "\n", "r": "\r", "t": "\t"}
+
+
+class _Truncated(Exception):
+    """Raised when the input ends before the current scalar value is complete."""
+
+
+class _Parser:
+    def __init__(self, text: str) -> None:
+        self.text = text
+        self.pos = 0
+        self.complete = True
+
+    def _skip(self, extra: str = "") -> None:
+        while self.pos < len(self.text) and (self.text[self.pos].isspace() or self.text[self.pos] in extra):
+            self.pos += 1
+
+    def _peek(self) -> str:
+        return self.text[self.pos] if self.pos < len(self.text) else ""
+
+    def value(self) -> Any:
+        self._skip()
+        char = self._peek()
+        if not char:
+            raise _Truncated()
+        if char == "{":
+            return self.object()
+        if char == "[":
+            return self.array()
+        if char in "\"'":
+            return self.string()
+        return self.bare()
+
+    def object(self) -> dict:
+        self.pos += 1
+        result = {}
+        while True:
+            self._skip(",")
+            char = self._peek()
+            if not char:
+                self.complete = False
+                return result
+            if char == "}":
+                self.pos += 1
+                return result
+            if char == "]":
+                # Mismatched bracket: close the object here
+                return result
+            try:
+                key = self.string() if char in "\"'" else self.bare(as_key=True)
+                self._skip()
+                if self._peek() != ":":
+                    if not self._peek():
+                        raise _Truncated()
+                    # Key without value: skip it
+                    continue
+                self.pos += 1
+                value = self.value()
+            except _Truncated:
+                self.complete = False
+                return result
+            if not self.complete and value in ({}, []):
+                # Container cut before its first element: treat as missing
+                return result
+            result[str(key)] = value
+
+    def array(self) -> list:
+        self.pos += 1
+        result: List[Any] = []
+        while True:
+            self._skip(",")
+            char = self._peek()
+            if not char:
+                self.complete = False
+                return result
+            if char == "]":
+                self.pos += 1
+                return result
+            if char == "}":
+                return result
+            try:
+                value = self.value()
+            except _Truncated:
+                self.complete = False
+                return result
+            if not self.complete and value in ({}, []):
+                return result
+            result.append(value)
+
+    def string(self) -> str:
+        quote = self.text[self.pos]
+        self.pos += 1
+        chars = []
+        while self.pos < len(self.text):
+            char = self.text[self.pos]
+            if char == quote:
+                self.pos += 1
+                return "".join(chars)
+            if char == "\\":
+                if self.pos + 1 >= len(self.text):
+                    break
+                escape = self.text[self.pos + 1]
+                if escape == "u":
+                    code = self.text[self.pos + 2:self.pos + 6]
+                    if len(code) < 4:
+                        break
+                    try:
+                        chars.append(chr(int(code, 16)))
+                    except ValueError:
+                        chars.append(code)
+                    self.pos += 6
+                    continue
+                chars.append(_ESCAPES.get(escape, escape))
+                self.pos += 2
+                continue
+            chars.append(char)
+            self.pos += 1
+        raise _Truncated()
+
+    def bare(self, as_key: bool = False) -> Any:
+        while True:
+            start = self.pos
+            while self.pos < len(self.text) and self.text[self.pos] in _BARE_CHARS:
+                self.pos += 1
+            token = self.text[start:self.pos]
+            if token:
+                break
+            # Unexpected character: skip it (in a loop, junk runs can be thousands of characters long)
+            self.pos += 1
+            if self.pos >= len(self.text):
+                raise _Truncated()
+            if not as_key:
+                self._skip()
+                char = self._peek()
+                if not char:
+                    raise _Truncated()
+                if char in "{[\"'":
+                    return self.value()
+        if self.pos >= len(self.text):
+            # The token may have been cut ("tru", "12" of "123")
+            raise _Truncated()
+        if as_key:
+            return token
+        if token in _LITERALS:
+            return _LITERALS[token]
+        try:
+            return json.loads(token)
+        except ValueError:
+            return token
+
+
+def repair_json(text: str) -> Tuple[Any, bool]:
+    """
+    Parse ``text`` as leniently as possible.
+
+    Returns:
+        Tuple (value, complete): ``complete`` is False when the input was
+        truncated and the value only holds what was fully generated.
+
+    Raises:
+        ValueError: ``text`` contains no JSON object or array at all.
+    """
+    starts = [position for position in (text.find("{"), text.find("[")) if position != -1]
+    if not starts:
+        raise ValueError("No JSON object found")
+
+    parser = _Parser(text)
+    parser.pos = min(starts)
+    value = parser.value()
+    return value, parser.complete
@@ -1,7 +1,7 @@
 import { Component } from '@angular/core';
 import { CommonModule } from '@angular/common';
 import { ReactiveFormsModule, FormsModule, FormBuilder, Validators, FormGroup, FormArray } from '@angular/forms';
-import { CvParserService, ParsedCV } from '../../services/cv-parser.service';
+import { CvParserService, ParsedCV, applyCvPatch } from '../../services/cv-parser.service';
 import { UserService } from '../../services/user.service';
 import { ProjectService } from '../../services/project.service';
 import { forkJoin, of } from 'rxjs';
@@ -22,7 +22,8 @@ export class CvUploadComponent {
   errorMsg = '';
   successMsg = '';
   parsedData: ParsedCV | null = null;
-  parsingMethod: 'local' | 'external' | 'ollama' = 'local'; // Méthode de parsing sélectionnée
+  parsingMethod: 'local' | 'external' | 'ollama' | 'progressive' = 'local'; // Méthode de parsing sélectionnée
+  isRefining = false; // Parsing progressif: résultat local affiché, amélioration LLM en cours
 
   constructor(
     private fb: FormBuilder, 
@@ -160,6 +161,11 @@ export class CvUploadComponent {
     this.errorMsg = '';
     this.successMsg = '';
     
+    if (this.parsingMethod === 'progressive') {
+      this.submitProgressive(this.selectedFile);
+      return;
+    }
+    
     // Choose method based on parsingMethod
     let parseObservable;
     switch (this.parsingMethod) {
@@ -181,7 +187,8 @@ export class CvUploadComponent {
         const methodNames = {
           'local': 'Local',
           'external': 'External API',
-          'ollama': 'Ollama LLM'
+          'ollama': 'Ollama LLM',
+          'progressive': 'Progressive'
         };
         const method = methodNames[this.parsingMethod];
         this.successMsg = `CV parsed successfully using ${method}! Form has been auto-filled.`;
@@ -190,29 +197,70 @@ export class CvUploadComponent {
         console.log(`Parsed CV data (${method}):`, data);
         console.log(`Found ${data.experience?.length || 0} experiences, ${data.education?.length || 0} education entries, ${data.languages?.length || 0} languages`);
       },
-      error: (err) => {
-        console.error('CV parsing error:', err);
-        this.isLoading = false;
-        this.successMsg = '';
-        
-        // Better error messages based on error type
-        if (err.status === 0) {
-          this.errorMsg = 'Cannot connect to the CV parser service. Please make sure the FastAPI server is running on http://localhost:8000';
-        } else if (err.status === 400) {
-          this.errorMsg = err.error?.detail || 'Invalid file format. Please upload a PDF file.';
-        } else if (err.status === 413) {
-          this.errorMsg = 'File is too large. Maximum size is 8MB.';
-        } else if (err.status === 503) {
-          this.errorMsg = err.error?.detail || 'Ollama service is not available. Please make sure Ollama is running.';
-        } else if (err.status === 500 || err.status === 502 || err.status === 504) {
-          this.errorMsg = err.error?.detail || 'The CV parsing service encountered an error. Please try again later.';
-        } else {
-          this.errorMsg = err.error?.detail || 'Failed to parse CV. Please try again.';
+      error: (err) => this.handleParseError(err),
+    });
+  }
+
+  /**
+   * Parsing progressif: le formulaire est rempli avec le résultat local dès qu'il arrive,
+   * puis seuls les champs améliorés par Ollama / l'API externe sont mis à jour.
+   */
+  submitProgressive(file: File) {
+    this.isRefining = false;
+    this.cvService.parseCvProgressive(file).subscribe({
+      next: (event) => {
+        if (event.type === 'local') {
+          this.parsedData = event.cv;
+          this.patchForm(event.cv);
+          this.isLoading = false;
+          this.isRefining = true;
+          this.successMsg = 'Form auto-filled from local parsing. Refining with AI...';
+        } else if (event.type === 'patch' && this.parsedData) {
+          if (event.ops.length > 0) {
+            this.parsedData = applyCvPatch(this.parsedData, event.ops);
+            this.patchForm(this.parsedData);
+          }
+          console.log(`Refined sections (${event.backend}):`, event.escalated, event.ops);
+          this.successMsg = event.ops.length > 0
+            ? `CV refined (${event.escalated.join(', ')}). Form has been updated.`
+            : 'CV parsed successfully! Form has been auto-filled.';
+        } else if (event.type === 'error') {
+          console.warn('CV refinement failed, keeping local result:', event.detail);
+          this.successMsg = 'CV parsed locally (AI refinement unavailable). Form has been auto-filled.';
         }
       },
+      complete: () => {
+        this.isLoading = false;
+        this.isRefining = false;
+      },
+      error: (err) => {
+        this.isRefining = false;
+        this.handleParseError(err);
+      },
     });
   }
 
+  handleParseError(err: any) {
+    console.error('CV parsing error:', err);
+    this.isLoading = false;
+    this.successMsg = '';
+    
+    // Better error messages based on error type
+    if (err.status === 0) {
+      this.errorMsg = 'Cannot connect to the CV parser service. Please make sure the FastAPI server is running on http://localhost:8000';
+    } else if (err.status === 400) {
+      this.errorMsg = err.error?.detail || 'Invalid file format. Please upload a PDF file.';
+    } else if (err.status === 413) {
+      this.errorMsg = 'File is too large. Maximum size is 8MB.';
+    } else if (err.status === 503) {
+      this.errorMsg = err.error?.detail || 'Ollama service is not available. Please make sure Ollama is running.';
+    } else if (err.status === 500 || err.status === 502 || err.status === 504) {
+      this.errorMsg = err.error?.detail || 'The CV parsing service encountered an error. Please try again later.';
+    } else {
+      this.errorMsg = err.error?.detail || 'Failed to parse CV. Please try again.';
+    }
+  }
+
   patchForm(data: ParsedCV) {
     // Mettre à jour les champs de base
     this.form.patchValue({
@@ -42,6 +42,48 @@ export interface ParsedCV {
   }>;
 }
 
+// Field-level change pushed by /parse-cv-progressive (JSON Patch operation)
+export interface CvPatchOperation {
+  op: 'add' | 'remove' | 'replace';
+  path: string;
+  value?: unknown;
+}
+
+export type ProgressiveParseEvent =
+  | { type: 'local'; cv: ParsedCV }
+  | { type: 'patch'; backend: string; escalated: string[]; ops: CvPatchOperation[] }
+  | { type: 'error'; detail: string };
+
+/**
+ * Apply the operations of a `patch` event to a parsed CV (returns a new object)
+ */
+export function applyCvPatch(cv: ParsedCV, ops: CvPatchOperation[]): ParsedCV {
+  const result = structuredClone(cv) as any;
+  for (const op of ops) {
+    const keys = op.path.split('/').slice(1).map(k => k.replace(/~1/g, '/').replace(/~0/g, '~'));
+    let parent = result;
+    for (const key of keys.slice(0, -1)) {
+      parent = parent[key];
+    }
+    const last = keys[keys.length - 1];
+    if (Array.isArray(parent)) {
+      const index = Number(last);
+      if (op.op === 'remove') {
+        parent.splice(index, 1);
+      } else if (op.op === 'add') {
+        parent.splice(index, 0, op.value);
+      } else {
+        parent[index] = op.value;
+      }
+    } else if (op.op === 'remove') {
+      delete parent[last];
+    } else {
+      parent[last] = op.value;
+    }
+  }
+  return result as ParsedCV;
+}
+
 @Injectable({
   providedIn: 'root'
 })
@@ -85,5 +127,66 @@ export class CvParserService {
       // Note: Don't set Content-Type header, let browser set it with boundary for multipart/form-data
     });
   }
+
+  /**
+   * Parse CV progressively: emits the local result immediately, then a field-level
+   * patch once Ollama / the external API has refined the weak sections.
+   * Server-Sent Events over a POST request (EventSource only supports GET), read with fetch.
+   */
+  parseCvProgressive(file: File, escalation: 'ollama' | 'external' | 'none' = 'ollama'): Observable<ProgressiveParseEvent> {
+    return new Observable<ProgressiveParseEvent>(subscriber => {
+      const controller = new AbortController();
+      const formData = new FormData();
+      formData.append('file', file);
+
+      const emit = (block: string) => {
+        const event = block.match(/^event: (.*)$/m)?.[1];
+        const data = JSON.parse(block.match(/^data: (.*)$/m)?.[1] ?? '{}');
+        if (event === 'local') {
+          subscriber.next({ type: 'local', cv: data });
+        } else if (event === 'patch') {
+          subscriber.next({ type: 'patch', ...data });
+        } else if (event === 'error') {
+          subscriber.next({ type: 'error', detail: data.detail });
+        }
+      };
+
+      fetch(`${this.apiBase}/parse-cv-progressive?escalation=${escalation}`, {
+        method: 'POST',
+        body: formData,
+        signal: controller.signal,
+      })
+        .then(async response => {
+          if (!response.ok || !response.body) {
+            const error = await response.json().catch(() => ({}));
+            // Same shape as HttpErrorResponse for the existing error handling
+            throw { status: response.status, error };
+          }
+          const reader = response.body.getReader();
+          const decoder = new TextDecoder();
+          let buffer = '';
+          while (true) {
+            const { done, value } = await reader.read();
+            if (done) {
+              break;
+            }
+            buffer += decoder.decode(value, { stream: true });
+            let separator;
+            while ((separator = buffer.indexOf('\n\n')) !== -1) {
+              emit(buffer.slice(0, separator));
+              buffer = buffer.slice(separator + 2);
+            }
+          }
+          subscriber.complete();
+        })
+        .catch(err => {
+          if (!controller.signal.aborted) {
+            subscriber.error(err instanceof TypeError ? { status: 0, error: {} } : err);
+          }
+        });
+
+      return () => controller.abort();
+    });
+  }
 }
 